@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Cache de transformações de imagens para os scripts de mídia
+Guarda o resultado de cadeias de transformações (resize, crop, brilho) de
+cada imagem de origem, com chave (origem, passos). Cada prefixo da cadeia
+também fica em cache: um crop reaproveita o resize anterior. O cache é LRU
+com limite de memória. As imagens retornadas são compartilhadas; para
+desenhar sobre elas, use .copy().
+"""
+
+from collections import OrderedDict
+
+from PIL import Image, ImageEnhance
+
+
+def resize(size, resample=Image.Resampling.LANCZOS):
+    """Passo de redimensionamento."""
+    return ('resize', tuple(size), resample)
+
+
+def crop(box):
+    """Passo de recorte (box = esquerda, topo, direita, base)."""
+    return ('crop', tuple(box))
+
+
+def brightness(factor):
+    """Passo de ajuste de brilho (ImageEnhance.Brightness)."""
+    return ('brightness', factor)
+
+
+def apply_step(image, step):
+    """Aplica um passo de transformação a uma imagem."""
+    op = step[0]
+    if op == 'resize':
+        return image.resize(step[1], step[2])
+    if op == 'crop':
+        return image.crop(step[1])
+    if op == 'brightness':
+        return ImageEnhance.Brightness(image).enhance(step[1])
+    raise ValueError(f"Transformação desconhecida: {op}")
+
+
+def quantize(value, step):
+    """Arredonda value para o múltiplo de step mais próximo (frames vizinhos reaproveitam o resultado)."""
+    return int(round(value / step)) * step
+
+
+def image_bytes(image):
+    """Memória aproximada ocupada pelos pixels de uma imagem."""
+    return image.width * image.height * len(image.getbands())
+
+
+class AssetCache:
+    """Cache LRU de imagens transformadas, limitado a max_bytes."""
+    
+    def __init__(self, max_bytes=256 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.sources = {}
+        self.entries = OrderedDict()
+        self.used_bytes = 0
+        self.hits = 0
+        self.misses = 0
+    
+    def add(self, name, image):
+        """Registra uma imagem de origem (substituir a origem descarta o que foi derivado dela)."""
+        if name in self.sources:
+            for key in [key for key in self.entries if key[0] == ('source', name)]:
+                self.used_bytes -= image_bytes(self.entries.pop(key))
+        self.sources[name] = image
+    
+    def get(self, name, *steps):
+        """Imagem de origem name após os passos, calculada só se ainda não estiver em cache."""
+        if not steps:
+            return self.sources[name]
+        return self.get_or_create(
+            (('source', name),) + steps,
+            lambda: apply_step(self.get(name, *steps[:-1]), steps[-1])
+        )
+    
+    def get_or_create(self, key, create):
+        """Resultado em cache para key, ou create() guardado em cache (para imagens geradas)."""
+        image = self.entries.get(key)
+        if image is not None:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return image
+        
+        self.misses += 1
+        image = create()
+        size = image_bytes(image)
+        if size <= self.max_bytes:
+            self.entries[key] = image
+            self.used_bytes += size
+            while self.used_bytes > self.max_bytes:
+                _, evicted = self.entries.popitem(last=False)
+                self.used_bytes -= image_bytes(evicted)
+        return image
@@ -2,6 +2,8 @@
 from PIL import Image, ImageDraw, ImageFont, ImageFilter, ImageEnhance
 import os
 
+from gradients import vertical_gradient
+
 # Caminhos das imagens
 produto_path = "/home/ubuntu/bem_casado_loja/produto_arroz_integral_real.webp"
 loja_path = "/home/ubuntu/bem_casado_loja/loja_fabrica_bem_casado.webp"
@@ -24,17 +26,8 @@ loja = enhancer.enhance(0.7)
 # Colar loja no topo
 canvas.paste(loja, (0, 0))
 
-# Criar gradiente na parte inferior
-gradient = Image.new('RGB', (width, int(height * 0.45)), (255, 255, 255))
-draw_grad = ImageDraw.Draw(gradient)
-
-# Gradiente suave de branco para rosa/vermelho
-for y in range(int(height * 0.45)):
-    # Cor rosa/vermelho da Bem Casado: #D91656
-    r = int(255 - (255 - 217) * (y / (height * 0.45)))
-    g = int(255 - (255 - 22) * (y / (height * 0.45)))
-    b = int(255 - (255 - 86) * (y / (height * 0.45)))
-    draw_grad.rectangle([(0, y), (width, y+1)], fill=(r, g, b))
+# Criar gradiente na parte inferior: branco para rosa/vermelho da Bem Casado (#D91656)
+gradient = vertical_gradient(width, int(height * 0.45), (255, 255, 255), (217, 22, 86))
 
 # Colar gradiente
 canvas.paste(gradient, (0, int(height * 0.55)))
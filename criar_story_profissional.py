@@ -1,8 +1,15 @@
 #!/usr/bin/env python3
-from PIL import Image, ImageDraw, ImageFont, ImageFilter, ImageEnhance
-import subprocess
-import os
+from PIL import Image, ImageDraw, ImageFont, ImageFilter
+from multiprocessing import shared_memory
+import multiprocessing
+import argparse
+import functools
 import math
+import os
+
+from asset_cache import AssetCache, resize, crop, brightness, quantize
+from gradients import vertical_gradient, vertical_fade
+from video_stream import FFmpegWriter
 
 # Configurações
 fps = 30
@@ -13,27 +20,60 @@ width, height = 1080, 1920
 # Caminhos
 produto_path = "/home/ubuntu/bem_casado_loja/produto_arroz_integral_real.webp"
 loja_path = "/home/ubuntu/bem_casado_loja/loja_fabrica_bem_casado.webp"
-frames_dir = "/home/ubuntu/bem_casado_loja/story_frames_pro"
 output_video = "/home/ubuntu/bem_casado_loja/story_degustacao_profissional.mp4"
 
-os.makedirs(frames_dir, exist_ok=True)
+# Cache de imagens transformadas (por processo) e passo do zoom do produto:
+# larguras arredondadas para múltiplos de zoom_step_px reaproveitam o mesmo resize
+cache_max_mb = 256
+zoom_step_px = 4
+
+# Memória compartilhada entre processos: área com espaço para alguns frames
+frame_size = width * height * 3
+frame_buffer = None
+worker_error = None
 
-# Carregar imagens
-produto_img = Image.open(produto_path)
-loja_img = Image.open(loja_path)
 
-# Fontes
-try:
-    font_title = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf", 90)
-    font_subtitle = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf", 55)
-    font_price = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf", 110)
-    font_info = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf", 48)
-except:
-    font_title = font_subtitle = font_price = font_info = ImageFont.load_default()
+def load_assets():
+    """Carrega imagens e fontes (uma vez por processo)."""
+    global assets, produto_img, loja_img, font_title, font_subtitle, font_price, font_info
+    
+    produto_img = Image.open(produto_path)
+    produto_img.load()
+    loja_img = Image.open(loja_path)
+    loja_img.load()
+    
+    assets = AssetCache(max_bytes=cache_max_mb * 1024 * 1024)
+    assets.add('produto', produto_img)
+    assets.add('loja', loja_img)
+    
+    try:
+        font_title = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf", 90)
+        font_subtitle = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf", 55)
+        font_price = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf", 110)
+        font_info = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf", 48)
+    except:
+        font_title = font_subtitle = font_price = font_info = ImageFont.load_default()
 
-print(f"Gerando {total_frames} frames profissionais...")
 
-for frame_num in range(total_frames):
+@functools.lru_cache(maxsize=None)
+def load_price_font(size):
+    """Fonte do preço animado (cada tamanho é carregado uma vez por processo)."""
+    try:
+        return ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf", size)
+    except:
+        return font_price
+
+
+def product_shadow(prod_w, prod_h):
+    """Sombra sutil sob o produto (elipse desfocada)."""
+    shadow = Image.new('RGBA', (prod_w + 60, prod_h + 60), (0, 0, 0, 0))
+    shadow_draw = ImageDraw.Draw(shadow)
+    shadow_draw.ellipse([20, prod_h + 20, prod_w + 40, prod_h + 50], fill=(0, 0, 0, 40))
+    return shadow.filter(ImageFilter.GaussianBlur(25))
+
+
+def render_frame(frame_num):
+    """Desenha um frame completo (depende só de frame_num e dos recursos carregados)."""
     progress = frame_num / total_frames
     
     # Canvas branco clean
@@ -45,25 +85,20 @@ for frame_num in range(total_frames):
         seg_progress = progress / 0.27
         
         # Fundo branco com sutil gradiente
-        for y in range(height):
-            gray = int(255 - (y / height) * 10)
-            draw.line([(0, y), (width, y)], fill=(gray, gray, gray))
+        canvas.paste(vertical_gradient(width, height, (255, 255, 255), (245, 245, 245)), (0, 0))
         
         # Produto com zoom suave (1.2x -> 1.0x)
         zoom = 1.2 - (seg_progress * 0.2)
-        prod_w = int(width * 0.85 * zoom)
+        prod_w = quantize(int(width * 0.85 * zoom), zoom_step_px)
         prod_h = int(produto_img.height * (prod_w / produto_img.width))
-        produto_resized = produto_img.resize((prod_w, prod_h), Image.Resampling.LANCZOS)
+        produto_resized = assets.get('produto', resize((prod_w, prod_h)))
         
         # Centralizar produto
         prod_x = (width - prod_w) // 2
         prod_y = int(height * 0.35) - int((prod_h - int(height * 0.5)) / 2)
         
         # Sombra sutil
-        shadow = Image.new('RGBA', (prod_w + 60, prod_h + 60), (0, 0, 0, 0))
-        shadow_draw = ImageDraw.Draw(shadow)
-        shadow_draw.ellipse([20, prod_h + 20, prod_w + 40, prod_h + 50], fill=(0, 0, 0, 40))
-        shadow = shadow.filter(ImageFilter.GaussianBlur(25))
+        shadow = assets.get_or_create(('sombra', prod_w, prod_h), lambda: product_shadow(prod_w, prod_h))
         
         if produto_resized.mode == 'RGBA':
             canvas.paste(shadow, (prod_x - 30, prod_y - 30), shadow)
@@ -89,16 +124,13 @@ for frame_num in range(total_frames):
         seg_progress = (progress - 0.27) / 0.26
         
         # Fundo: Loja escurecida
-        loja_resized = loja_img.resize((width, int(height * 0.5)), Image.Resampling.LANCZOS)
-        enhancer = ImageEnhance.Brightness(loja_resized)
-        loja_dark = enhancer.enhance(0.4)
+        loja_dark = assets.get('loja', resize((width, int(height * 0.5))), brightness(0.4))
         canvas.paste(loja_dark, (0, 0))
         
         # Gradiente branco na parte inferior
-        for y in range(int(height * 0.4), height):
-            alpha_val = int(((y - height * 0.4) / (height * 0.6)) * 255)
-            overlay = Image.new('RGBA', (width, 1), (255, 255, 255, alpha_val))
-            canvas.paste(overlay, (0, y), overlay)
+        fade_y = int(height * 0.4)
+        fade = vertical_fade(width, height - fade_y, (255, 255, 255))
+        canvas.paste(fade, (0, fade_y), fade)
         
         # Cards de informação com slide-in
         card_offset = int((1 - seg_progress) * 200)
@@ -144,21 +176,13 @@ for frame_num in range(total_frames):
         seg_progress = (progress - 0.53) / 0.27
         
         # Fundo gradiente rosa para branco
-        for y in range(height):
-            ratio = y / height
-            r = int(217 + (255 - 217) * ratio)
-            g = int(22 + (255 - 22) * ratio)
-            b = int(86 + (255 - 86) * ratio)
-            draw.line([(0, y), (width, y)], fill=(r, g, b))
+        canvas.paste(vertical_gradient(width, height, (217, 22, 86), (255, 255, 255)), (0, 0))
         
         # Preço gigante com animação de escala
         scale = 0.5 + (seg_progress * 0.5)
         price_size = int(200 * scale)
         
-        try:
-            font_price_big = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf", price_size)
-        except:
-            font_price_big = font_price
+        font_price_big = load_price_font(price_size)
         
         # Círculo de fundo
         circle_radius = 350
@@ -185,11 +209,12 @@ for frame_num in range(total_frames):
         seg_progress = (progress - 0.8) / 0.2
         
         # Fundo: Loja + overlay escuro
-        loja_full = loja_img.resize((width, int(loja_img.height * (width / loja_img.width))), 
-                                     Image.Resampling.LANCZOS)
-        loja_full = loja_full.crop((0, 0, width, height))
-        enhancer = ImageEnhance.Brightness(loja_full)
-        loja_dark = enhancer.enhance(0.3)
+        loja_dark = assets.get(
+            'loja',
+            resize((width, int(loja_img.height * (width / loja_img.width)))),
+            crop((0, 0, width, height)),
+            brightness(0.3)
+        )
         canvas.paste(loja_dark, (0, 0))
         
         # Overlay escuro
@@ -224,28 +249,95 @@ for frame_num in range(total_frames):
         draw.text((width//2, y_pos), "Sábado • 7h-13h", font=font_info, 
                  fill=(80, 80, 80), anchor="mm")
     
-    # Salvar frame
-    frame_path = os.path.join(frames_dir, f"frame_{frame_num:04d}.png")
-    canvas.save(frame_path)
-    
+    return canvas
+
+
+def init_worker(shm_name):
+    """Inicializa um processo do pool: recursos carregados e memória compartilhada aberta."""
+    global frame_buffer, worker_error
+    try:
+        load_assets()
+        frame_buffer = shared_memory.SharedMemory(name=shm_name)
+    except Exception as e:
+        # Um erro no initializer faria o pool recriar processos sem fim: guardar e relatar no frame
+        worker_error = e
+
+
+def render_to_slot(frame_num, slot):
+    """Desenha o frame direto na posição slot da memória compartilhada (sem pickling)."""
+    if worker_error is not None:
+        raise worker_error
+    canvas = render_frame(frame_num)
+    start = slot * frame_size
+    frame_buffer.buf[start:start + frame_size] = canvas.tobytes()
+    return frame_num
+
+
+def report_progress(frame_num):
+    """Mostra o percentual concluído a cada 45 frames enviados ao ffmpeg."""
     if frame_num % 45 == 0:
-        print(f"Progresso: {int(progress * 100)}%")
+        print(f"Progresso: {int(frame_num / total_frames * 100)}%")
+
 
-print("Frames gerados! Criando vídeo...")
+def render_serial(video):
+    """Desenha e envia os frames um por vez no próprio processo (--jobs 1)."""
+    load_assets()
+    for frame_num in range(total_frames):
+        video.write(render_frame(frame_num))
+        report_progress(frame_num)
+    print(f"📦 Cache de imagens: {assets.hits} reaproveitada(s), {assets.misses} gerada(s)")
 
-ffmpeg_cmd = [
-    "ffmpeg", "-y", "-framerate", str(fps),
-    "-i", os.path.join(frames_dir, "frame_%04d.png"),
-    "-c:v", "libx264", "-pix_fmt", "yuv420p",
-    "-crf", "20", "-preset", "slow",
-    output_video
-]
 
-subprocess.run(ffmpeg_cmd, check=True, capture_output=True)
+def render_parallel(video, jobs):
+    """
+    Distribui os frames entre processos. Cada frame vai para uma posição de um
+    anel na memória compartilhada; os frames são enviados ao ffmpeg em ordem, e
+    uma posição só é reutilizada depois que o frame anterior nela foi enviado.
+    """
+    slots = jobs * 2
+    shm = shared_memory.SharedMemory(create=True, size=slots * frame_size)
+    try:
+        with multiprocessing.Pool(jobs, initializer=init_worker, initargs=(shm.name,)) as pool:
+            pending = {}
+            
+            def submit(frame_num):
+                if frame_num < total_frames:
+                    pending[frame_num] = pool.apply_async(render_to_slot, (frame_num, frame_num % slots))
+            
+            for frame_num in range(slots):
+                submit(frame_num)
+            
+            for frame_num in range(total_frames):
+                pending.pop(frame_num).get()
+                start = (frame_num % slots) * frame_size
+                video.write_buffer(shm.buf[start:start + frame_size])
+                submit(frame_num + slots)
+                report_progress(frame_num)
+    finally:
+        shm.close()
+        shm.unlink()
 
-print("Limpando...")
-for f in os.listdir(frames_dir):
-    os.remove(os.path.join(frames_dir, f))
-os.rmdir(frames_dir)
 
-print(f"✅ Vídeo profissional criado: {output_video}")
+def positive_int(value):
+    """Tipo do argparse para inteiros maiores que zero."""
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"deve ser maior que zero: {value}")
+    return number
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Gera o vídeo Story profissional de degustação")
+    parser.add_argument("--jobs", type=positive_int, default=os.cpu_count() or 1,
+                        help="Processos de renderização (1 = sem paralelismo)")
+    args = parser.parse_args()
+    
+    print(f"Gerando {total_frames} frames profissionais e codificando com ffmpeg ({args.jobs} processo(s))...")
+    
+    with FFmpegWriter(output_video, width, height, fps, crf=20, preset="slow") as video:
+        if args.jobs > 1:
+            render_parallel(video, args.jobs)
+        else:
+            render_serial(video)
+    
+    print(f"✅ Vídeo profissional criado: {output_video}")
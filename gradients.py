@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+"""
+Gradientes e preenchimentos para os scripts de mídia
+As imagens são montadas de uma vez com NumPy (em vez de uma linha desenhada
+por vez) e guardadas em cache pelos parâmetros: em um vídeo, o mesmo fundo é
+gerado uma única vez. As imagens retornadas são compartilhadas; para
+desenhar sobre elas, use .copy().
+"""
+
+import functools
+
+import numpy as np
+from PIL import Image
+
+
+def vertical_ramp(height, start, end):
+    """Valores por linha: start + (end - start) * y / height, truncados como int()."""
+    start = np.asarray(start, dtype=np.float64)
+    end = np.asarray(end, dtype=np.float64)
+    ratio = (np.arange(height, dtype=np.float64) / height).reshape(height, *([1] * start.ndim))
+    return (start + (end - start) * ratio).astype(np.uint8)
+
+
+@functools.lru_cache(maxsize=16)
+def vertical_gradient(width, height, top, bottom):
+    """Gradiente vertical RGB da cor top (linha 0) até bottom."""
+    rows = vertical_ramp(height, top, bottom)
+    pixels = np.broadcast_to(rows.reshape(height, 1, 3), (height, width, 3))
+    return Image.fromarray(np.ascontiguousarray(pixels), 'RGB')
+
+
+@functools.lru_cache(maxsize=16)
+def vertical_fade(width, height, color, alpha_start=0, alpha_end=255):
+    """Camada RGBA de cor única com opacidade variando de alpha_start (topo) a alpha_end."""
+    pixels = np.empty((height, width, 4), dtype=np.uint8)
+    pixels[:, :, :3] = color
+    pixels[:, :, 3] = vertical_ramp(height, alpha_start, alpha_end).reshape(height, 1)
+    return Image.fromarray(pixels, 'RGBA')
@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+"""
+Geração do CHANGELOG_CHECKPOINTS.md
+Monta o Markdown a partir das entradas do log estruturado (changelog_store).
+
+A geração é incremental: um cache guarda, para cada seção, o hash da entrada
+e a posição no arquivo. A cada atualização só os registros novos do log são
+lidos; só a partir da primeira seção nova ou editada o Markdown é gerado de
+novo (os bytes das seções anteriores são copiados), junto com a tabela de
+resumo e o rodapé. O arquivo é sempre substituído de forma atômica.
+"""
+
+import os
+import json
+import hashlib
+
+import changelog_store
+from changelog_store import CHANGELOG_PATH, PROJECT_ROOT
+
+# Configurações
+CACHE_PATH = os.path.join(PROJECT_ROOT, '.checkpoints', 'changelog_render.json')
+CACHE_VERSION = 1
+LOG_TAIL_SIZE = 256  # Bytes do log conferidos para detectar reescritas (rebase, checkout)
+
+HEADER = """# 📋 Log de Checkpoints - Bem Casado Loja
+
+Sistema de rastreamento de alterações com checkpoint ID, data e horário.
+
+> Gerado a partir de `CHANGELOG_CHECKPOINTS.jsonl` por `scripts/create_checkpoint.py`.
+> Para alterar uma entrada: `python3 scripts/create_checkpoint.py edit <ID>`
+
+---
+"""
+
+GUIDE = """## 🔄 Como Adicionar Novos Checkpoints
+
+Sempre que fizer uma alteração no projeto, registre um novo checkpoint com o script:
+
+```bash
+python3 scripts/create_checkpoint.py                               # Modo interativo
+python3 scripts/create_checkpoint.py "Tipo" "Descrição" ["Autor"]  # Modo rápido
+python3 scripts/create_checkpoint.py edit <ID>                     # Completar/corrigir uma entrada
+```
+
+Cada entrada segue este formato:
+
+```markdown
+## 🔖 CHECKPOINT #XXX
+**Data/Hora:** YYYY-MM-DD HH:MM:SS GMT-3  
+**Tipo:** [Tipo da Alteração]  
+**Autor:** [Nome do Autor]
+
+### Descrição:
+[Descrição detalhada da alteração]
+
+### Alterações:
+- [Lista de alterações realizadas]
+
+### Arquivos Afetados:
+- [Lista de arquivos modificados]
+
+### Commit:
+- Hash: [hash do commit]
+- Mensagem: "[mensagem do commit]"
+- Branch: [nome da branch]
+
+### Testes:
+- [Lista de testes realizados]
+```
+
+---
+
+## 📝 Tipos de Checkpoint
+
+- **Migração de Banco de Dados:** Criação/alteração de tabelas
+- **Cadastro de Produtos:** Inserção/atualização de produtos
+- **Correção de Backend:** Alterações no código do servidor
+- **Correção de Frontend:** Alterações no código do cliente
+- **Deploy/Rebuild:** Deploys e rebuilds no Railway
+- **Limpeza de Banco de Dados:** Remoção/limpeza de dados
+- **Configuração:** Alterações em variáveis de ambiente
+- **Documentação:** Atualizações de documentação
+- **Teste:** Execução de testes
+- **Hotfix:** Correção urgente em produção
+- **Feature:** Nova funcionalidade implementada
+- **Refatoração:** Melhoria de código sem alterar funcionalidade
+
+---
+"""
+
+
+def render_entry(entry):
+    """Seção Markdown de uma entrada."""
+    lines = [
+        f"## 🔖 CHECKPOINT #{entry['id']:03d}",
+        f"**Data/Hora:** {entry['datetime']}  ",
+        f"**Tipo:** {entry['type']}  ",
+        f"**Autor:** {entry['author']}",
+        "",
+        "### Descrição:",
+        entry['description'],
+        "",
+    ]
+    if entry.get('sections'):
+        lines += [entry['sections'], ""]
+    lines += ["---", ""]
+    return "\n".join(lines) + "\n"
+
+
+def render_summary_row(entry):
+    """Linha da tabela de resumo."""
+    # Só data e hora: o fuso é sempre GMT-3
+    datetime_str = entry['datetime'].replace(' GMT-3', '')
+    return f"| #{entry['id']:03d} | {datetime_str} | {entry['type']} | ✅ {entry['status']} |"
+
+
+def render_tail(rows, updated, next_id):
+    """Tabela de resumo, guia e rodapé (tudo o que vem depois das seções)."""
+    summary = "\n".join([
+        "## 📊 Resumo de Checkpoints",
+        "",
+        "| ID | Data/Hora | Tipo | Status |",
+        "|----|-----------|------|--------|",
+        *rows,
+        "",
+        "---",
+        "",
+    ]) + "\n"
+    footer = (
+        f"**Última Atualização:** {updated}\n"
+        f"**Próximo Checkpoint ID:** #{next_id:03d}\n"
+    )
+    return summary + GUIDE + "\n" + footer
+
+
+def entry_hash(entry):
+    """Hash do conteúdo de uma entrada (muda quando a entrada é editada)."""
+    data = json.dumps(entry, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(data.encode('utf-8')).hexdigest()
+
+
+def section_info(entry, start, end):
+    """Dados de uma seção guardados no cache."""
+    return {
+        'hash': entry_hash(entry),
+        'start': start,
+        'end': end,
+        'row': render_summary_row(entry),
+        'datetime': entry['datetime'],
+    }
+
+
+def file_stat(path):
+    """Identificação do arquivo (tamanho, mtime) para detectar alterações externas."""
+    st = os.stat(path)
+    return [st.st_size, st.st_mtime_ns]
+
+
+def log_fingerprint(log, offset):
+    """Hash dos últimos bytes do log até offset (confere se o log ainda é o mesmo)."""
+    start = max(0, offset - LOG_TAIL_SIZE)
+    log.seek(start)
+    return hashlib.sha256(log.read(offset - start)).hexdigest()
+
+
+def save_cache(log, sections, sections_end, next_id, path):
+    """Grava o cache de seções com as identificações do changelog e do log."""
+    log_offset = log.seek(0, os.SEEK_END)
+    cache = {
+        'version': CACHE_VERSION,
+        'changelog_stat': file_stat(path),
+        'log_offset': log_offset,
+        'log_tail': log_fingerprint(log, log_offset),
+        'next_id': next_id,
+        'sections_end': sections_end,
+        'sections': {str(checkpoint_id): info for checkpoint_id, info in sections.items()},
+    }
+    os.makedirs(os.path.dirname(CACHE_PATH), exist_ok=True)
+    tmp_file = f"{CACHE_PATH}.tmp.{os.getpid()}"
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        json.dump(cache, f, ensure_ascii=False)
+    os.replace(tmp_file, CACHE_PATH)
+
+
+def load_cache(log, path):
+    """Cache de seções, ou None se não existir ou não corresponder ao changelog e ao log atuais."""
+    try:
+        with open(CACHE_PATH, 'r', encoding='utf-8') as f:
+            cache = json.load(f)
+        if cache.get('version') != CACHE_VERSION or cache['changelog_stat'] != file_stat(path):
+            return None
+    except (OSError, ValueError, KeyError):
+        return None
+    
+    log_size = log.seek(0, os.SEEK_END)
+    if log_size < cache['log_offset'] or log_fingerprint(log, cache['log_offset']) != cache['log_tail']:
+        return None
+    
+    cache['sections'] = {int(checkpoint_id): info for checkpoint_id, info in cache['sections'].items()}
+    return cache
+
+
+def read_new_entries(log, offset):
+    """Entradas gravadas no log a partir de offset (última versão de cada ID) e o último registro."""
+    entries = {}
+    last = None
+    log.seek(offset)
+    for line in log:
+        if not line.endswith(b'\n'):
+            break
+        try:
+            last = json.loads(line)
+        except ValueError:
+            continue
+        entries[last['id']] = {field: last.get(field) for field in changelog_store.ENTRY_FIELDS}
+    return entries, last
+
+
+def write_changelog(log, path=CHANGELOG_PATH):
+    """Gera o Markdown completo a partir do log (gravação atômica) e recria o cache."""
+    entries = changelog_store.load_entries(log)
+    next_id = changelog_store.next_id_from(changelog_store.read_last_record(log))
+    
+    pieces = [(HEADER + "\n").encode('utf-8')]
+    position = len(pieces[0])
+    sections = {}
+    for entry in entries:
+        text = render_entry(entry).encode('utf-8')
+        sections[entry['id']] = section_info(entry, position, position + len(text))
+        pieces.append(text)
+        position += len(text)
+    
+    updated = max((entry['datetime'] for entry in entries), default='-')
+    pieces.append(render_tail([render_summary_row(entry) for entry in entries], updated, next_id).encode('utf-8'))
+    
+    tmp_file = f"{path}.tmp.{os.getpid()}"
+    with open(tmp_file, 'wb') as f:
+        f.write(b''.join(pieces))
+    os.replace(tmp_file, path)
+    save_cache(log, sections, position, next_id, path)
+    return len(entries)
+
+
+def update_changelog(log, path=CHANGELOG_PATH):
+    """
+    Atualiza o Markdown com os registros acrescentados ao log desde a última geração.
+    Sem cache válido (primeiro uso, changelog editado à mão, log reescrito), gera tudo.
+    Retorna quantas seções foram renderizadas.
+    """
+    cache = load_cache(log, path) if os.path.exists(path) else None
+    if cache is None:
+        return write_changelog(log, path)
+    
+    changed, last = read_new_entries(log, cache['log_offset'])
+    sections = cache['sections']
+    dirty = {
+        checkpoint_id: entry for checkpoint_id, entry in changed.items()
+        if checkpoint_id not in sections or sections[checkpoint_id]['hash'] != entry_hash(entry)
+    }
+    next_id = changelog_store.next_id_from(last) if last else cache['next_id']
+    if not dirty and next_id == cache['next_id']:
+        save_cache(log, sections, cache['sections_end'], next_id, path)
+        return 0
+    
+    # Regravar a partir da primeira seção alterada (ou do ponto onde entra a primeira nova)
+    ids = sorted(sections.keys() | dirty.keys())
+    first_dirty = min(dirty, default=None)
+    patch_start = cache['sections_end']
+    for checkpoint_id in ids:
+        if first_dirty is not None and checkpoint_id >= first_dirty and checkpoint_id in sections:
+            patch_start = sections[checkpoint_id]['start']
+            break
+    
+    # Arquivo novo com o trecho inalterado copiado: uma interrupção não deixa o changelog pela metade
+    tmp_file = f"{path}.tmp.{os.getpid()}"
+    with open(path, 'rb') as f, open(tmp_file, 'wb') as out:
+        out.write(f.read(patch_start))
+        pieces = []
+        position = patch_start
+        for checkpoint_id in ids:
+            info = sections.get(checkpoint_id)
+            if info is not None and info['start'] < patch_start:
+                continue
+            if checkpoint_id in dirty:
+                entry = dirty[checkpoint_id]
+                text = render_entry(entry).encode('utf-8')
+                sections[checkpoint_id] = section_info(entry, position, position + len(text))
+            else:
+                # Seção inalterada: os bytes já gerados são reaproveitados
+                f.seek(info['start'])
+                text = f.read(info['end'] - info['start'])
+                sections[checkpoint_id] = {**info, 'start': position, 'end': position + len(text)}
+            pieces.append(text)
+            position += len(text)
+        
+        rows = [sections[checkpoint_id]['row'] for checkpoint_id in ids]
+        updated = max((sections[checkpoint_id]['datetime'] for checkpoint_id in ids), default='-')
+        pieces.append(render_tail(rows, updated, next_id).encode('utf-8'))
+        out.write(b''.join(pieces))
+    os.replace(tmp_file, path)
+    
+    save_cache(log, sections, position, next_id, path)
+    return len(dirty)
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Registro Estruturado do Changelog de Checkpoints
+Os checkpoints do CHANGELOG_CHECKPOINTS.md ficam em um log JSONL somente de
+acréscimo (CHANGELOG_CHECKPOINTS.jsonl); o Markdown é gerado a partir dele.
+Acrescentar uma entrada lê apenas a última linha do log, e a trava (flock)
+no próprio arquivo impede que dois processos gravem o mesmo ID.
+"""
+
+import os
+import re
+import json
+import fcntl
+from contextlib import contextmanager
+
+# Configurações
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CHANGELOG_PATH = os.path.join(PROJECT_ROOT, 'CHANGELOG_CHECKPOINTS.md')
+LOG_PATH = os.path.join(PROJECT_ROOT, 'CHANGELOG_CHECKPOINTS.jsonl')
+TAIL_CHUNK_SIZE = 4096
+DEFAULT_STATUS = 'Concluído'
+
+# Campos de uma entrada (além de 'op', 'next_id' e 'last_commit', controlados pelo log)
+ENTRY_FIELDS = ('id', 'datetime', 'type', 'author', 'description', 'sections', 'status', 'commit')
+
+
+@contextmanager
+def locked_log():
+    """Abre o log para acréscimo com trava exclusiva, importando o Markdown antigo se preciso."""
+    with open(LOG_PATH, 'a+b') as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            if f.seek(0, os.SEEK_END) == 0:
+                migrate_markdown(f)
+            yield f
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def read_last_record(f):
+    """Lê o último registro do log voltando do fim do arquivo em blocos (sem ler o resto)."""
+    position = f.seek(0, os.SEEK_END)
+    tail = b''
+    while position > 0:
+        step = min(TAIL_CHUNK_SIZE, position)
+        position -= step
+        f.seek(position)
+        tail = f.read(step) + tail
+        # A primeira linha do bloco pode estar cortada; só é completa no início do arquivo
+        lines = tail.split(b'\n')
+        complete = lines if position == 0 else lines[1:]
+        for line in reversed(complete):
+            if not line.strip():
+                continue
+            try:
+                return json.loads(line)
+            except ValueError:
+                # Linha truncada por uma gravação interrompida: usa a anterior
+                continue
+    return None
+
+
+def write_record(f, record):
+    """Acrescenta um registro em uma única escrita e força a gravação em disco."""
+    line = json.dumps(record, ensure_ascii=False, separators=(',', ':')) + '\n'
+    f.seek(0, os.SEEK_END)
+    f.write(line.encode('utf-8'))
+    f.flush()
+    os.fsync(f.fileno())
+
+
+def next_id_from(last_record):
+    """Próximo ID livre segundo o último registro do log."""
+    return last_record['next_id'] if last_record else 1
+
+
+def peek_last_record():
+    """Último registro do log, sem trava (pode mudar se outro processo acrescentar antes)."""
+    if not os.path.exists(LOG_PATH) and os.path.exists(CHANGELOG_PATH):
+        with locked_log():
+            pass
+    if not os.path.exists(LOG_PATH):
+        return None
+    with open(LOG_PATH, 'rb') as f:
+        return read_last_record(f)
+
+
+def peek_next_id():
+    """Próximo ID de checkpoint (pode mudar se outro processo acrescentar antes)."""
+    return next_id_from(peek_last_record())
+
+
+def peek_last_commit():
+    """Commit Git registrado pelo checkpoint mais recente que tinha commit (ou None)."""
+    last = peek_last_record()
+    return last.get('last_commit') if last else None
+
+
+def append_entry(entry, on_change=None):
+    """
+    Acrescenta uma nova entrada com o próximo ID livre e retorna a entrada gravada.
+    on_change(f) roda ainda com a trava, para regenerar o Markdown sem concorrência.
+    """
+    with locked_log() as f:
+        last = read_last_record(f)
+        checkpoint_id = next_id_from(last)
+        record = {'op': 'add', **entry, 'id': checkpoint_id, 'next_id': checkpoint_id + 1}
+        record.setdefault('status', DEFAULT_STATUS)
+        record['last_commit'] = entry.get('commit') or (last or {}).get('last_commit')
+        write_record(f, record)
+        if on_change is not None:
+            on_change(f)
+    return record
+
+
+def update_entry(entry, on_change=None):
+    """Acrescenta uma nova versão de uma entrada existente (a última versão prevalece)."""
+    with locked_log() as f:
+        last = read_last_record(f)
+        if entry['id'] >= next_id_from(last):
+            raise KeyError(entry['id'])
+        record = {'op': 'edit', **entry, 'next_id': next_id_from(last), 'last_commit': last.get('last_commit')}
+        write_record(f, record)
+        if on_change is not None:
+            on_change(f)
+    return record
+
+
+def load_entries(f=None):
+    """Todas as entradas do log (última versão de cada ID), ordenadas por ID."""
+    if f is None:
+        if not os.path.exists(LOG_PATH):
+            return []
+        with open(LOG_PATH, 'rb') as log:
+            return load_entries(log)
+    
+    entries = {}
+    f.seek(0)
+    for line in f:
+        try:
+            record = json.loads(line)
+        except ValueError:
+            continue
+        entries[record['id']] = {field: record.get(field) for field in ENTRY_FIELDS}
+    return [entries[checkpoint_id] for checkpoint_id in sorted(entries)]
+
+
+def get_entry(checkpoint_id):
+    """Entrada de um ID (ou None)."""
+    for entry in load_entries():
+        if entry['id'] == checkpoint_id:
+            return entry
+    return None
+
+
+def parse_markdown_entries(content):
+    """Extrai as entradas '## 🔖 CHECKPOINT #NNN' de um CHANGELOG_CHECKPOINTS.md."""
+    entries = []
+    blocks = re.split(r'^## 🔖 CHECKPOINT #(\d+)\s*$', content, flags=re.MULTILINE)
+    for number, block in zip(blocks[1::2], blocks[2::2]):
+        # A entrada termina no separador '---' (o restante é o rodapé do arquivo)
+        block = re.split(r'^---\s*$', block, maxsplit=1, flags=re.MULTILINE)[0]
+        
+        def field(name):
+            match = re.search(rf'^\*\*{name}:\*\*\s*(.*?)\s*$', block, flags=re.MULTILINE)
+            return match.group(1) if match else ''
+        
+        description = ''
+        sections = ''
+        match = re.search(r'^### Descrição:\s*\n(.*)', block, flags=re.MULTILINE | re.DOTALL)
+        if match:
+            description, _, sections = match.group(1).partition('\n### ')
+            sections = '### ' + sections if sections else ''
+        
+        entries.append({
+            'id': int(number),
+            'datetime': field('Data/Hora'),
+            'type': field('Tipo'),
+            'author': field('Autor'),
+            'description': description.strip(),
+            'sections': sections.strip(),
+            'status': DEFAULT_STATUS,
+        })
+    return entries
+
+
+def migrate_markdown(f):
+    """Importa as entradas do CHANGELOG_CHECKPOINTS.md para o log vazio (primeiro uso)."""
+    if not os.path.exists(CHANGELOG_PATH):
+        return
+    
+    with open(CHANGELOG_PATH, 'r', encoding='utf-8') as changelog:
+        entries = parse_markdown_entries(changelog.read())
+    
+    next_id = 1
+    for entry in sorted(entries, key=lambda e: e['id']):
+        next_id = max(next_id, entry['id'] + 1)
+        write_record(f, {'op': 'add', **entry, 'next_id': next_id})
+    if entries:
+        print(f"📦 {len(entries)} checkpoint(s) importado(s) do {os.path.basename(CHANGELOG_PATH)}")
@@ -6,15 +6,49 @@ Permite criar snapshots do código e reverter para estados anteriores
 
 import os
 import sys
+import argparse
+import importlib
 import shutil
 import json
+import gzip
+import hashlib
+import tarfile
+import threading
+import fcntl
+import subprocess
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from datetime import datetime
 import pytz
 
+import checkpoint_git
+import checkpoint_index
+import checkpoint_ignore
+
+try:
+    import zstandard  # Opcional: compressão mais rápida para o modo arquivo
+except ImportError:
+    zstandard = None
+
 # Configurações
 PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 CHECKPOINTS_DIR = os.path.join(PROJECT_ROOT, '.checkpoints')
-CHECKPOINT_INDEX = os.path.join(CHECKPOINTS_DIR, 'index.json')
+CHECKPOINT_INDEX = checkpoint_index.INDEX_DB
+OBJECTS_DIR = os.path.join(CHECKPOINTS_DIR, 'objects')
+LOCK_FILE = os.path.join(CHECKPOINTS_DIR, '.lock')
+BUILD_PREFIX = '.tmp-'  # Checkpoints em construção, renomeados ao final
+MANIFEST_FILENAME = 'manifest.json'
+HASH_ALGORITHM = 'sha256'
+HASH_CHUNK_SIZE = 1024 * 1024  # 1 MB
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 3
+ARCHIVE_EXTENSIONS = {
+    'gzip': '.tar.gz',
+    'zstd': '.tar.zst',
+}
+FICLONE = 0x40049409  # ioctl do Linux para reflink (cópia sob demanda, sem duplicar blocos)
+CLONE_STRATEGIES = ('reflink', 'hardlink', 'copy')
+DEFAULT_JOBS = min(32, (os.cpu_count() or 1) + 4)  # I/O-bound: mesmo padrão do ThreadPoolExecutor
 TIMEZONE = pytz.timezone('America/Sao_Paulo')  # GMT-3
 
 # Diretórios e arquivos a incluir no backup
@@ -29,32 +63,25 @@ BACKUP_INCLUDES = [
     '.env.example',
 ]
 
-# Diretórios a excluir do backup
+# Padrões excluídos do backup (formato do .gitignore; somam-se ao .gitignore
+# e ao .checkpointignore do projeto)
 BACKUP_EXCLUDES = [
-    'node_modules',
-    'dist',
-    'build',
-    '.git',
-    '.checkpoints',
-    '__pycache__',
+    'node_modules/',
+    'dist/',
+    'build/',
+    '.git/',
+    '.checkpoints/',
+    '__pycache__/',
     '.env',
+    '.env.*',
+    '!.env.example',
     '.DS_Store',
 ]
 
 
 def get_next_checkpoint_id():
     """Retorna o próximo ID de checkpoint."""
-    if not os.path.exists(CHECKPOINT_INDEX):
-        return 1
-    
-    with open(CHECKPOINT_INDEX, 'r', encoding='utf-8') as f:
-        index = json.load(f)
-    
-    if not index['checkpoints']:
-        return 1
-    
-    max_id = max(cp['id'] for cp in index['checkpoints'])
-    return max_id + 1
+    return checkpoint_index.peek_next_checkpoint_id()
 
 
 def get_current_datetime():
@@ -75,27 +102,509 @@ def initialize_checkpoints_dir():
         os.makedirs(CHECKPOINTS_DIR)
         print(f"✅ Diretório de checkpoints criado: {CHECKPOINTS_DIR}")
     
+    os.makedirs(OBJECTS_DIR, exist_ok=True)
+    
     if not os.path.exists(CHECKPOINT_INDEX):
-        index = {
-            'version': '1.0',
-            'created_at': get_current_datetime(),
-            'checkpoints': []
-        }
-        with open(CHECKPOINT_INDEX, 'w', encoding='utf-8') as f:
-            json.dump(index, f, indent=2, ensure_ascii=False)
+        # Cria o banco (e migra um index.json antigo, se houver)
+        checkpoint_index.connect().close()
         print(f"✅ Índice de checkpoints criado: {CHECKPOINT_INDEX}")
 
 
-def should_exclude(path, excludes):
-    """Verifica se o caminho deve ser excluído."""
-    for exclude in excludes:
-        if exclude in path:
+def build_ignore_matcher():
+    """Compila BACKUP_EXCLUDES e os arquivos .gitignore/.checkpointignore da raiz."""
+    matcher = checkpoint_ignore.IgnoreMatcher(BACKUP_EXCLUDES)
+    checkpoint_ignore.load_ignore_files(matcher, PROJECT_ROOT, '')
+    return matcher
+
+
+def load_ancestor_ignores(matcher, rel_dir, loaded_dirs):
+    """Carrega os padrões dos diretórios de rel_dir para baixo (ex: client/.gitignore para client/src)."""
+    parts = rel_dir.split('/') if rel_dir else []
+    for depth in range(1, len(parts) + 1):
+        current = '/'.join(parts[:depth])
+        if current not in loaded_dirs:
+            loaded_dirs.add(current)
+            checkpoint_ignore.load_ignore_files(matcher, PROJECT_ROOT, current)
+
+
+def iter_backup_files(quiet=False):
+    """
+    Percorre BACKUP_INCLUDES e retorna (caminho relativo, caminho absoluto) de cada arquivo.
+    As entradas de BACKUP_INCLUDES são sempre incluídas; os padrões de exclusão valem
+    para o conteúdo dos diretórios.
+    """
+    matcher = build_ignore_matcher()
+    loaded_dirs = {''}
+    
+    for item in BACKUP_INCLUDES:
+        source = os.path.join(PROJECT_ROOT, item)
+        
+        if not os.path.exists(source):
+            if not quiet:
+                print(f"⚠️  Ignorando (não existe): {item}")
+            continue
+        
+        if os.path.isfile(source):
+            yield item, source
+        
+        elif os.path.isdir(source):
+            load_ancestor_ignores(matcher, item.strip('/'), loaded_dirs)
+            yield from checkpoint_ignore.walk_files(PROJECT_ROOT, item.strip('/'), matcher)
+
+
+def include_root(rel_path):
+    """Entrada de BACKUP_INCLUDES que contém o caminho (ou None)."""
+    for item in BACKUP_INCLUDES:
+        item = item.strip('/')
+        if rel_path == item or rel_path.startswith(item + '/'):
+            return item
+    return None
+
+
+def is_under_paths(rel_path, paths):
+    """Verifica se o caminho ou algum diretório acima dele está no conjunto."""
+    while rel_path:
+        if rel_path in paths:
             return True
+        rel_path = os.path.dirname(rel_path)
     return False
 
 
-def create_backup(checkpoint_id, description, author):
-    """Cria backup completo do código."""
+def iter_dirty_files(dirty_paths):
+    """
+    Como iter_backup_files, mas só para os caminhos alterados (arquivos ou diretórios),
+    sem percorrer o resto da árvore. Caminhos que não existem mais são descartados.
+    """
+    matcher = build_ignore_matcher()
+    loaded_dirs = {''}
+    
+    # Um diretório alterado já cobre os caminhos dentro dele
+    for rel_path in sorted(p for p in dirty_paths if not is_under_paths(os.path.dirname(p), dirty_paths)):
+        root = include_root(rel_path)
+        source = os.path.join(PROJECT_ROOT, rel_path)
+        if root is None or not os.path.lexists(source):
+            continue
+        
+        if rel_path != root:
+            parent = os.path.dirname(rel_path)
+            load_ancestor_ignores(matcher, parent, loaded_dirs)
+            # Nenhum diretório entre a entrada incluída e o caminho pode estar ignorado
+            ancestors = parent[len(root):].strip('/').split('/') if parent != root else []
+            if any(matcher.is_ignored('/'.join([root, *ancestors[:depth]]), is_dir=True)
+                   for depth in range(1, len(ancestors) + 1)):
+                continue
+        
+        if os.path.isdir(source) and not os.path.islink(source):
+            if rel_path == root or not matcher.is_ignored(rel_path, is_dir=True):
+                load_ancestor_ignores(matcher, rel_path, loaded_dirs)
+                yield from checkpoint_ignore.walk_files(PROJECT_ROOT, rel_path, matcher)
+        elif rel_path == root or not matcher.is_ignored(rel_path):
+            yield rel_path, source
+
+
+def hash_file(path):
+    """Calcula o hash do conteúdo do arquivo lendo em blocos."""
+    digest = hashlib.new(HASH_ALGORITHM)
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def object_path(file_hash):
+    """Retorna o caminho do objeto no armazenamento endereçado por conteúdo."""
+    return os.path.join(OBJECTS_DIR, file_hash[:2], file_hash[2:])
+
+
+def clone_file(src_file, dest, strategy):
+    """
+    Cria dest com o conteúdo de src_file usando a estratégia indicada.
+    Se o sistema de arquivos recusar reflink/hardlink, faz a cópia dos bytes.
+    Retorna a estratégia efetivamente usada.
+    """
+    try:
+        if strategy == 'reflink':
+            with open(src_file, 'rb') as src, open(dest, 'wb') as dst:
+                fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+            return 'reflink'
+        if strategy == 'hardlink':
+            os.link(src_file, dest)
+            return 'hardlink'
+    except OSError:
+        if os.path.exists(dest):
+            os.remove(dest)
+    
+    shutil.copyfile(src_file, dest)
+    return 'copy'
+
+
+def detect_clone_strategy():
+    """
+    Estratégia automática para gravar objetos: reflink quando .checkpoints/ está no
+    mesmo sistema de arquivos do projeto e ele suporta cópia sob demanda; senão, cópia.
+    
+    Hardlink só é usado quando pedido explicitamente: o objeto passa a ser o mesmo
+    inode do arquivo de trabalho, e um editor que grave no próprio arquivo alteraria
+    o conteúdo dos checkpoints.
+    """
+    if os.stat(PROJECT_ROOT).st_dev != os.stat(CHECKPOINTS_DIR).st_dev:
+        return 'copy'
+    
+    probe = os.path.join(OBJECTS_DIR, f".clone-probe.{os.getpid()}")
+    try:
+        with open(probe, 'wb') as f:
+            f.write(b'checkpoint')
+        return clone_file(probe, probe + '.clone', 'reflink')
+    finally:
+        for path in (probe, probe + '.clone'):
+            if os.path.exists(path):
+                os.remove(path)
+
+
+def store_object(src_file, file_hash, strategy='copy'):
+    """
+    Armazena o conteúdo do arquivo em .checkpoints/objects/ se ainda não existir.
+    Retorna a estratégia usada para gravar o novo objeto (ou None se já existia).
+    """
+    dest = object_path(file_hash)
+    if os.path.exists(dest):
+        # Objeto reutilizado: atualizar o ctime para a coleta de lixo não removê-lo.
+        # O mtime é mantido: com hardlink, o objeto é o próprio arquivo de trabalho
+        st = os.stat(dest)
+        os.utime(dest, ns=(st.st_atime_ns, st.st_mtime_ns))
+        return None
+    
+    os.makedirs(os.path.dirname(dest), exist_ok=True)
+    
+    # Gravar em arquivo temporário e renomear, para nunca deixar objeto parcial
+    # (o ctime do objeto é sempre o da gravação, mesmo com hardlink: a coleta de lixo usa ele)
+    tmp_dest = f"{dest}.tmp.{os.getpid()}.{threading.get_ident()}"
+    used = clone_file(src_file, tmp_dest, strategy)
+    os.replace(tmp_dest, dest)
+    return used
+
+
+def load_manifest(backup_path):
+    """Carrega o manifesto (caminho → hash) de um checkpoint."""
+    manifest_file = os.path.join(CHECKPOINTS_DIR, backup_path, MANIFEST_FILENAME)
+    if not os.path.exists(manifest_file):
+        return None
+    
+    with open(manifest_file, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def get_latest_manifest(storage='objects'):
+    """Retorna (id, manifesto) do checkpoint mais recente com o tipo de armazenamento indicado."""
+    for cp in reversed(list_checkpoints(quiet=True)):
+        if 'backup_path' not in cp or cp.get('storage') != storage:
+            continue
+        manifest = load_manifest(cp['backup_path'])
+        if manifest is not None:
+            return cp['id'], manifest
+    return None, None
+
+
+def stat_key(st):
+    """Tupla usada para detectar arquivos alterados sem ler o conteúdo."""
+    return (st.st_size, st.st_mtime_ns, st.st_ino)
+
+
+def hash_and_store(src_file, strategy='copy'):
+    """Calcula o hash do arquivo e grava o objeto. Retorna (hash, estratégia do objeto novo ou None)."""
+    file_hash = hash_file(src_file)
+    return file_hash, store_object(src_file, file_hash, strategy)
+
+
+def run_bounded(func, items, jobs):
+    """
+    Executa func(*args) para cada (chave, args) em items usando um pool de threads.
+    
+    No máximo jobs * 2 tarefas ficam pendentes por vez, para que a varredura do
+    disco não enfileire a árvore inteira em memória. Retorna (chave, resultado, erro)
+    na ordem de conclusão.
+    """
+    max_pending = max(1, jobs * 2)
+    
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        pending = {}
+        
+        def drain(return_when):
+            done, _ = wait(pending, return_when=return_when)
+            for future in done:
+                key = pending.pop(future)
+                error = future.exception()
+                yield key, (None if error else future.result()), error
+        
+        for key, args in items:
+            if len(pending) >= max_pending:
+                yield from drain(FIRST_COMPLETED)
+            pending[executor.submit(func, *args)] = key
+        
+        while pending:
+            yield from drain(FIRST_COMPLETED)
+
+
+class HashingReader:
+    """Repassa leituras de um arquivo calculando o hash do conteúdo lido."""
+    
+    def __init__(self, fileobj):
+        self.fileobj = fileobj
+        self.digest = hashlib.new(HASH_ALGORITHM)
+    
+    def read(self, size=-1):
+        data = self.fileobj.read(size)
+        self.digest.update(data)
+        return data
+
+
+class ExactSizeReader:
+    """
+    Entrega ao tar exatamente size bytes. Se o arquivo diminuir (ou a leitura
+    falhar) durante a cópia, completa com zeros e guarda o erro: o cabeçalho do
+    tar já foi gravado com o tamanho original e o restante do arquivo continua válido.
+    """
+    
+    def __init__(self, fileobj, size):
+        self.fileobj = fileobj
+        self.remaining = size
+        self.error = None
+    
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = b''
+        if self.error is None:
+            try:
+                data = self.fileobj.read(size)
+            except OSError as e:
+                self.error = str(e)
+            if len(data) < size and self.error is None:
+                self.error = "arquivo diminuiu durante a leitura"
+        if len(data) < size:
+            data += bytes(size - len(data))
+        self.remaining -= size
+        return data
+
+
+class CountingWriter:
+    """Repassa escritas para outro arquivo contando os bytes escritos."""
+    
+    def __init__(self, fileobj):
+        self.fileobj = fileobj
+        self.bytes_written = 0
+    
+    def write(self, data):
+        self.bytes_written += len(data)
+        return self.fileobj.write(data)
+
+
+def resolve_archive_codec(codec):
+    """Escolhe o compressor do arquivo; 'auto' usa zstd quando disponível."""
+    if codec == 'auto':
+        return 'zstd' if zstandard is not None else 'gzip'
+    if codec == 'zstd' and zstandard is None:
+        print("⚠️  Módulo zstandard não instalado, usando gzip")
+        return 'gzip'
+    return codec
+
+
+def open_compressed_writer(raw, codec):
+    """Abre o compressor de streaming sobre o arquivo de saída."""
+    if codec == 'zstd':
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL, threads=-1).stream_writer(raw)
+    return gzip.GzipFile(fileobj=raw, mode='wb', compresslevel=GZIP_LEVEL)
+
+
+def store_files_in_objects(base_files, jobs, clone='auto', git_blobs=None, dirty_paths=None):
+    """
+    Registra os arquivos no armazenamento de objetos.
+    
+    Com git_blobs (caminho -> 'git:<sha1>'), os arquivos versionados e sem
+    alterações entram no manifesto só pelo blob do Git, sem gravar objetos.
+    
+    Com dirty_paths (caminhos alterados, vindos do modo watch), as entradas fora
+    deles são copiadas de base_files sem percorrer a árvore.
+    Retorna (arquivos, erros, estatísticas).
+    """
+    files = {}
+    errors = {}
+    new_objects = 0
+    new_objects_size = 0
+    hashed_files = 0
+    git_files = 0
+    strategy = detect_clone_strategy() if clone == 'auto' else clone
+    cloned_objects = {}
+    
+    def changed_files():
+        """Registra arquivos inalterados e retorna os que precisam ser lidos."""
+        nonlocal git_files
+        if dirty_paths is None:
+            candidates = iter_backup_files()
+        else:
+            for rel_path, entry in base_files.items():
+                if not is_under_paths(rel_path, dirty_paths):
+                    files[rel_path] = dict(entry)
+            candidates = iter_dirty_files(dirty_paths)
+        
+        for rel_path, src_file in candidates:
+            try:
+                st = os.stat(src_file)
+            except OSError as e:
+                errors[rel_path] = str(e)
+                continue
+            
+            entry = {
+                'hash': None,
+                'size': st.st_size,
+                'mode': st.st_mode & 0o777,
+                'stat': list(stat_key(st)),
+            }
+            files[rel_path] = entry
+            
+            previous = base_files.get(rel_path)
+            if git_blobs and rel_path in git_blobs:
+                entry['hash'] = git_blobs[rel_path]
+                git_files += 1
+            elif (previous is not None and tuple(previous.get('stat', ())) == stat_key(st)
+                  and not checkpoint_git.is_git_hash(previous['hash'])):
+                # Arquivo inalterado: reaproveitar hash do checkpoint anterior
+                # (blobs do Git só valem enquanto o arquivo estiver igual ao HEAD)
+                entry['hash'] = previous['hash']
+            else:
+                yield rel_path, (src_file, strategy)
+    
+    for rel_path, result, error in run_bounded(hash_and_store, changed_files(), jobs):
+        if error is not None:
+            errors[rel_path] = str(error)
+            del files[rel_path]
+            continue
+        
+        file_hash, used = result
+        files[rel_path]['hash'] = file_hash
+        hashed_files += 1
+        if used is not None:
+            new_objects += 1
+            new_objects_size += files[rel_path]['size']
+            cloned_objects[used] = cloned_objects.get(used, 0) + 1
+    
+    print(f"✅ Registrados: {len(files)} arquivos ({hashed_files} relidos, {new_objects} objetos novos, "
+          f"{new_objects_size:,} bytes gravados via {strategy}, {jobs} threads)")
+    if git_blobs is not None:
+        print(f"🔗 {git_files} arquivo(s) versionado(s) registrados pelo blob do Git")
+    if set(cloned_objects) - {strategy}:
+        print(f"⚠️  Nem todos os objetos aceitaram {strategy}: {cloned_objects}")
+    
+    stats = {
+        'storage': 'objects',
+        'hashed_files': hashed_files,
+        'new_objects': new_objects,
+        'new_objects_size': new_objects_size,
+        'clone_strategy': strategy,
+        'cloned_objects': cloned_objects,
+        'jobs': jobs,
+    }
+    if dirty_paths is not None:
+        stats['dirty_paths'] = len(dirty_paths)
+    if git_blobs is not None:
+        stats['git_files'] = git_files
+        stats['git_commit'] = checkpoint_git.head_commit()
+    return files, errors, stats
+
+
+def write_archive(checkpoint_path, codec):
+    """
+    Grava os arquivos em um único tar comprimido, em uma só passada: cada arquivo
+    é lido uma vez, com o hash calculado enquanto os bytes seguem para o tar.
+    Retorna (arquivos, erros, estatísticas).
+    """
+    codec = resolve_archive_codec(codec)
+    archive_name = f"files{ARCHIVE_EXTENSIONS[codec]}"
+    archive_file = os.path.join(checkpoint_path, archive_name)
+    
+    files = {}
+    errors = {}
+    
+    with open(archive_file, 'wb') as raw:
+        compressed = open_compressed_writer(raw, codec)
+        counter = CountingWriter(compressed)
+        
+        with tarfile.open(fileobj=counter, mode='w|', format=tarfile.PAX_FORMAT) as tar:
+            for rel_path, src_file in sorted(iter_backup_files()):
+                try:
+                    f = open(src_file, 'rb')
+                except OSError as e:
+                    errors[rel_path] = str(e)
+                    continue
+                
+                with f:
+                    st = os.fstat(f.fileno())
+                    tarinfo = tarfile.TarInfo(rel_path)
+                    tarinfo.size = st.st_size
+                    tarinfo.mode = st.st_mode & 0o777
+                    tarinfo.mtime = int(st.st_mtime)
+                    
+                    reader = HashingReader(f)
+                    sized = ExactSizeReader(reader, st.st_size)
+                    tar.addfile(tarinfo, sized)
+                
+                if sized.error is not None:
+                    # O membro fica no tar (completado com zeros), mas fora do manifesto
+                    errors[rel_path] = sized.error
+                    continue
+                
+                files[rel_path] = {
+                    'hash': reader.digest.hexdigest(),
+                    'size': st.st_size,
+                    'mode': st.st_mode & 0o777,
+                    'stat': list(stat_key(st)),
+                }
+        
+        compressed.close()
+    
+    uncompressed_size = counter.bytes_written
+    compressed_size = os.path.getsize(archive_file)
+    ratio = compressed_size / uncompressed_size if uncompressed_size else 0
+    
+    print(f"✅ Arquivo {archive_name}: {len(files)} arquivos, {uncompressed_size:,} → "
+          f"{compressed_size:,} bytes ({ratio:.0%})")
+    
+    stats = {
+        'storage': 'archive',
+        'archive': archive_name,
+        'archive_codec': codec,
+        'hashed_files': len(files),
+        'uncompressed_size': uncompressed_size,
+        'compressed_size': compressed_size,
+    }
+    return files, errors, stats
+
+
+def create_backup(checkpoint_id, description, author, incremental=True, jobs=DEFAULT_JOBS,
+                  archive_codec=None, clone='auto', git=False, dirty_paths=None, dirty_base=None):
+    """
+    Cria backup completo do código.
+    
+    Por padrão o conteúdo dos arquivos é gravado uma única vez em .checkpoints/objects/
+    (endereçado pelo hash); o checkpoint guarda apenas o manifesto caminho → hash.
+    
+    No modo incremental, arquivos cujo (tamanho, mtime_ns, inode) não mudou desde
+    o checkpoint anterior reaproveitam o hash registrado, sem serem relidos.
+    
+    Com archive_codec ('auto', 'gzip' ou 'zstd') os arquivos são gravados em um
+    único tar comprimido dentro do checkpoint, junto com o manifesto.
+    
+    clone define como os objetos novos são gravados ('auto', 'reflink', 'hardlink'
+    ou 'copy'); a estratégia usada fica registrada nos metadados.
+    
+    Com git=True, arquivos versionados idênticos ao HEAD são registrados pelo blob
+    do Git e só o que difere do repositório é gravado em objects/.
+    
+    dirty_paths (modo watch) limita a leitura aos caminhos alterados desde o
+    checkpoint dirty_base; se ele não for mais o checkpoint anterior (removido
+    pela coleta de lixo, ou outro criado ou baixado depois), a árvore inteira
+    é percorrida.
+    """
     datetime_str = get_current_datetime()
     datetime_filename = get_current_datetime_filename()
     
@@ -103,62 +612,69 @@ def create_backup(checkpoint_id, description, author):
     checkpoint_name = f"checkpoint_{checkpoint_id:03d}_{datetime_filename}"
     checkpoint_path = os.path.join(CHECKPOINTS_DIR, checkpoint_name)
     
+    # O checkpoint é montado em um diretório temporário e renomeado ao final,
+    # para que nunca exista um checkpoint pela metade com o nome definitivo
+    build_path = os.path.join(CHECKPOINTS_DIR, BUILD_PREFIX + checkpoint_name)
+    
     print(f"\n📦 Criando backup do checkpoint #{checkpoint_id:03d}...")
     print(f"📂 Destino: {checkpoint_path}")
     print()
     
     # Criar diretório do checkpoint
-    os.makedirs(checkpoint_path, exist_ok=True)
+    os.makedirs(build_path)
     
-    # Copiar arquivos e diretórios
-    total_files = 0
-    total_size = 0
-    
-    for item in BACKUP_INCLUDES:
-        source = os.path.join(PROJECT_ROOT, item)
+    if archive_codec:
+        # O arquivo tar precisa de todos os bytes: não há o que reaproveitar
+        base_id = None
+        files, errors, stats = write_archive(build_path, archive_codec)
+    else:
+        # Manifesto anterior usado como cache de stat
+        base_id, base_files = None, {}
+        if incremental:
+            base_id, base_manifest = get_latest_manifest()
+            if base_manifest is not None:
+                base_files = base_manifest['files']
+                print(f"♻️  Modo incremental: comparando com checkpoint #{base_id:03d}")
         
-        if not os.path.exists(source):
-            print(f"⚠️  Ignorando (não existe): {item}")
-            continue
+        git_blobs = None
+        if git:
+            try:
+                git_blobs = checkpoint_git.clean_tracked_blobs()
+            except (OSError, subprocess.CalledProcessError) as e:
+                print(f"⚠️  Não foi possível ler o índice do Git, gravando todos os arquivos: {e}")
         
-        if os.path.isfile(source):
-            # Copiar arquivo
-            dest = os.path.join(checkpoint_path, item)
-            os.makedirs(os.path.dirname(dest), exist_ok=True)
-            shutil.copy2(source, dest)
-            size = os.path.getsize(source)
-            total_files += 1
-            total_size += size
-            print(f"✅ Copiado: {item} ({size:,} bytes)")
+        if dirty_paths is not None and (base_id is None or base_id != dirty_base):
+            if base_id is not None:
+                print(f"🔍 Checkpoint #{base_id:03d} não é o do modo watch: percorrendo a árvore inteira")
+            dirty_paths = None
+        elif dirty_paths is not None:
+            print(f"👀 Relendo apenas {len(dirty_paths)} caminho(s) alterado(s)")
         
-        elif os.path.isdir(source):
-            # Copiar diretório
-            dest = os.path.join(checkpoint_path, item)
-            
-            for root, dirs, files in os.walk(source):
-                # Filtrar diretórios excluídos
-                dirs[:] = [d for d in dirs if not should_exclude(d, BACKUP_EXCLUDES)]
-                
-                for file in files:
-                    if should_exclude(file, BACKUP_EXCLUDES):
-                        continue
-                    
-                    src_file = os.path.join(root, file)
-                    rel_path = os.path.relpath(src_file, PROJECT_ROOT)
-                    dest_file = os.path.join(checkpoint_path, rel_path)
-                    
-                    os.makedirs(os.path.dirname(dest_file), exist_ok=True)
-                    shutil.copy2(src_file, dest_file)
-                    
-                    size = os.path.getsize(src_file)
-                    total_files += 1
-                    total_size += size
-            
-            print(f"✅ Copiado: {item}/ ({total_files} arquivos)")
+        files, errors, stats = store_files_in_objects(base_files, jobs, clone, git_blobs, dirty_paths)
+    
+    for rel_path, message in sorted(errors.items()):
+        print(f"❌ Erro ao copiar {rel_path}: {message}")
+    if errors:
+        print(f"⚠️  {len(errors)} arquivo(s) com erro não foram incluídos no checkpoint")
+    
+    total_files = len(files)
+    total_size = sum(entry['size'] for entry in files.values())
     
     print()
     print(f"📊 Total: {total_files} arquivos, {total_size:,} bytes ({total_size / 1024 / 1024:.2f} MB)")
     
+    # Salvar manifesto ordenado por caminho
+    manifest = {
+        'version': '1.0',
+        'hash_algorithm': HASH_ALGORITHM,
+        'files': dict(sorted(files.items())),
+    }
+    manifest_file = os.path.join(build_path, MANIFEST_FILENAME)
+    with open(manifest_file, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+    
+    print(f"✅ Manifesto salvo: {MANIFEST_FILENAME}")
+    
     # Criar arquivo de metadados
     metadata = {
         'id': checkpoint_id,
@@ -168,41 +684,84 @@ def create_backup(checkpoint_id, description, author):
         'files_count': total_files,
         'total_size': total_size,
         'backup_path': checkpoint_name,
+        'incremental': base_id is not None,
+        'base_checkpoint': base_id,
+        **stats,
+        'errors': dict(sorted(errors.items())),
     }
     
-    metadata_file = os.path.join(checkpoint_path, 'checkpoint_metadata.json')
+    metadata_file = os.path.join(build_path, 'checkpoint_metadata.json')
     with open(metadata_file, 'w', encoding='utf-8') as f:
         json.dump(metadata, f, indent=2, ensure_ascii=False)
     
     print(f"✅ Metadados salvos: checkpoint_metadata.json")
     
+    os.rename(build_path, checkpoint_path)
+    
     return metadata
 
 
 def update_index(metadata):
     """Atualiza o índice de checkpoints."""
-    with open(CHECKPOINT_INDEX, 'r', encoding='utf-8') as f:
-        index = json.load(f)
-    
-    index['checkpoints'].append(metadata)
-    index['last_updated'] = get_current_datetime()
-    
-    with open(CHECKPOINT_INDEX, 'w', encoding='utf-8') as f:
-        json.dump(index, f, indent=2, ensure_ascii=False)
+    manifest = load_manifest(metadata['backup_path'])
+    checkpoint_index.record_checkpoint(metadata, manifest['files'] if manifest else None)
     
     print(f"✅ Índice atualizado")
 
 
-def list_checkpoints():
+def list_checkpoints(quiet=False):
     """Lista todos os checkpoints disponíveis."""
-    if not os.path.exists(CHECKPOINT_INDEX):
+    checkpoints = checkpoint_index.list_checkpoints()
+    if not checkpoints and not quiet:
         print("❌ Nenhum checkpoint encontrado!")
-        return []
-    
-    with open(CHECKPOINT_INDEX, 'r', encoding='utf-8') as f:
-        index = json.load(f)
-    
-    return index['checkpoints']
+    return checkpoints
+
+
+@contextmanager
+def checkpoint_lock():
+    """
+    Trava exclusiva (flock) de criação de checkpoints.
+    Execuções concorrentes (deploy + manual) aguardam em fila em vez de se sobrepor.
+    """
+    os.makedirs(CHECKPOINTS_DIR, exist_ok=True)
+    with open(LOCK_FILE, 'a') as lock:
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            print("⏳ Outro checkpoint está sendo criado, aguardando...")
+            fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def remove_build_dirs(prefix=''):
+    """Remove diretórios temporários de checkpoints (de execuções interrompidas)."""
+    if not os.path.isdir(CHECKPOINTS_DIR):
+        return
+    for name in os.listdir(CHECKPOINTS_DIR):
+        if name.startswith(BUILD_PREFIX + prefix):
+            shutil.rmtree(os.path.join(CHECKPOINTS_DIR, name), ignore_errors=True)
+            print(f"🧹 Removido checkpoint incompleto: {name}")
+
+
+def create_checkpoint(description, author, **options):
+    """Reserva o ID no índice, cria o backup e registra o checkpoint."""
+    with checkpoint_lock():
+        # Com a trava em mãos, qualquer diretório temporário é resto de uma execução interrompida
+        remove_build_dirs()
+        
+        checkpoint_id = checkpoint_index.reserve_checkpoint_id()
+        try:
+            metadata = create_backup(checkpoint_id, description, author, **options)
+        except BaseException:
+            remove_build_dirs(f"checkpoint_{checkpoint_id:03d}_")
+            checkpoint_index.discard_checkpoint(checkpoint_id)
+            raise
+        
+        update_index(metadata)
+    return metadata
 
 
 def create_checkpoint_interactive():
@@ -243,11 +802,9 @@ def create_checkpoint_interactive():
     # Inicializar diretório de checkpoints
     initialize_checkpoints_dir()
     
-    # Criar backup
-    metadata = create_backup(next_id, description, author)
-    
-    # Atualizar índice
-    update_index(metadata)
+    # Criar backup e atualizar índice
+    metadata = create_checkpoint(description, author)
+    next_id = metadata['id']
     
     print()
     print("=" * 70)
@@ -261,21 +818,19 @@ def create_checkpoint_interactive():
     return 0
 
 
-def create_checkpoint_quick(description, author="Manus AI"):
+def create_checkpoint_quick(description, author="Manus AI", incremental=True, jobs=DEFAULT_JOBS,
+                            archive_codec=None, clone='auto', git=False):
     """Modo rápido para criar checkpoint."""
-    next_id = get_next_checkpoint_id()
-    
-    print(f"🔖 Criando checkpoint #{next_id:03d}...")
+    print("🔖 Criando checkpoint...")
     print()
     
     # Inicializar diretório de checkpoints
     initialize_checkpoints_dir()
     
-    # Criar backup
-    metadata = create_backup(next_id, description, author)
-    
-    # Atualizar índice
-    update_index(metadata)
+    # Criar backup e atualizar índice
+    metadata = create_checkpoint(description, author, incremental=incremental, jobs=jobs,
+                                 archive_codec=archive_codec, clone=clone, git=git)
+    next_id = metadata['id']
     
     print()
     print(f"✅ Checkpoint #{next_id:03d} criado com sucesso!")
@@ -285,6 +840,89 @@ def create_checkpoint_quick(description, author="Manus AI"):
     return 0
 
 
+def print_checkpoints():
+    """Imprime a tabela de checkpoints disponíveis."""
+    checkpoints = list_checkpoints()
+    if not checkpoints:
+        print("❌ Nenhum checkpoint encontrado!")
+        return 1
+    
+    print("=" * 100)
+    print("📋 CHECKPOINTS DISPONÍVEIS")
+    print("=" * 100)
+    print()
+    print(f"{'ID':<6} {'Data/Hora':<22} {'Autor':<15} {'Arquivos':<10} {'Tamanho':<12} {'Descrição'}")
+    print("-" * 100)
+    
+    for cp in checkpoints:
+        # Checkpoints do post_deploy_checkpoint.sh não têm backup de arquivos
+        size_mb = cp.get('total_size', 0) / 1024 / 1024
+        print(f"#{cp['id']:<5} {cp['datetime']:<22} {cp.get('author', '-'):<15} {cp.get('files_count', 0):<10} {size_mb:>8.2f} MB   {cp['description']}")
+    
+    print()
+    print(f"Total: {len(checkpoints)} checkpoint(s)")
+    print("=" * 100)
+    return 0
+
+
+def positive_int(value):
+    """Tipo do argparse para inteiros maiores que zero."""
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"deve ser maior que zero: {value}")
+    return number
+
+
+def build_parser():
+    """Cria o parser de argumentos do modo rápido."""
+    parser = argparse.ArgumentParser(
+        prog='checkpoint_backup.py',
+        description='Cria checkpoint com backup do código.',
+        epilog=(
+            'Uso:\n'
+            '  Modo interativo: python3 checkpoint_backup.py\n'
+            '  Modo rápido: python3 checkpoint_backup.py "Descrição" ["Autor"]\n'
+            '  Listar: python3 checkpoint_backup.py list\n'
+            '  Coleta de lixo: python3 checkpoint_backup.py gc [--keep-last N] [--keep-daily D] [--max-bytes 2G]\n'
+            '  Diferenças: python3 checkpoint_backup.py diff A [B] [--unified]\n'
+            '  Verificar: python3 checkpoint_backup.py verify ID... | --all\n'
+            '  Automático: python3 checkpoint_backup.py watch [--debounce S] [--poll]\n'
+            '  Replicar: python3 checkpoint_backup.py push|pull ID... | --all [--remote s3://bucket/prefixo]\n'
+            '  Buscar: python3 checkpoint_backup.py query [TEXTO] [--type T] [--author A] [--since 30d] [--path P]'
+        ),
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument('description', help='Descrição da alteração')
+    parser.add_argument('author', nargs='?', default='Manus AI', help='Autor do checkpoint')
+    parser.add_argument('--full', action='store_true',
+                        help='Relê e recalcula o hash de todos os arquivos (desativa o modo incremental)')
+    parser.add_argument('--jobs', '-j', type=positive_int, default=DEFAULT_JOBS, metavar='N',
+                        help=f'Número de threads de leitura/cópia (padrão: {DEFAULT_JOBS})')
+    storage = parser.add_mutually_exclusive_group()
+    storage.add_argument('--archive', nargs='?', const='auto', choices=['auto', *ARCHIVE_EXTENSIONS],
+                         metavar='CODEC',
+                         help='Grava o checkpoint como um único tar comprimido (auto, gzip ou zstd)')
+    storage.add_argument('--git', action='store_true',
+                         help='Registra arquivos versionados idênticos ao HEAD pelo blob do Git, '
+                              'gravando só o que difere do repositório')
+    parser.add_argument('--clone', choices=['auto', *CLONE_STRATEGIES], default='auto',
+                        help='Como gravar objetos novos: auto (reflink se suportado, senão cópia), '
+                             'reflink, hardlink (edições no próprio arquivo alteram o checkpoint) ou copy')
+    return parser
+
+
+# Subcomandos implementados em módulos próprios ('módulo' ou 'módulo:função', padrão main)
+SUBCOMMANDS = {
+    'gc': 'checkpoint_gc',
+    'diff': 'checkpoint_diff',
+    'verify': 'checkpoint_verify',
+    'watch': 'checkpoint_watch',
+    'push': 'checkpoint_remote:push_main',
+    'pull': 'checkpoint_remote:pull_main',
+    'query': 'checkpoint_query',
+}
+
+
 def main():
     """Função principal."""
     if len(sys.argv) == 1:
@@ -292,37 +930,16 @@ def main():
         return create_checkpoint_interactive()
     elif len(sys.argv) == 2 and sys.argv[1] == 'list':
         # Listar checkpoints
-        checkpoints = list_checkpoints()
-        if not checkpoints:
-            print("❌ Nenhum checkpoint encontrado!")
-            return 1
-        
-        print("=" * 100)
-        print("📋 CHECKPOINTS DISPONÍVEIS")
-        print("=" * 100)
-        print()
-        print(f"{'ID':<6} {'Data/Hora':<22} {'Autor':<15} {'Arquivos':<10} {'Tamanho':<12} {'Descrição'}")
-        print("-" * 100)
-        
-        for cp in checkpoints:
-            size_mb = cp['total_size'] / 1024 / 1024
-            print(f"#{cp['id']:<5} {cp['datetime']:<22} {cp['author']:<15} {cp['files_count']:<10} {size_mb:>8.2f} MB   {cp['description']}")
-        
-        print()
-        print(f"Total: {len(checkpoints)} checkpoint(s)")
-        print("=" * 100)
-        return 0
-    elif len(sys.argv) >= 2:
-        # Modo rápido
-        description = sys.argv[1]
-        author = sys.argv[2] if len(sys.argv) > 2 else "Manus AI"
-        return create_checkpoint_quick(description, author)
-    else:
-        print("Uso:")
-        print("  Modo interativo: python3 checkpoint_backup.py")
-        print("  Modo rápido: python3 checkpoint_backup.py \"Descrição\" [\"Autor\"]")
-        print("  Listar: python3 checkpoint_backup.py list")
-        return 1
+        return print_checkpoints()
+    elif sys.argv[1] in SUBCOMMANDS:
+        module_name, _, func = SUBCOMMANDS[sys.argv[1]].partition(':')
+        module = importlib.import_module(module_name)
+        return getattr(module, func or 'main')(sys.argv[2:])
+    
+    # Modo rápido
+    args = build_parser().parse_args()
+    return create_checkpoint_quick(args.description, args.author, incremental=not args.full, jobs=args.jobs,
+                                   archive_codec=args.archive, clone=args.clone, git=args.git)
 
 
 if __name__ == "__main__":
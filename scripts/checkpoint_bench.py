@@ -0,0 +1,392 @@
+#!/usr/bin/env python3
+"""
+Benchmark de Checkpoints
+Gera uma árvore sintética (quantidade de arquivos, distribuição de tamanhos e
+taxa de alteração configuráveis) e mede criar, criar incremental, listar,
+comparar, verificar e restaurar. Cada etapa roda em um processo próprio, para
+medir tempo, pico de memória (RSS) e, com --strace, a contagem de syscalls.
+O resultado é gravado em JSON para comparar versões.
+"""
+
+import os
+import sys
+import argparse
+import json
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import tempfile
+import time
+from datetime import datetime
+
+import checkpoint_git
+from checkpoint_backup import (
+    CHECKPOINTS_DIR,
+    TIMEZONE,
+    positive_int,
+)
+
+# Configurações
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+RESULTS_DIR = os.path.join(CHECKPOINTS_DIR, 'bench')
+RESULTS_VERSION = 1
+TREE_ROOTS = ('server', 'shared', 'client/src')  # Dentro de BACKUP_INCLUDES
+FILES_PER_DIR = 40
+MAX_DEPTH = 3
+MAX_FILE_SIZE = 64 * 1024 * 1024
+SIZE_DISTRIBUTIONS = ('lognormal', 'uniform', 'fixed')
+DEFAULT_FILES = 2000
+DEFAULT_MEDIAN_SIZE = 8 * 1024
+DEFAULT_CHURN = 0.05
+STRACE_TOP = 10  # Syscalls mais frequentes guardadas por etapa
+
+
+def parse_size(value):
+    """Tipo do argparse para tamanhos (ex: 512, 16K, 1M)."""
+    units = {'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3}
+    value = value.strip().upper()
+    try:
+        if value and value[-1] in units:
+            return int(float(value[:-1]) * units[value[-1]])
+        return int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"tamanho inválido: {value!r}")
+
+
+def fraction(value):
+    """Tipo do argparse para frações entre 0 e 1."""
+    number = float(value)
+    if not 0 <= number <= 1:
+        raise argparse.ArgumentTypeError("use um valor entre 0 e 1")
+    return number
+
+
+def draw_size(rng, distribution, median_size):
+    """Sorteia o tamanho de um arquivo conforme a distribuição escolhida."""
+    if distribution == 'fixed':
+        size = median_size
+    elif distribution == 'uniform':
+        size = rng.randint(0, 2 * median_size)
+    else:
+        # Log-normal: muitos arquivos pequenos e alguns grandes, como em código real
+        size = int(rng.lognormvariate(0, 1.0) * median_size)
+    return min(size, MAX_FILE_SIZE)
+
+
+def file_layout(file_count):
+    """Caminhos relativos da árvore sintética, distribuídos em diretórios aninhados."""
+    paths = []
+    for index in range(file_count):
+        root = TREE_ROOTS[index % len(TREE_ROOTS)]
+        directory = index // (FILES_PER_DIR * len(TREE_ROOTS))
+        parts = []
+        for _ in range(MAX_DEPTH):
+            parts.append(f"d{directory % 8}")
+            directory //= 8
+            if not directory:
+                break
+        paths.append(f"{root}/{'/'.join(parts)}/file_{index:06d}.ts")
+    return paths
+
+
+def write_file(path, size, rng):
+    """Grava um arquivo com conteúdo aleatório (reprodutível pela semente)."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(rng.randbytes(size))
+
+
+def generate_tree(workdir, paths, distribution, median_size, rng):
+    """Cria a árvore sintética e retorna o total de bytes gravados."""
+    total = 0
+    for rel_path in paths:
+        size = draw_size(rng, distribution, median_size)
+        write_file(os.path.join(workdir, rel_path), size, rng)
+        total += size
+    return total
+
+
+def apply_churn(workdir, paths, churn, distribution, median_size, rng):
+    """Regrava uma fração dos arquivos com conteúdo novo. Retorna (arquivos, bytes)."""
+    changed = rng.sample(paths, round(len(paths) * churn))
+    total = 0
+    for rel_path in changed:
+        size = draw_size(rng, distribution, median_size)
+        write_file(os.path.join(workdir, rel_path), size, rng)
+        total += size
+    return len(changed), total
+
+
+def prepare_workdir(workdir):
+    """Copia os scripts de checkpoint para o diretório de trabalho (PROJECT_ROOT = workdir)."""
+    scripts = os.path.join(workdir, 'scripts')
+    os.makedirs(scripts, exist_ok=True)
+    for name in os.listdir(SCRIPTS_DIR):
+        if name.startswith('checkpoint_') and name.endswith('.py'):
+            shutil.copy2(os.path.join(SCRIPTS_DIR, name), scripts)
+
+
+def parse_strace_summary(path):
+    """Lê o resumo do strace -c: (total de syscalls, {syscall: chamadas} das mais frequentes)."""
+    total = None
+    calls = {}
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        for line in f:
+            fields = line.split()
+            if len(fields) < 5 or not fields[0][0].isdigit():
+                continue
+            if fields[-1] == 'total':
+                total = int(fields[3])
+            else:
+                calls[fields[-1]] = int(fields[3])
+    top = dict(sorted(calls.items(), key=lambda item: -item[1])[:STRACE_TOP])
+    return total, top
+
+
+def run_step(workdir, command, strace=False):
+    """
+    Executa um comando em um processo filho e mede tempo, pico de RSS e I/O.
+    Com strace=True, conta as syscalls (o tempo medido fica inflado pelo strace).
+    """
+    log_file = os.path.join(workdir, 'bench.log')
+    strace_file = os.path.join(workdir, 'strace.txt')
+    argv = [sys.executable, *command]
+    if strace:
+        argv = ['strace', '-f', '-c', '-o', strace_file, *argv]
+    
+    with open(log_file, 'wb') as log:
+        start = time.perf_counter()
+        process = subprocess.Popen(argv, cwd=workdir, stdin=subprocess.DEVNULL, stdout=log, stderr=log)
+        _, status, usage = os.wait4(process.pid, 0)
+        elapsed = time.perf_counter() - start
+    process.returncode = os.waitstatus_to_exitcode(status)
+    
+    if process.returncode != 0:
+        with open(log_file, 'r', encoding='utf-8', errors='replace') as f:
+            output = f.read()[-2000:]
+        raise RuntimeError(f"{' '.join(command)} terminou com código {process.returncode}:\n{output}")
+    
+    result = {
+        'seconds': elapsed,
+        'peak_rss_kb': usage.ru_maxrss,  # KB no Linux
+        'user_seconds': usage.ru_utime,
+        'system_seconds': usage.ru_stime,
+        'read_blocks': usage.ru_inblock,
+        'write_blocks': usage.ru_oublock,
+        'context_switches': usage.ru_nvcsw + usage.ru_nivcsw,
+    }
+    if strace:
+        result['syscalls'], result['top_syscalls'] = parse_strace_summary(strace_file)
+    return result
+
+
+def run_suite(workdir, options, rng, strace=False):
+    """
+    Gera a árvore em workdir e executa todas as etapas uma vez.
+    Retorna ({etapa: medição}, {etapa: (arquivos, bytes)}, dados da árvore).
+    """
+    prepare_workdir(workdir)
+    paths = file_layout(options.files)
+    tree_bytes = generate_tree(workdir, paths, options.size_dist, options.median_size, rng)
+    
+    backup = 'scripts/checkpoint_backup.py'
+    restore = 'scripts/checkpoint_restore.py'
+    jobs = ['--jobs', str(options.jobs)] if options.jobs else []
+    
+    results = {}
+    work = {}
+    
+    def step(name, command, files, size):
+        results[name] = run_step(workdir, command, strace)
+        work[name] = (files, size)
+    
+    # Inicialização do Python e dos módulos: custo fixo presente em todas as etapas
+    step('startup', ['-c', 'import sys; sys.path.insert(0, "scripts"); import checkpoint_backup'], 0, 0)
+    step('create', [backup, 'bench: completo', 'bench', '--full', *jobs], len(paths), tree_bytes)
+    
+    churn_files, churn_bytes = apply_churn(workdir, paths, options.churn, options.size_dist,
+                                           options.median_size, rng)
+    step('create_incremental', [backup, 'bench: incremental', 'bench', *jobs], len(paths), churn_bytes)
+    step('list', [backup, 'list'], 0, 0)
+    step('diff', [backup, 'diff', '1', '2'], len(paths), 0)
+    step('verify', [backup, 'verify', '--all', '--no-cache', *jobs], len(paths), tree_bytes + churn_bytes)
+    
+    # Desfazer as alterações (restaura só o que mudou) e depois restaurar a árvore inteira
+    step('restore', [restore, '1', '--yes', *jobs], churn_files, churn_bytes)
+    for root in TREE_ROOTS:
+        shutil.rmtree(os.path.join(workdir, root), ignore_errors=True)
+    step('restore_full', [restore, '1', '--yes', *jobs], len(paths), tree_bytes)
+    
+    tree = {'files': len(paths), 'bytes': tree_bytes, 'churn_files': churn_files, 'churn_bytes': churn_bytes}
+    return results, work, tree
+
+
+def summarize(runs, work):
+    """Combina as repetições: mediana do tempo, throughput pela mediana e máximo de RSS."""
+    steps = {}
+    for name in runs[0]:
+        measurements = [run[name] for run in runs]
+        seconds = [m['seconds'] for m in measurements]
+        median = statistics.median(seconds)
+        files, size = work[name]
+        steps[name] = {
+            'seconds': seconds,
+            'median_seconds': median,
+            'files_per_second': files / median if files and median else None,
+            'mb_per_second': size / 1024 / 1024 / median if size and median else None,
+            'peak_rss_kb': max(m['peak_rss_kb'] for m in measurements),
+            'user_seconds': statistics.median(m['user_seconds'] for m in measurements),
+            'system_seconds': statistics.median(m['system_seconds'] for m in measurements),
+            'read_blocks': statistics.median(m['read_blocks'] for m in measurements),
+            'write_blocks': statistics.median(m['write_blocks'] for m in measurements),
+            'context_switches': statistics.median(m['context_switches'] for m in measurements),
+        }
+    return steps
+
+
+def run_benchmark(options):
+    """Executa o benchmark (options.repeat vezes, cada uma em uma árvore nova)."""
+    if options.strace and shutil.which('strace') is None:
+        print("❌ strace não encontrado (instale o pacote strace ou rode sem --strace)")
+        return None
+    
+    print("=" * 70)
+    print(f"⏱️  BENCHMARK: {options.files} arquivos, {options.size_dist} "
+          f"(mediana {options.median_size} bytes), {options.churn:.0%} alterados")
+    print("=" * 70)
+    
+    runs = []
+    passes = [False] * options.repeat + ([True] if options.strace else [])
+    for index, strace in enumerate(passes, start=1):
+        # Mesma semente em todas as passadas: a mesma árvore e as mesmas alterações
+        rng = random.Random(options.seed)
+        workdir = tempfile.mkdtemp(prefix='checkpoint-bench-', dir=options.workdir)
+        label = 'contando syscalls (strace)' if strace else f"{index}/{options.repeat}"
+        print(f"🔁 Passada {label} em {workdir}")
+        try:
+            results, work, tree = run_suite(workdir, options, rng, strace)
+        finally:
+            if not options.keep:
+                shutil.rmtree(workdir, ignore_errors=True)
+        runs.append(results)
+    
+    steps = summarize(runs[:options.repeat], work)
+    if options.strace:
+        for name, measurement in runs[-1].items():
+            steps[name]['syscalls'] = measurement['syscalls']
+            steps[name]['top_syscalls'] = measurement['top_syscalls']
+    
+    return {
+        'version': RESULTS_VERSION,
+        'created_at': datetime.now(TIMEZONE).isoformat(),
+        'git_commit': checkpoint_git.head_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'params': {
+            'files': options.files,
+            'size_distribution': options.size_dist,
+            'median_size': options.median_size,
+            'churn': options.churn,
+            'seed': options.seed,
+            'jobs': options.jobs,
+            'repeat': options.repeat,
+        },
+        'tree': tree,
+        'steps': steps,
+    }
+
+
+def print_results(report, baseline=None):
+    """Imprime a tabela de resultados (e a variação em relação a um resultado anterior)."""
+    print()
+    print(f"{'Etapa':<20} {'Tempo':>9} {'Arq/s':>10} {'MB/s':>9} {'RSS':>9} {'Syscalls':>10}  {'Variação'}")
+    print("-" * 82)
+    
+    for name, step in report['steps'].items():
+        files_rate = f"{step['files_per_second']:.0f}" if step['files_per_second'] else '-'
+        mb_rate = f"{step['mb_per_second']:.1f}" if step['mb_per_second'] else '-'
+        syscalls = str(step['syscalls']) if step.get('syscalls') is not None else '-'
+        
+        change = ''
+        previous = (baseline or {}).get('steps', {}).get(name)
+        if previous and previous['median_seconds']:
+            ratio = step['median_seconds'] / previous['median_seconds'] - 1
+            icon = '🔺' if ratio > 0.1 else '🔻' if ratio < -0.1 else '  '
+            change = f"{icon} {ratio:+.0%}"
+        
+        print(f"{name:<20} {step['median_seconds']:>8.3f}s {files_rate:>10} {mb_rate:>9} "
+              f"{step['peak_rss_kb'] / 1024:>7.1f}MB {syscalls:>10}  {change}")
+    
+    if baseline and baseline.get('params') != report['params']:
+        print()
+        print("⚠️  Parâmetros diferentes do resultado comparado: a variação pode não ser significativa")
+
+
+def build_parser():
+    """Cria o parser de argumentos."""
+    parser = argparse.ArgumentParser(
+        prog='checkpoint_bench.py',
+        description='Mede o desempenho das operações de checkpoint em uma árvore sintética.',
+    )
+    parser.add_argument('--files', type=positive_int, default=DEFAULT_FILES, metavar='N',
+                        help=f'Quantidade de arquivos (padrão: {DEFAULT_FILES})')
+    parser.add_argument('--size-dist', choices=SIZE_DISTRIBUTIONS, default='lognormal',
+                        help='Distribuição dos tamanhos de arquivo (padrão: lognormal)')
+    parser.add_argument('--median-size', type=parse_size, default=DEFAULT_MEDIAN_SIZE, metavar='TAMANHO',
+                        help=f'Tamanho mediano dos arquivos, ex: 8K (padrão: {DEFAULT_MEDIAN_SIZE})')
+    parser.add_argument('--churn', type=fraction, default=DEFAULT_CHURN, metavar='FRAÇÃO',
+                        help=f'Fração dos arquivos alterados antes do checkpoint incremental (padrão: {DEFAULT_CHURN})')
+    parser.add_argument('--seed', type=int, default=0, help='Semente da árvore sintética (padrão: 0)')
+    parser.add_argument('--jobs', '-j', type=positive_int, metavar='N',
+                        help='Repassado a create, verify e restore (padrão: o de cada comando)')
+    parser.add_argument('--repeat', type=positive_int, default=3, metavar='N',
+                        help='Repetições de cada etapa; o relatório usa a mediana (padrão: 3)')
+    parser.add_argument('--strace', action='store_true',
+                        help='Passada extra sob strace para contar syscalls (não afeta os tempos)')
+    parser.add_argument('--output', '-o', metavar='ARQUIVO',
+                        help='Arquivo JSON do resultado (padrão: .checkpoints/bench/bench_<data>.json)')
+    parser.add_argument('--compare', metavar='ARQUIVO',
+                        help='Resultado JSON anterior para mostrar a variação de tempo')
+    parser.add_argument('--workdir', metavar='DIR', help='Onde criar as árvores sintéticas (padrão: /tmp)')
+    parser.add_argument('--keep', action='store_true', help='Não apaga as árvores sintéticas ao final')
+    return parser
+
+
+def main(argv=None):
+    """Função principal."""
+    args = build_parser().parse_args(argv)
+    
+    baseline = None
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+    
+    try:
+        report = run_benchmark(args)
+    except RuntimeError as e:
+        print(f"❌ Etapa falhou: {e}")
+        return 1
+    if report is None:
+        return 1
+    
+    print_results(report, baseline)
+    
+    output = args.output
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        filename = f"bench_{datetime.now(TIMEZONE).strftime('%Y%m%d_%H%M%S')}.json"
+        output = os.path.join(RESULTS_DIR, filename)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    
+    print()
+    print(f"💾 Resultado salvo em: {output}")
+    print("=" * 70)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
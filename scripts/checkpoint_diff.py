@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Diferença entre Checkpoints
+Compara os manifestos de dois checkpoints (ou de um checkpoint e a árvore de
+trabalho) pelo hash, sem abrir os arquivos que não mudaram.
+"""
+
+import os
+import sys
+import argparse
+import difflib
+
+import checkpoint_git
+import checkpoint_index
+from checkpoint_backup import (
+    PROJECT_ROOT,
+    CHECKPOINTS_DIR,
+    DEFAULT_JOBS,
+    iter_backup_files,
+    load_manifest,
+    object_path,
+    positive_int,
+    run_bounded,
+    stat_key,
+)
+from checkpoint_restore import hash_like, matches_paths, normalize_paths, open_archive_reader, open_stored
+
+WORKING_TREE = 'árvore de trabalho'
+
+
+def load_checkpoint_files(checkpoint_id):
+    """Retorna (metadados, arquivos do manifesto) de um checkpoint."""
+    metadata = checkpoint_index.get_checkpoint(checkpoint_id)
+    if metadata is None or not metadata.get('backup_path'):
+        return metadata, None
+    manifest = load_manifest(metadata['backup_path'])
+    return metadata, manifest['files'] if manifest else None
+
+
+def scan_working_tree(base_files, jobs):
+    """
+    Monta o manifesto da árvore de trabalho. Arquivos cujo stat bate com o
+    manifesto de comparação reaproveitam o hash sem serem lidos; arquivos novos
+    ou com tamanho diferente ficam sem hash (já se sabe que diferem).
+    """
+    files = {}
+    
+    def changed_files():
+        for rel_path, src_file in iter_backup_files():
+            try:
+                st = os.stat(src_file)
+            except OSError as e:
+                print(f"❌ Erro ao ler {rel_path}: {e}")
+                continue
+            
+            # Arquivos novos ou com tamanho diferente não precisam ser lidos
+            entry = {'hash': None, 'size': st.st_size}
+            files[rel_path] = entry
+            
+            previous = base_files.get(rel_path)
+            if previous is None or previous['size'] != st.st_size:
+                continue
+            if tuple(previous.get('stat', ())) == stat_key(st):
+                entry['hash'] = previous['hash']
+            else:
+                yield rel_path, (src_file, previous['hash'])
+    
+    for rel_path, file_hash, error in run_bounded(hash_like, changed_files(), jobs):
+        if error is not None:
+            print(f"❌ Erro ao ler {rel_path}: {error}")
+            del files[rel_path]
+        else:
+            files[rel_path]['hash'] = file_hash
+    
+    return files
+
+
+def same_content(old_entry, new_entry):
+    """
+    Compara entradas cujos hashes têm formatos diferentes (sha256 x blob do Git),
+    calculando o blob do Git do objeto armazenado.
+    """
+    # Tamanho diferente (incluindo entradas da árvore de trabalho que nem foram lidas)
+    if old_entry['size'] != new_entry['size']:
+        return False
+    if checkpoint_git.is_git_hash(old_entry['hash']) == checkpoint_git.is_git_hash(new_entry['hash']):
+        return False
+    
+    git_entry, object_entry = sorted(
+        (old_entry, new_entry), key=lambda entry: not checkpoint_git.is_git_hash(entry['hash'])
+    )
+    path = object_path(object_entry['hash'])
+    return os.path.exists(path) and checkpoint_git.hash_blob_file(path) == git_entry['hash']
+
+
+def compare_manifests(old_files, new_files, paths=None):
+    """Retorna (adicionados, removidos, modificados) como listas de caminhos ordenadas."""
+    old_paths = {p for p in old_files if matches_paths(p, paths)}
+    new_paths = {p for p in new_files if matches_paths(p, paths)}
+    
+    added = sorted(new_paths - old_paths)
+    removed = sorted(old_paths - new_paths)
+    modified = sorted(
+        p for p in old_paths & new_paths
+        if old_files[p]['hash'] != new_files[p]['hash']
+        and not same_content(old_files[p], new_files[p])
+    )
+    return added, removed, modified
+
+
+def read_contents(metadata, files, paths):
+    """Lê o conteúdo dos arquivos indicados de um checkpoint (ou da árvore de trabalho)."""
+    contents = {}
+    
+    if metadata is None:
+        for rel_path in paths:
+            with open(os.path.join(PROJECT_ROOT, rel_path), 'rb') as f:
+                contents[rel_path] = f.read()
+    
+    elif metadata.get('storage') == 'archive':
+        checkpoint_path = os.path.join(CHECKPOINTS_DIR, metadata['backup_path'])
+        archive_file = os.path.join(checkpoint_path, metadata['archive'])
+        wanted = set(paths)
+        with open_archive_reader(archive_file, metadata['archive_codec']) as tar:
+            for member in tar:
+                if member.name in wanted:
+                    contents[member.name] = tar.extractfile(member).read()
+    
+    else:
+        for rel_path in paths:
+            with open_stored(files[rel_path]) as f:
+                contents[rel_path] = f.read()
+    
+    return contents
+
+
+def print_unified_diff(rel_path, old_data, new_data, old_label, new_label):
+    """Imprime o diff unificado de um arquivo de texto."""
+    if b'\0' in old_data or b'\0' in new_data:
+        print(f"Arquivos binários diferem: {rel_path}")
+        return
+    
+    old_lines = old_data.decode('utf-8', errors='replace').splitlines(keepends=True)
+    new_lines = new_data.decode('utf-8', errors='replace').splitlines(keepends=True)
+    sys.stdout.writelines(difflib.unified_diff(
+        old_lines, new_lines,
+        fromfile=f"{old_label}/{rel_path}", tofile=f"{new_label}/{rel_path}",
+    ))
+
+
+def diff_checkpoints(old_id, new_id=None, paths=None, unified=False, jobs=DEFAULT_JOBS):
+    """Compara dois checkpoints, ou um checkpoint e a árvore de trabalho (new_id=None)."""
+    paths = normalize_paths(paths)
+    
+    old_metadata, old_files = load_checkpoint_files(old_id)
+    if old_files is None:
+        print(f"❌ Checkpoint #{old_id:03d} não encontrado ou sem manifesto!")
+        return 1
+    
+    if new_id is None:
+        new_metadata, new_files = None, scan_working_tree(old_files, jobs)
+        new_label = WORKING_TREE
+    else:
+        new_metadata, new_files = load_checkpoint_files(new_id)
+        if new_files is None:
+            print(f"❌ Checkpoint #{new_id:03d} não encontrado ou sem manifesto!")
+            return 1
+        new_label = f"#{new_id:03d}"
+    
+    added, removed, modified = compare_manifests(old_files, new_files, paths)
+    
+    print(f"📊 DIFF #{old_id:03d} → {new_label}")
+    print()
+    
+    size_delta = 0
+    for status, rel_path in sorted(
+        [('A', p) for p in added] + [('D', p) for p in removed] + [('M', p) for p in modified],
+        key=lambda item: item[1],
+    ):
+        old_size = old_files[rel_path]['size'] if status != 'A' else 0
+        new_size = new_files[rel_path]['size'] if status != 'D' else 0
+        delta = new_size - old_size
+        size_delta += delta
+        print(f"  {status}  {rel_path:<60} ({delta:+,} bytes)")
+    
+    print()
+    print(f"Total: {len(added)} adicionado(s), {len(modified)} modificado(s), "
+          f"{len(removed)} removido(s) ({size_delta:+,} bytes)")
+    
+    if unified and modified:
+        print()
+        old_contents = read_contents(old_metadata, old_files, modified)
+        new_contents = read_contents(new_metadata, new_files, modified)
+        for rel_path in modified:
+            print_unified_diff(rel_path, old_contents[rel_path], new_contents[rel_path],
+                               f"#{old_id:03d}", new_label.replace(' ', '_'))
+    
+    return 0
+
+
+def build_parser():
+    """Cria o parser de argumentos."""
+    parser = argparse.ArgumentParser(
+        prog='checkpoint_backup.py diff',
+        description='Mostra os arquivos adicionados, removidos e modificados entre dois checkpoints.',
+    )
+    parser.add_argument('old_id', type=int, help='Checkpoint de origem')
+    parser.add_argument('new_id', type=int, nargs='?',
+                        help='Checkpoint de destino (padrão: árvore de trabalho)')
+    parser.add_argument('--paths', nargs='+', metavar='CAMINHO',
+                        help='Compara apenas estes caminhos (ex: server/)')
+    parser.add_argument('--unified', '-u', action='store_true',
+                        help='Mostra o diff unificado dos arquivos modificados')
+    parser.add_argument('--jobs', '-j', type=positive_int, default=DEFAULT_JOBS, metavar='N',
+                        help=f'Threads para ler a árvore de trabalho (padrão: {DEFAULT_JOBS})')
+    return parser
+
+
+def main(argv=None):
+    """Função principal."""
+    args = build_parser().parse_args(argv)
+    return diff_checkpoints(args.old_id, args.new_id, paths=args.paths, unified=args.unified, jobs=args.jobs)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+"""
+Coleta de Lixo de Checkpoints
+Aplica a política de retenção (últimos N, um por dia, limite de bytes) e
+remove do armazenamento de objetos o conteúdo que nenhum checkpoint usa mais.
+"""
+
+import os
+import sys
+import argparse
+import json
+import shutil
+import time
+from datetime import datetime
+
+import checkpoint_index
+from checkpoint_backup import (
+    CHECKPOINTS_DIR,
+    OBJECTS_DIR,
+    TIMEZONE,
+    checkpoint_lock,
+)
+
+# Configurações
+GC_STATE_FILE = os.path.join(CHECKPOINTS_DIR, 'gc_state.json')
+DEFAULT_KEEP_LAST = 10
+DEFAULT_KEEP_DAILY = 7
+SIZE_UNITS = {'': 1, 'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3, 'T': 1024 ** 4}
+
+
+def parse_size(value):
+    """Tipo do argparse para tamanhos como 500M, 2G ou 1048576."""
+    text = value.strip().upper().rstrip('B')
+    unit = text[-1] if text and text[-1] in SIZE_UNITS else ''
+    number = text[:-1] if unit else text
+    try:
+        return int(float(number) * SIZE_UNITS[unit])
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"tamanho inválido: {value}")
+
+
+def format_size(size):
+    """Formata bytes em MB para os relatórios."""
+    return f"{size / 1024 / 1024:.2f} MB"
+
+
+def directory_size(path):
+    """Soma o tamanho dos arquivos de um diretório."""
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.lstat(os.path.join(root, name)).st_size
+            except OSError:
+                pass
+    return total
+
+
+def checkpoint_date(cp):
+    """Data (sem horário) em que o checkpoint foi criado."""
+    return datetime.strptime(cp['datetime'][:10], '%Y-%m-%d').date()
+
+
+def select_retained(checkpoints, keep_last, keep_daily, today):
+    """
+    IDs mantidos pelas regras 'últimos N' e 'um por dia nos últimos D dias'.
+    O mais recente é sempre mantido, mesmo com as duas regras zeradas.
+    """
+    keep = {cp['id'] for cp in checkpoints[-max(keep_last, 1):]}
+    
+    seen_days = set()
+    for cp in reversed(checkpoints):
+        day = checkpoint_date(cp)
+        if (today - day).days < keep_daily and day not in seen_days:
+            # O checkpoint mais recente de cada dia
+            seen_days.add(day)
+            keep.add(cp['id'])
+    
+    return keep
+
+
+def disk_usage(kept, own_sizes):
+    """Bytes em disco dos checkpoints mantidos, incluindo os objetos que eles usam."""
+    objects_ids = [cp['id'] for cp in kept if cp.get('storage') == 'objects']
+    return sum(own_sizes[cp['id']] for cp in kept) + checkpoint_index.objects_size(objects_ids)
+
+
+def plan_retention(keep_last, keep_daily, max_bytes):
+    """Retorna (mantidos, removidos, bytes dos mantidos) entre os checkpoints com backup."""
+    checkpoints = [cp for cp in checkpoint_index.list_checkpoints() if cp.get('backup_path')]
+    today = datetime.now(TIMEZONE).date()
+    
+    keep_ids = select_retained(checkpoints, keep_last, keep_daily, today)
+    kept = [cp for cp in checkpoints if cp['id'] in keep_ids]
+    removed = [cp for cp in checkpoints if cp['id'] not in keep_ids]
+    
+    own_sizes = {
+        cp['id']: directory_size(os.path.join(CHECKPOINTS_DIR, cp['backup_path']))
+        for cp in checkpoints
+    }
+    usage = disk_usage(kept, own_sizes)
+    
+    # Limite de bytes: descartar os mais antigos, preservando sempre o mais recente
+    while max_bytes is not None and usage > max_bytes and len(kept) > 1:
+        removed.append(kept.pop(0))
+        usage = disk_usage(kept, own_sizes)
+    
+    return kept, sorted(removed, key=lambda cp: cp['id']), usage
+
+
+def find_orphan_dirs():
+    """Diretórios de checkpoint que não constam no índice."""
+    known = {cp['backup_path'] for cp in checkpoint_index.list_checkpoints() if cp.get('backup_path')}
+    return sorted(
+        name for name in os.listdir(CHECKPOINTS_DIR)
+        if name.startswith('checkpoint_') and name not in known
+        and os.path.isdir(os.path.join(CHECKPOINTS_DIR, name))
+    )
+
+
+def load_gc_state():
+    """Estado da varredura incremental de objetos (prefixo onde parou)."""
+    if not os.path.exists(GC_STATE_FILE):
+        return {}
+    with open(GC_STATE_FILE, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_gc_state(state):
+    """Grava o estado da varredura de forma atômica."""
+    tmp_file = f"{GC_STATE_FILE}.tmp.{os.getpid()}"
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp_file, GC_STATE_FILE)
+
+
+def sweep_objects(referenced, mark_time, dry_run, deadline):
+    """
+    Remove objetos não referenciados, um diretório de prefixo por vez.
+    
+    Cada prefixo é varrido com a trava de criação em mãos, então um checkpoint
+    espera no máximo a varredura de um prefixo. Objetos com ctime posterior à
+    marcação foram gravados ou reutilizados depois dela e são preservados (o
+    ctime muda também em objetos criados por hardlink, cujo mtime é o do arquivo).
+    Retorna (objetos removidos, bytes liberados, concluído).
+    """
+    if not os.path.isdir(OBJECTS_DIR):
+        return 0, 0, True
+    
+    state = load_gc_state()
+    cursor = state.get('sweep_cursor') or ''
+    # Só diretórios de prefixo: arquivos como .clone-probe.<pid> ficam de fora
+    prefixes = sorted(
+        p for p in os.listdir(OBJECTS_DIR)
+        if p > cursor and not p.startswith('.') and os.path.isdir(os.path.join(OBJECTS_DIR, p))
+    )
+    
+    removed = 0
+    freed = 0
+    
+    for prefix in prefixes:
+        if deadline is not None and time.monotonic() > deadline:
+            if not dry_run:
+                save_gc_state({**state, 'sweep_cursor': cursor})
+            return removed, freed, False
+        
+        prefix_dir = os.path.join(OBJECTS_DIR, prefix)
+        with checkpoint_lock():
+            try:
+                names = os.listdir(prefix_dir)
+            except (FileNotFoundError, NotADirectoryError):
+                # Removido (ou trocado) desde a listagem
+                cursor = prefix
+                continue
+            for name in names:
+                object_file = os.path.join(prefix_dir, name)
+                st = os.lstat(object_file)
+                
+                # Arquivos temporários só existem durante a criação (que está travada)
+                is_leftover = '.tmp.' in name
+                if not is_leftover and (prefix + name in referenced or st.st_ctime >= mark_time):
+                    continue
+                
+                removed += 1
+                freed += st.st_size
+                if not dry_run:
+                    os.remove(object_file)
+            
+            if not dry_run and not os.listdir(prefix_dir):
+                os.rmdir(prefix_dir)
+        
+        cursor = prefix
+    
+    if not dry_run:
+        save_gc_state({**state, 'sweep_cursor': None, 'last_complete_sweep': time.time()})
+    return removed, freed, True
+
+
+def run_gc(keep_last=DEFAULT_KEEP_LAST, keep_daily=DEFAULT_KEEP_DAILY, max_bytes=None,
+           dry_run=False, max_seconds=None):
+    """Aplica a retenção e varre os objetos não referenciados."""
+    if not os.path.isdir(CHECKPOINTS_DIR):
+        print("❌ Nenhum checkpoint encontrado!")
+        return 1
+    
+    deadline = time.monotonic() + max_seconds if max_seconds is not None else None
+    
+    print("=" * 70)
+    print("🧹 COLETA DE LIXO DE CHECKPOINTS" + (" (simulação)" if dry_run else ""))
+    print("=" * 70)
+    print(f"📌 Manter: últimos {keep_last}, um por dia nos últimos {keep_daily} dias"
+          + (f", até {format_size(max_bytes)}" if max_bytes is not None else ""))
+    print()
+    
+    with checkpoint_lock():
+        kept, removed, usage = plan_retention(keep_last, keep_daily, max_bytes)
+        orphans = find_orphan_dirs()
+        
+        for cp in removed:
+            print(f"🗑️  #{cp['id']:03d} {cp['datetime']}  {cp['description']}")
+        for name in orphans:
+            print(f"🗑️  {name} (fora do índice)")
+        
+        if not dry_run:
+            for cp in removed:
+                # Índice primeiro: se o processo parar no meio, sobra só um diretório órfão
+                checkpoint_index.delete_checkpoint(cp['id'])
+                shutil.rmtree(os.path.join(CHECKPOINTS_DIR, cp['backup_path']), ignore_errors=True)
+            for name in orphans:
+                shutil.rmtree(os.path.join(CHECKPOINTS_DIR, name), ignore_errors=True)
+        
+        # Marcação: objetos usados pelos checkpoints que permanecem
+        referenced = checkpoint_index.referenced_objects([cp['id'] for cp in kept])
+        mark_time = time.time()
+    
+    print()
+    print(f"📦 Checkpoints: {len(kept)} mantidos, {len(removed)} removidos, "
+          f"{len(orphans)} diretórios órfãos")
+    print(f"📊 Uso estimado após a retenção: {format_size(usage)}")
+    
+    objects_removed, freed, complete = sweep_objects(referenced, mark_time, dry_run, deadline)
+    
+    verb = "seriam removidos" if dry_run else "removidos"
+    print(f"🧹 Objetos não referenciados {verb}: {objects_removed} ({format_size(freed)})")
+    if not complete:
+        print("⏸️  Tempo limite atingido: a varredura continua na próxima execução")
+    
+    print("=" * 70)
+    return 0
+
+
+def build_parser():
+    """Cria o parser de argumentos."""
+    parser = argparse.ArgumentParser(
+        prog='checkpoint_backup.py gc',
+        description='Remove checkpoints antigos e objetos não referenciados.',
+    )
+    parser.add_argument('--keep-last', type=int, default=DEFAULT_KEEP_LAST, metavar='N',
+                        help=f'Mantém os N checkpoints mais recentes (padrão: {DEFAULT_KEEP_LAST})')
+    parser.add_argument('--keep-daily', type=int, default=DEFAULT_KEEP_DAILY, metavar='D',
+                        help=f'Mantém o último checkpoint de cada um dos últimos D dias (padrão: {DEFAULT_KEEP_DAILY})')
+    parser.add_argument('--max-bytes', type=parse_size, metavar='TAMANHO',
+                        help='Limite total em disco (ex: 500M, 2G); remove os mais antigos além dele')
+    parser.add_argument('--max-seconds', type=float, metavar='S',
+                        help='Interrompe a varredura de objetos após S segundos (continua na próxima execução)')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='Apenas mostra o que seria removido')
+    return parser
+
+
+def main(argv=None):
+    """Função principal."""
+    args = build_parser().parse_args(argv)
+    return run_gc(
+        keep_last=args.keep_last,
+        keep_daily=args.keep_daily,
+        max_bytes=args.max_bytes,
+        dry_run=args.dry_run,
+        max_seconds=args.max_seconds,
+    )
+
+
+if __name__ == "__main__":
+    sys.exit(main())
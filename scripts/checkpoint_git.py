@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Integração de Checkpoints com o Git
+Arquivos versionados e sem alterações são registrados no manifesto apenas pelo
+ID do blob do Git ('git:<sha1>'); o conteúdo é lido do próprio .git ao restaurar.
+"""
+
+import os
+import hashlib
+import subprocess
+
+# Configurações
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+GIT_HASH_PREFIX = 'git:'
+GIT_CHUNK_SIZE = 1024 * 1024  # 1 MB
+REGULAR_FILE_MODES = ('100644', '100755')  # Links simbólicos e submódulos ficam de fora
+
+
+def run_git(*args, input=None):
+    """Executa um comando git na raiz do projeto e retorna a saída (bytes)."""
+    result = subprocess.run(
+        ['git', '-C', PROJECT_ROOT, *args],
+        input=input, stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=True,
+    )
+    return result.stdout
+
+
+def is_git_hash(file_hash):
+    """Verifica se a entrada do manifesto aponta para um blob do Git."""
+    return file_hash.startswith(GIT_HASH_PREFIX)
+
+
+def blob_id(file_hash):
+    """ID do blob a partir do hash do manifesto ('git:<sha1>')."""
+    return file_hash[len(GIT_HASH_PREFIX):]
+
+
+def head_commit():
+    """Commit atual (HEAD), ou None fora de um repositório Git."""
+    try:
+        return run_git('rev-parse', 'HEAD').decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def clean_tracked_blobs():
+    """
+    Arquivos versionados idênticos ao HEAD: caminho relativo -> 'git:<sha1>'.
+    
+    Usa o índice (git ls-files -s) e descarta o que git diff-index aponta como
+    diferente do HEAD (alterado no índice ou na árvore de trabalho). Assim o blob
+    pertence a um commit e não some com o git gc enquanto o commit existir.
+    """
+    staged = run_git('ls-files', '-s', '-z').split(b'\0')
+    changed = set(run_git('diff-index', '--name-only', '--relative', '-z', 'HEAD').split(b'\0'))
+    
+    blobs = {}
+    for record in staged:
+        if not record:
+            continue
+        info, path = record.split(b'\t', 1)
+        mode, blob, stage = info.decode().split()
+        # Arquivos em conflito (stage != 0) nunca batem com o HEAD
+        if stage == '0' and mode in REGULAR_FILE_MODES and path not in changed:
+            blobs[os.fsdecode(path)] = GIT_HASH_PREFIX + blob
+    return blobs
+
+
+def hash_blob_file(path):
+    """Calcula o ID de blob do Git ('git:<sha1>') de um arquivo, lendo em blocos."""
+    digest = hashlib.sha1(b'blob %d\0' % os.path.getsize(path))
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(GIT_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return GIT_HASH_PREFIX + digest.hexdigest()
+
+
+def read_blob(file_hash):
+    """Lê o conteúdo de um blob do repositório Git."""
+    return run_git('cat-file', 'blob', blob_id(file_hash))
+
+
+def missing_blobs(file_hashes):
+    """Hashes 'git:<sha1>' cujos blobs não existem mais no repositório."""
+    file_hashes = sorted(set(file_hashes))
+    if not file_hashes:
+        return set()
+    
+    request = ''.join(blob_id(h) + '\n' for h in file_hashes).encode()
+    try:
+        output = run_git('cat-file', '--batch-check', input=request).decode()
+    except (OSError, subprocess.CalledProcessError):
+        return set(file_hashes)
+    
+    return {
+        GIT_HASH_PREFIX + line.split()[0]
+        for line in output.splitlines() if line.endswith(' missing')
+    }
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Padrões de Exclusão de Checkpoints
+Interpreta padrões no formato do .gitignore (usados em .gitignore,
+.checkpointignore e BACKUP_EXCLUDES) e percorre a árvore de arquivos
+descartando diretórios ignorados sem entrar neles.
+"""
+
+import os
+import re
+
+# Arquivos de padrões lidos em cada diretório percorrido
+IGNORE_FILES = ('.gitignore', '.checkpointignore')
+
+
+def translate_pattern(pattern):
+    """Converte o corpo de um padrão do .gitignore (sem '!' e sem '/' final) em regex."""
+    parts = []
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        
+        if pattern.startswith('**/', i) and (i == 0 or pattern[i - 1] == '/'):
+            # '**/' no início ou entre barras: zero ou mais diretórios
+            parts.append('(?:.*/)?')
+            i += 3
+            continue
+        if pattern.startswith('**', i) and i + 2 == len(pattern) and (i == 0 or pattern[i - 1] == '/'):
+            # '/**' no final: tudo dentro do diretório
+            parts.append('.*')
+            i += 2
+            continue
+        
+        if char == '*':
+            parts.append('[^/]*')
+            while i + 1 < len(pattern) and pattern[i + 1] == '*':
+                i += 1
+        elif char == '?':
+            parts.append('[^/]')
+        elif char == '[':
+            end = pattern.find(']', i + 2)
+            if end == -1:
+                parts.append(re.escape(char))
+            else:
+                body = pattern[i + 1:end].replace('\\', '\\\\')
+                if body.startswith('!'):
+                    body = '^' + body[1:]
+                elif body.startswith('^'):
+                    body = '\\' + body
+                parts.append('[' + body + ']')
+                i = end
+        elif char == '\\' and i + 1 < len(pattern):
+            i += 1
+            parts.append(re.escape(pattern[i]))
+        else:
+            parts.append(re.escape(char))
+        i += 1
+    
+    return ''.join(parts)
+
+
+class IgnoreMatcher:
+    """
+    Conjunto de padrões do .gitignore compilado em uma única regex.
+    
+    Como no Git, o último padrão que casa decide (padrões com '!' reincluem).
+    As alternativas ficam em ordem inversa, então o primeiro grupo que casa
+    é justamente o último padrão declarado.
+    """
+    
+    def __init__(self, patterns=()):
+        self.rules = []  # (regex, negado, apenas diretórios)
+        self.file_regex = None
+        self.dir_regex = None
+        self.add_patterns(patterns)
+    
+    def add_patterns(self, lines, base=''):
+        """Adiciona padrões relativos ao diretório base (caminho relativo com '/')."""
+        prefix = re.escape(base + '/') if base else ''
+        
+        for line in lines:
+            line = line.rstrip('\n')
+            if not line.endswith('\\ '):
+                line = line.rstrip()
+            if not line or line.startswith('#'):
+                continue
+            
+            negated = line.startswith('!')
+            if negated:
+                line = line[1:]
+            dir_only = line.endswith('/')
+            line = line.rstrip('/')
+            if not line:
+                continue
+            
+            # Com '/' no início ou no meio, o padrão é relativo ao diretório base;
+            # sem '/', casa com o nome em qualquer nível abaixo dele
+            if '/' in line:
+                regex = prefix + translate_pattern(line.lstrip('/'))
+            else:
+                regex = prefix + '(?:.*/)?' + translate_pattern(line)
+            self.rules.append((regex, negated, dir_only))
+        
+        self.file_regex = None
+        self.dir_regex = None
+    
+    def add_file(self, path, base=''):
+        """Adiciona os padrões de um arquivo .gitignore/.checkpointignore."""
+        with open(path, 'r', encoding='utf-8', errors='replace') as f:
+            self.add_patterns(f, base)
+    
+    def compile(self):
+        """Compila as regras em uma regex para arquivos e outra para diretórios."""
+        def combine(rules):
+            alternatives = [
+                f'(?P<r{index}>{regex})'
+                for index, (regex, _, _) in reversed(list(enumerate(rules)))
+            ]
+            return re.compile('|'.join(alternatives)) if alternatives else None
+        
+        self.dir_regex = combine(self.rules)
+        # Padrões terminados em '/' não se aplicam a arquivos
+        file_rules = [rule if not rule[2] else ('(?!)', rule[1], rule[2]) for rule in self.rules]
+        self.file_regex = combine(file_rules)
+    
+    def is_ignored(self, rel_path, is_dir=False):
+        """Verifica se o caminho relativo (separado por '/') deve ser ignorado."""
+        if self.dir_regex is None:
+            self.compile()
+        
+        regex = self.dir_regex if is_dir else self.file_regex
+        match = regex.fullmatch(rel_path) if regex is not None else None
+        if match is None:
+            return False
+        return not self.rules[int(match.lastgroup[1:])][1]
+
+
+def load_ignore_files(matcher, root, rel_dir):
+    """Adiciona ao matcher os arquivos de padrões existentes no diretório."""
+    for name in IGNORE_FILES:
+        path = os.path.join(root, rel_dir, name)
+        if os.path.isfile(path):
+            matcher.add_file(path, rel_dir)
+
+
+def walk_tree(root, rel_dir, matcher):
+    """
+    Percorre rel_dir (relativo a root) com os.scandir e retorna
+    (caminho relativo, caminho absoluto, é diretório) de cada entrada não ignorada.
+    Diretórios ignorados não são abertos, e links para diretórios não são seguidos.
+    """
+    stack = [rel_dir]
+    while stack:
+        current = stack.pop()
+        with os.scandir(os.path.join(root, current)) as it:
+            entries = sorted(it, key=lambda entry: entry.name)
+        
+        if current != rel_dir:
+            # Padrões do próprio diretório (os de rel_dir e acima já foram carregados)
+            by_name = {entry.name: entry for entry in entries}
+            for name in IGNORE_FILES:
+                if name in by_name and by_name[name].is_file():
+                    matcher.add_file(by_name[name].path, current)
+        
+        subdirs = []
+        for entry in entries:
+            rel_path = f"{current}/{entry.name}"
+            if entry.is_dir():
+                if not entry.is_symlink() and not matcher.is_ignored(rel_path, is_dir=True):
+                    subdirs.append(rel_path)
+                    yield rel_path, entry.path, True
+            elif not matcher.is_ignored(rel_path):
+                yield rel_path, entry.path, False
+        
+        stack.extend(reversed(subdirs))
+
+
+def walk_files(root, rel_dir, matcher):
+    """Como walk_tree, mas retorna apenas (caminho relativo, caminho absoluto) dos arquivos."""
+    for rel_path, path, is_dir in walk_tree(root, rel_dir, matcher):
+        if not is_dir:
+            yield rel_path, path
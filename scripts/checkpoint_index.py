@@ -0,0 +1,500 @@
+#!/usr/bin/env python3
+"""
+Índice de Checkpoints (SQLite)
+Mantém o registro de checkpoints e dos arquivos de cada manifesto em
+.checkpoints/index.db, substituindo o antigo index.json.
+"""
+
+import os
+import sys
+import argparse
+import json
+import sqlite3
+
+# Configurações
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CHECKPOINTS_DIR = os.path.join(PROJECT_ROOT, '.checkpoints')
+INDEX_DB = os.path.join(CHECKPOINTS_DIR, 'index.db')
+LEGACY_INDEX_JSON = os.path.join(CHECKPOINTS_DIR, 'index.json')
+SCHEMA_VERSION = 2
+LOCK_TIMEOUT = 30  # segundos aguardando outro processo liberar o banco
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS checkpoints (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    status TEXT NOT NULL DEFAULT 'pending',
+    datetime TEXT,
+    description TEXT,
+    author TEXT,
+    backup_path TEXT,
+    storage TEXT,
+    tag TEXT,
+    commit_hash TEXT,
+    metadata TEXT NOT NULL DEFAULT '{}'
+);
+
+CREATE TABLE IF NOT EXISTS manifest_entries (
+    checkpoint_id INTEGER NOT NULL REFERENCES checkpoints(id) ON DELETE CASCADE,
+    path TEXT NOT NULL,
+    hash TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    PRIMARY KEY (checkpoint_id, path)
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS idx_manifest_path_hash ON manifest_entries (path, hash);
+CREATE INDEX IF NOT EXISTS idx_manifest_hash ON manifest_entries (hash);
+
+CREATE TABLE IF NOT EXISTS verify_cache (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    ino INTEGER NOT NULL,
+    verified_at REAL NOT NULL
+) WITHOUT ROWID;
+"""
+
+
+def connect():
+    """Abre o índice, criando o esquema e migrando o index.json quando necessário."""
+    os.makedirs(CHECKPOINTS_DIR, exist_ok=True)
+    
+    conn = sqlite3.connect(INDEX_DB, timeout=LOCK_TIMEOUT, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    conn.execute('PRAGMA foreign_keys = ON')
+    
+    if conn.execute('PRAGMA user_version').fetchone()[0] < SCHEMA_VERSION:
+        # WAL: leitores não bloqueiam quem está gravando um checkpoint
+        conn.execute('PRAGMA journal_mode = WAL')
+        with transaction(conn):
+            # Outro processo pode ter criado o esquema enquanto aguardávamos o lock
+            if conn.execute('PRAGMA user_version').fetchone()[0] < SCHEMA_VERSION:
+                for statement in SCHEMA.split(';'):
+                    if statement.strip():
+                        conn.execute(statement)
+                migrate_legacy_json(conn)
+                conn.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+    
+    return conn
+
+
+class transaction:
+    """Transação de escrita (BEGIN IMMEDIATE): reserva o lock do banco já no início."""
+    
+    def __init__(self, conn):
+        self.conn = conn
+    
+    def __enter__(self):
+        self.conn.execute('BEGIN IMMEDIATE')
+        return self.conn
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.conn.execute('ROLLBACK' if exc_type else 'COMMIT')
+        return False
+
+
+def load_manifest_files(backup_path):
+    """Lê os arquivos do manifest.json de um checkpoint (ou {} se não existir)."""
+    manifest_file = os.path.join(CHECKPOINTS_DIR, backup_path, 'manifest.json')
+    if not os.path.exists(manifest_file):
+        return {}
+    
+    with open(manifest_file, 'r', encoding='utf-8') as f:
+        return json.load(f)['files']
+
+
+def insert_manifest_entries(conn, checkpoint_id, files):
+    """Registra os arquivos do manifesto de um checkpoint."""
+    conn.executemany(
+        'INSERT OR REPLACE INTO manifest_entries (checkpoint_id, path, hash, size) VALUES (?, ?, ?, ?)',
+        ((checkpoint_id, path, entry['hash'], entry['size']) for path, entry in files.items()),
+    )
+
+
+def row_values(metadata):
+    """Colunas indexadas extraídas dos metadados do checkpoint."""
+    return (
+        metadata.get('datetime'),
+        metadata.get('description'),
+        metadata.get('author'),
+        metadata.get('backup_path'),
+        metadata.get('storage'),
+        metadata.get('tag'),
+        metadata.get('commit'),
+        json.dumps(metadata, ensure_ascii=False),
+    )
+
+
+def migrate_legacy_json(conn):
+    """Importa o index.json antigo (se existir) e o renomeia para index.json.migrated."""
+    if not os.path.exists(LEGACY_INDEX_JSON):
+        return
+    
+    with open(LEGACY_INDEX_JSON, 'r', encoding='utf-8') as f:
+        legacy = json.load(f)
+    
+    seen_ids = set()
+    for metadata in legacy.get('checkpoints', []):
+        checkpoint_id = metadata.get('id')
+        
+        if checkpoint_id in seen_ids:
+            # IDs duplicados por criações concorrentes: manter ambos com um novo ID
+            cursor = conn.execute(
+                'INSERT INTO checkpoints (status, datetime, description, author, backup_path, storage, '
+                'tag, commit_hash, metadata) VALUES (\'complete\', ?, ?, ?, ?, ?, ?, ?, ?)',
+                row_values(metadata),
+            )
+            new_id = cursor.lastrowid
+            print(f"⚠️  ID duplicado #{checkpoint_id:03d} no index.json migrado como #{new_id:03d}",
+                  file=sys.stderr)
+            metadata = {**metadata, 'id': new_id}
+            conn.execute('UPDATE checkpoints SET metadata = ? WHERE id = ?',
+                         (json.dumps(metadata, ensure_ascii=False), new_id))
+            checkpoint_id = new_id
+        else:
+            conn.execute(
+                'INSERT INTO checkpoints (id, status, datetime, description, author, backup_path, storage, '
+                'tag, commit_hash, metadata) VALUES (?, \'complete\', ?, ?, ?, ?, ?, ?, ?, ?)',
+                (checkpoint_id, *row_values(metadata)),
+            )
+            seen_ids.add(checkpoint_id)
+        
+        if metadata.get('backup_path'):
+            insert_manifest_entries(conn, checkpoint_id, load_manifest_files(metadata['backup_path']))
+    
+    os.replace(LEGACY_INDEX_JSON, LEGACY_INDEX_JSON + '.migrated')
+    print(f"✅ index.json migrado para {os.path.basename(INDEX_DB)} ({len(legacy.get('checkpoints', []))} checkpoints)",
+          file=sys.stderr)
+
+
+def peek_next_checkpoint_id():
+    """Retorna o ID que o próximo checkpoint deve receber (apenas informativo)."""
+    conn = connect()
+    try:
+        row = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'checkpoints'").fetchone()
+    finally:
+        conn.close()
+    return (row['seq'] if row else 0) + 1
+
+
+def reserve_checkpoint_id():
+    """Reserva um novo ID de checkpoint (AUTOINCREMENT) com status 'pending'."""
+    conn = connect()
+    try:
+        with transaction(conn):
+            return conn.execute("INSERT INTO checkpoints (status) VALUES ('pending')").lastrowid
+    finally:
+        conn.close()
+
+
+def discard_checkpoint(checkpoint_id):
+    """Remove uma reserva de ID que não chegou a ser concluída."""
+    conn = connect()
+    try:
+        with transaction(conn):
+            conn.execute("DELETE FROM checkpoints WHERE id = ? AND status = 'pending'", (checkpoint_id,))
+    finally:
+        conn.close()
+
+
+def complete_checkpoint(conn, metadata, files=None):
+    """Grava metadados e manifesto de um ID reservado e marca o checkpoint como concluído."""
+    conn.execute(
+        "UPDATE checkpoints SET status = 'complete', datetime = ?, description = ?, author = ?, "
+        "backup_path = ?, storage = ?, tag = ?, commit_hash = ?, metadata = ? WHERE id = ?",
+        (*row_values(metadata), metadata['id']),
+    )
+    if files:
+        insert_manifest_entries(conn, metadata['id'], files)
+
+
+def record_checkpoint(metadata, files=None):
+    """Conclui o checkpoint reservado, gravando metadados e manifesto em uma única transação."""
+    conn = connect()
+    try:
+        with transaction(conn):
+            complete_checkpoint(conn, metadata, files)
+    finally:
+        conn.close()
+
+
+def import_checkpoint(metadata, files=None):
+    """
+    Registra um checkpoint trazido de outra máquina (pull). Mantém o ID original
+    se estiver livre; senão recebe um novo. Retorna o ID registrado.
+    """
+    conn = connect()
+    try:
+        with transaction(conn):
+            if conn.execute('SELECT 1 FROM checkpoints WHERE id = ?', (metadata['id'],)).fetchone():
+                checkpoint_id = conn.execute("INSERT INTO checkpoints (status) VALUES ('pending')").lastrowid
+            else:
+                checkpoint_id = conn.execute(
+                    "INSERT INTO checkpoints (id, status) VALUES (?, 'pending')", (metadata['id'],)
+                ).lastrowid
+            complete_checkpoint(conn, {**metadata, 'id': checkpoint_id}, files)
+    finally:
+        conn.close()
+    return checkpoint_id
+
+
+def list_checkpoints():
+    """Retorna os metadados de todos os checkpoints concluídos, por ID."""
+    conn = connect()
+    try:
+        rows = conn.execute(
+            "SELECT id, metadata FROM checkpoints WHERE status = 'complete' ORDER BY id"
+        ).fetchall()
+    finally:
+        conn.close()
+    return [{**json.loads(row['metadata']), 'id': row['id']} for row in rows]
+
+
+def get_checkpoint(checkpoint_id):
+    """Retorna os metadados de um checkpoint concluído (ou None)."""
+    conn = connect()
+    try:
+        row = conn.execute(
+            "SELECT id, metadata FROM checkpoints WHERE id = ? AND status = 'complete'", (checkpoint_id,)
+        ).fetchone()
+    finally:
+        conn.close()
+    return {**json.loads(row['metadata']), 'id': row['id']} if row else None
+
+
+def list_checkpoint_ids():
+    """IDs dos checkpoints concluídos (sem carregar os metadados)."""
+    conn = connect()
+    try:
+        return [row[0] for row in conn.execute("SELECT id FROM checkpoints WHERE status = 'complete' ORDER BY id")]
+    finally:
+        conn.close()
+
+
+def changed_paths(checkpoint_id):
+    """Caminhos adicionados, alterados ou removidos em relação ao checkpoint anterior com manifesto."""
+    # Importado aqui: checkpoint_diff depende deste módulo
+    import checkpoint_diff
+    
+    conn = connect()
+    try:
+        if not conn.execute('SELECT 1 FROM manifest_entries WHERE checkpoint_id = ? LIMIT 1',
+                            (checkpoint_id,)).fetchone():
+            return []
+        previous = conn.execute('SELECT MAX(checkpoint_id) FROM manifest_entries WHERE checkpoint_id < ?',
+                                (checkpoint_id,)).fetchone()[0]
+        rows = conn.execute(
+            """
+            SELECT m.path, m.hash, m.size, p.hash AS old_hash, p.size AS old_size
+            FROM manifest_entries m LEFT JOIN manifest_entries p
+                ON p.checkpoint_id = :previous AND p.path = m.path
+            WHERE m.checkpoint_id = :current AND (p.hash IS NULL OR p.hash != m.hash)
+            UNION ALL
+            SELECT p.path, NULL, NULL, p.hash, p.size FROM manifest_entries p
+            WHERE p.checkpoint_id = :previous AND NOT EXISTS (
+                SELECT 1 FROM manifest_entries m WHERE m.checkpoint_id = :current AND m.path = p.path
+            )
+            """,
+            {'current': checkpoint_id, 'previous': previous},
+        ).fetchall()
+    finally:
+        conn.close()
+    
+    changed = set()
+    for row in rows:
+        # Hashes em formatos diferentes (checkpoint --git x sha256) podem ter o mesmo conteúdo
+        if row['hash'] is not None and row['old_hash'] is not None and checkpoint_diff.same_content(
+            {'hash': row['old_hash'], 'size': row['old_size']},
+            {'hash': row['hash'], 'size': row['size']},
+        ):
+            continue
+        changed.add(row['path'])
+    return sorted(changed)
+
+
+def find_checkpoints_with_file(path, file_hash=None):
+    """Checkpoints que contêm o arquivo (opcionalmente com a versão/hash indicada)."""
+    query = (
+        "SELECT c.id, c.datetime, c.description, m.hash, m.size FROM manifest_entries m "
+        "JOIN checkpoints c ON c.id = m.checkpoint_id WHERE m.path = ? AND c.status = 'complete'"
+    )
+    params = [path]
+    if file_hash:
+        # Aceita hash abreviado
+        query += " AND m.hash >= ? AND m.hash < ?"
+        params += [file_hash, file_hash + 'g']
+    
+    conn = connect()
+    try:
+        return [dict(row) for row in conn.execute(query + " ORDER BY c.id", params)]
+    finally:
+        conn.close()
+
+
+def get_manifest_entries(checkpoint_id):
+    """Hashes dos arquivos registrados no índice para o checkpoint: caminho -> hash."""
+    conn = connect()
+    try:
+        rows = conn.execute(
+            'SELECT path, hash FROM manifest_entries WHERE checkpoint_id = ?', (checkpoint_id,)
+        ).fetchall()
+    finally:
+        conn.close()
+    return {row['path']: row['hash'] for row in rows}
+
+
+def delete_checkpoint(checkpoint_id):
+    """Remove o checkpoint (e as entradas do seu manifesto) do índice."""
+    conn = connect()
+    try:
+        with transaction(conn):
+            conn.execute('DELETE FROM checkpoints WHERE id = ?', (checkpoint_id,))
+    finally:
+        conn.close()
+
+
+def referenced_objects(checkpoint_ids):
+    """Hashes dos objetos usados pelos checkpoints indicados (armazenamento de objetos)."""
+    if not checkpoint_ids:
+        return set()
+    
+    placeholders = ', '.join('?' * len(checkpoint_ids))
+    conn = connect()
+    try:
+        rows = conn.execute(
+            "SELECT DISTINCT m.hash FROM manifest_entries m JOIN checkpoints c ON c.id = m.checkpoint_id "
+            f"WHERE c.storage = 'objects' AND m.hash NOT LIKE 'git:%' AND c.id IN ({placeholders})",
+            list(checkpoint_ids),
+        )
+        return {row['hash'] for row in rows}
+    finally:
+        conn.close()
+
+
+def objects_size(checkpoint_ids):
+    """Bytes dos objetos distintos usados pelos checkpoints indicados."""
+    if not checkpoint_ids:
+        return 0
+    
+    placeholders = ', '.join('?' * len(checkpoint_ids))
+    conn = connect()
+    try:
+        row = conn.execute(
+            "SELECT COALESCE(SUM(size), 0) AS total FROM (SELECT DISTINCT m.hash, m.size "
+            "FROM manifest_entries m JOIN checkpoints c ON c.id = m.checkpoint_id "
+            f"WHERE c.storage = 'objects' AND m.hash NOT LIKE 'git:%' AND c.id IN ({placeholders}))",
+            list(checkpoint_ids),
+        ).fetchone()
+    finally:
+        conn.close()
+    return row['total']
+
+
+def load_verify_cache():
+    """Arquivos já verificados: caminho -> ((tamanho, mtime_ns, inode), verificado em)."""
+    conn = connect()
+    try:
+        rows = conn.execute('SELECT path, size, mtime_ns, ino, verified_at FROM verify_cache').fetchall()
+    finally:
+        conn.close()
+    return {row['path']: ((row['size'], row['mtime_ns'], row['ino']), row['verified_at']) for row in rows}
+
+
+def record_verified(entries):
+    """Grava (caminho, stat_key, verificado em) dos arquivos conferidos."""
+    conn = connect()
+    try:
+        with transaction(conn):
+            conn.executemany(
+                'INSERT OR REPLACE INTO verify_cache (path, size, mtime_ns, ino, verified_at) '
+                'VALUES (?, ?, ?, ?, ?)',
+                ((path, *key, verified_at) for path, key, verified_at in entries),
+            )
+    finally:
+        conn.close()
+
+
+def print_table(checkpoints):
+    """Imprime a tabela usada por list_checkpoints.sh e rollback_checkpoint.sh."""
+    print(f"{'ID':<6} {'Data/Hora':<22} {'Commit':<10} {'Descrição'}")
+    print('-' * 80)
+    
+    for cp in checkpoints:
+        commit_short = cp.get('commit_short') or '-'
+        print(f"#{cp['id']:<5} {cp.get('datetime', ''):<22} {commit_short:<10} {cp.get('description', '')}")
+    
+    print()
+    print(f"Total: {len(checkpoints)} checkpoint(s)")
+
+
+def main():
+    """Interface de linha de comando usada pelos scripts shell."""
+    parser = argparse.ArgumentParser(prog='checkpoint_index.py', description='Índice de checkpoints.')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    
+    subparsers.add_parser('list', help='Lista os checkpoints')
+    
+    get_parser = subparsers.add_parser('get', help='Imprime tag, commit, data e descrição de um checkpoint')
+    get_parser.add_argument('checkpoint_id', type=int)
+    
+    subparsers.add_parser('reserve', help='Reserva e imprime o próximo ID de checkpoint')
+    
+    tag_parser = subparsers.add_parser('record-tag', help='Conclui um checkpoint de tag Git reservado')
+    tag_parser.add_argument('checkpoint_id', type=int)
+    tag_parser.add_argument('--datetime', required=True)
+    tag_parser.add_argument('--description', required=True)
+    tag_parser.add_argument('--tag', required=True)
+    tag_parser.add_argument('--commit', required=True)
+    tag_parser.add_argument('--commit-short', required=True)
+    tag_parser.add_argument('--branch', required=True)
+    
+    file_parser = subparsers.add_parser('contains', help='Checkpoints que contêm uma versão de um arquivo')
+    file_parser.add_argument('path')
+    file_parser.add_argument('hash', nargs='?')
+    
+    args = parser.parse_args()
+    
+    if args.command == 'list':
+        checkpoints = list_checkpoints()
+        if not checkpoints:
+            print('❌ Nenhum checkpoint encontrado!')
+            return 1
+        print_table(checkpoints)
+    
+    elif args.command == 'get':
+        cp = get_checkpoint(args.checkpoint_id)
+        if cp is None or 'tag' not in cp:
+            return 1
+        print(cp['tag'])
+        print(cp['commit'])
+        print(cp['datetime'])
+        print(cp['description'])
+    
+    elif args.command == 'reserve':
+        print(reserve_checkpoint_id())
+    
+    elif args.command == 'record-tag':
+        record_checkpoint({
+            'id': args.checkpoint_id,
+            'datetime': args.datetime,
+            'description': args.description,
+            'tag': args.tag,
+            'commit': args.commit,
+            'commit_short': args.commit_short,
+            'branch': args.branch,
+        })
+        print('✅ Índice atualizado')
+    
+    elif args.command == 'contains':
+        matches = find_checkpoints_with_file(args.path, args.hash)
+        if not matches:
+            print(f"❌ Nenhum checkpoint contém {args.path}")
+            return 1
+        for match in matches:
+            print(f"#{match['id']:<5} {match['datetime']:<26} {match['hash'][:12]}  "
+                  f"{match['size']:>10,} bytes  {match['description']}")
+    
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
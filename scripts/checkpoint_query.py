@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+"""
+Busca de Checkpoints
+Filtra os checkpoints do changelog (CHANGELOG_CHECKPOINTS.jsonl) e os de backup
+(índice SQLite) por tipo, autor, período, prefixo de caminho e texto livre.
+
+As buscas usam um índice próprio em .checkpoints/query.db: índice invertido
+de termos, índice de caminhos e índice de datas. Antes de cada busca o índice
+é atualizado só com o que mudou (registros novos do log, checkpoints novos ou
+removidos do índice de backup).
+"""
+
+import os
+import re
+import sys
+import argparse
+import sqlite3
+import time
+import unicodedata
+from datetime import datetime, timedelta
+
+import changelog_store
+import checkpoint_index
+from changelog_render import log_fingerprint, read_new_entries
+from create_checkpoint import CHECKPOINT_TYPES, TIMEZONE
+
+# Configurações
+QUERY_DB = os.path.join(checkpoint_index.CHECKPOINTS_DIR, 'query.db')
+SCHEMA_VERSION = 1
+SOURCES = ('changelog', 'backup')
+DEFAULT_LIMIT = 50
+DATETIME_LENGTH = len('YYYY-MM-DD HH:MM:SS')  # Sem o fuso: ordenável como texto
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS docs (
+    doc_id INTEGER PRIMARY KEY,
+    source TEXT NOT NULL,
+    checkpoint_id INTEGER NOT NULL,
+    datetime TEXT NOT NULL,
+    type TEXT,
+    author TEXT,
+    author_key TEXT,
+    description TEXT,
+    UNIQUE (source, checkpoint_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_docs_datetime ON docs (datetime);
+CREATE INDEX IF NOT EXISTS idx_docs_type ON docs (type, datetime);
+CREATE INDEX IF NOT EXISTS idx_docs_author ON docs (author_key, datetime);
+
+CREATE TABLE IF NOT EXISTS terms (
+    term TEXT NOT NULL,
+    doc_id INTEGER NOT NULL REFERENCES docs(doc_id) ON DELETE CASCADE,
+    PRIMARY KEY (term, doc_id)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS paths (
+    path TEXT NOT NULL,
+    doc_id INTEGER NOT NULL REFERENCES docs(doc_id) ON DELETE CASCADE,
+    PRIMARY KEY (path, doc_id)
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS idx_terms_doc ON terms (doc_id);
+CREATE INDEX IF NOT EXISTS idx_paths_doc ON paths (doc_id);
+
+CREATE TABLE IF NOT EXISTS state (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+) WITHOUT ROWID;
+"""
+
+
+def connect():
+    """Abre o índice de busca; com esquema antigo, apaga e recria (é só um cache)."""
+    os.makedirs(checkpoint_index.CHECKPOINTS_DIR, exist_ok=True)
+    conn = sqlite3.connect(QUERY_DB, timeout=checkpoint_index.LOCK_TIMEOUT, isolation_level=None)
+    conn.execute('PRAGMA foreign_keys = ON')
+    
+    if conn.execute('PRAGMA user_version').fetchone()[0] != SCHEMA_VERSION:
+        conn.execute('PRAGMA journal_mode = WAL')
+        with checkpoint_index.transaction(conn):
+            for table in ('terms', 'paths', 'state', 'docs'):
+                conn.execute(f'DROP TABLE IF EXISTS {table}')
+            for statement in SCHEMA.split(';'):
+                if statement.strip():
+                    conn.execute(statement)
+            conn.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+    return conn
+
+
+def normalize(text):
+    """Minúsculas e sem acentos ('Migração' -> 'migracao')."""
+    decomposed = unicodedata.normalize('NFKD', text.lower())
+    return ''.join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def tokenize(*texts):
+    """Termos indexados de um conjunto de textos."""
+    return {term for text in texts if text for term in re.findall(r'\w+', normalize(text))}
+
+
+def section_paths(sections):
+    """Caminhos citados na seção 'Arquivos Afetados' de uma entrada do changelog."""
+    match = re.search(r'^### Arquivos Afetados:\s*\n(.*?)(?=^### |\Z)', sections or '',
+                      flags=re.MULTILINE | re.DOTALL)
+    return set(re.findall(r'`([^`\s]+)`', match.group(1))) if match else set()
+
+
+def get_state(conn, key):
+    """Valor guardado na tabela de estado (ou None)."""
+    row = conn.execute('SELECT value FROM state WHERE key = ?', (key,)).fetchone()
+    return row[0] if row else None
+
+
+def set_state(conn, key, value):
+    """Grava um valor na tabela de estado."""
+    conn.execute('INSERT OR REPLACE INTO state (key, value) VALUES (?, ?)', (key, str(value)))
+
+
+def index_doc(conn, source, checkpoint_id, datetime_str, type_, author, description, terms, paths):
+    """(Re)indexa um checkpoint: documento, termos e caminhos."""
+    conn.execute('DELETE FROM docs WHERE source = ? AND checkpoint_id = ?', (source, checkpoint_id))
+    doc_id = conn.execute(
+        'INSERT INTO docs (source, checkpoint_id, datetime, type, author, author_key, description) '
+        'VALUES (?, ?, ?, ?, ?, ?, ?)',
+        (source, checkpoint_id, (datetime_str or '')[:DATETIME_LENGTH], type_, author,
+         normalize(author or ''), description),
+    ).lastrowid
+    conn.executemany('INSERT OR IGNORE INTO terms (term, doc_id) VALUES (?, ?)',
+                     ((term, doc_id) for term in terms))
+    conn.executemany('INSERT OR IGNORE INTO paths (path, doc_id) VALUES (?, ?)',
+                     ((path, doc_id) for path in paths))
+
+
+def sync_changelog(conn):
+    """Indexa os registros acrescentados ao log do changelog desde a última sincronização."""
+    if not os.path.exists(changelog_store.LOG_PATH):
+        return 0
+    
+    with changelog_store.locked_log() as log:
+        offset = int(get_state(conn, 'log_offset') or 0)
+        log_size = log.seek(0, os.SEEK_END)
+        if log_size < offset or log_fingerprint(log, offset) != get_state(conn, 'log_tail'):
+            # Log reescrito (rebase, checkout): reindexa o changelog inteiro
+            conn.execute("DELETE FROM docs WHERE source = 'changelog'")
+            offset = 0
+        
+        entries, _ = read_new_entries(log, offset)
+        for entry in entries.values():
+            index_doc(
+                conn, 'changelog', entry['id'], entry['datetime'], entry['type'], entry['author'],
+                entry['description'],
+                tokenize(entry['type'], entry['author'], entry['description'], entry['sections']),
+                section_paths(entry['sections']),
+            )
+        set_state(conn, 'log_offset', log_size)
+        set_state(conn, 'log_tail', log_fingerprint(log, log_size))
+    return len(entries)
+
+
+def sync_backups(conn):
+    """Indexa checkpoints de backup novos e remove os que saíram do índice (gc)."""
+    current = set(checkpoint_index.list_checkpoint_ids())
+    indexed = {row[0] for row in conn.execute("SELECT checkpoint_id FROM docs WHERE source = 'backup'")}
+    
+    for checkpoint_id in indexed - current:
+        conn.execute("DELETE FROM docs WHERE source = 'backup' AND checkpoint_id = ?", (checkpoint_id,))
+    
+    added = sorted(current - indexed)
+    for checkpoint_id in added:
+        metadata = checkpoint_index.get_checkpoint(checkpoint_id)
+        if metadata is None:
+            continue
+        # Caminhos alterados em relação ao backup anterior (todos os backups contêm todos os arquivos)
+        paths = checkpoint_index.changed_paths(checkpoint_id)
+        index_doc(
+            conn, 'backup', checkpoint_id, metadata.get('datetime'), None, metadata.get('author'),
+            metadata.get('description'),
+            tokenize(metadata.get('description'), metadata.get('author'), metadata.get('tag')),
+            paths,
+        )
+    return len(added)
+
+
+def sync(conn):
+    """Atualiza o índice de busca com o changelog e o índice de backup."""
+    with checkpoint_index.transaction(conn):
+        return sync_changelog(conn) + sync_backups(conn)
+
+
+def parse_date(value):
+    """Tipo do argparse para datas: AAAA-MM-DD ou 'Nd' (N dias atrás)."""
+    match = re.fullmatch(r'(\d+)d', value)
+    if match:
+        return (datetime.now(TIMEZONE) - timedelta(days=int(match.group(1)))).strftime('%Y-%m-%d')
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').strftime('%Y-%m-%d')
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"data inválida: {value!r} (use AAAA-MM-DD ou 30d)")
+
+
+def prefix_upper_bound(prefix):
+    """Menor texto maior que todos os que começam com o prefixo (busca por faixa no índice)."""
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+def search(conn, words=(), source=None, type_=None, author=None, since=None, until=None,
+           path=None, limit=DEFAULT_LIMIT):
+    """Executa a busca; todos os filtros informados precisam ser atendidos."""
+    conditions = []
+    params = []
+    
+    if source:
+        conditions.append('d.source = ?')
+        params.append(source)
+    if type_:
+        conditions.append('d.type = ?')
+        params.append(type_)
+    if author:
+        conditions.append('d.author_key = ?')
+        params.append(normalize(author))
+    if since:
+        conditions.append('d.datetime >= ?')
+        params.append(since)
+    if until:
+        # Até o fim do dia informado
+        conditions.append('d.datetime < ?')
+        params.append(until + '~')
+    prefix = (path or '').strip('/')
+    if prefix:
+        # O próprio arquivo ou o que estiver dentro do diretório (server/a não pega server/ab.ts)
+        conditions.append('d.doc_id IN (SELECT doc_id FROM paths WHERE path = ? OR (path >= ? AND path < ?))')
+        params += [prefix, prefix + '/', prefix_upper_bound(prefix + '/')]
+    
+    for word in words:
+        for term in re.findall(r'\w+\*?', normalize(word)):
+            if term.endswith('*'):
+                # 'nfc*': termos com o prefixo
+                term = term[:-1]
+                conditions.append('d.doc_id IN (SELECT doc_id FROM terms WHERE term >= ? AND term < ?)')
+                params += [term, prefix_upper_bound(term)]
+            else:
+                conditions.append('d.doc_id IN (SELECT doc_id FROM terms WHERE term = ?)')
+                params.append(term)
+    
+    query = 'SELECT source, checkpoint_id, datetime, type, author, description FROM docs d'
+    if conditions:
+        query += ' WHERE ' + ' AND '.join(conditions)
+    query += ' ORDER BY d.datetime DESC, d.checkpoint_id DESC LIMIT ?'
+    params.append(limit)
+    return conn.execute(query, params).fetchall()
+
+
+def print_results(rows):
+    """Imprime os resultados em tabela."""
+    print(f"{'Origem':<10} {'ID':<6} {'Data/Hora':<20} {'Tipo':<28} {'Autor':<15} {'Descrição'}")
+    print("-" * 110)
+    for source, checkpoint_id, datetime_str, type_, author, description in rows:
+        summary = (description or '').strip().splitlines()[0] if (description or '').strip() else ''
+        if len(summary) > 60:
+            summary = summary[:57] + '...'
+        print(f"{source:<10} #{checkpoint_id:<5} {datetime_str:<20} {type_ or '-':<28} "
+              f"{author or '-':<15} {summary}")
+
+
+def build_parser():
+    """Cria o parser de argumentos."""
+    parser = argparse.ArgumentParser(
+        prog='checkpoint_backup.py query',
+        description='Busca checkpoints do changelog e de backup.',
+        epilog='Exemplo: query --type Hotfix --path server/nfce --since 30d',
+    )
+    parser.add_argument('words', nargs='*', metavar='TEXTO',
+                        help='Palavras que devem aparecer (sem acentos/maiúsculas; "nfc*" busca por prefixo)')
+    parser.add_argument('--type', dest='type_', choices=CHECKPOINT_TYPES, metavar='TIPO',
+                        help=f"Tipo do checkpoint ({', '.join(CHECKPOINT_TYPES)})")
+    parser.add_argument('--author', help='Autor')
+    parser.add_argument('--since', type=parse_date, metavar='DATA', help='A partir de AAAA-MM-DD (ou 30d)')
+    parser.add_argument('--until', type=parse_date, metavar='DATA', help='Até AAAA-MM-DD, inclusive')
+    parser.add_argument('--path', metavar='CAMINHO', help='Arquivos alterados neste arquivo ou diretório ("/" não filtra)')
+    parser.add_argument('--source', choices=SOURCES, help='Apenas checkpoints do changelog ou de backup')
+    parser.add_argument('--limit', type=int, default=DEFAULT_LIMIT, metavar='N',
+                        help=f'Máximo de resultados (padrão: {DEFAULT_LIMIT})')
+    return parser
+
+
+def main(argv=None):
+    """Função principal."""
+    args = build_parser().parse_args(argv)
+    
+    conn = connect()
+    try:
+        start = time.perf_counter()
+        indexed = sync(conn)
+        synced = time.perf_counter()
+        rows = search(conn, args.words, source=args.source, type_=args.type_, author=args.author,
+                      since=args.since, until=args.until, path=args.path, limit=args.limit)
+        finished = time.perf_counter()
+    finally:
+        conn.close()
+    
+    if indexed:
+        print(f"📇 {indexed} checkpoint(s) indexado(s) em {(synced - start) * 1000:.1f} ms")
+    if not rows:
+        print("❌ Nenhum checkpoint encontrado!")
+        return 1
+    
+    print_results(rows)
+    print()
+    print(f"⚡ {len(rows)} resultado(s) em {(finished - synced) * 1000:.1f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,575 @@
+#!/usr/bin/env python3
+"""
+Replicação de Checkpoints (S3)
+Envia (push) e baixa (pull) checkpoints de um bucket compatível com S3
+(AWS, MinIO, etc.), transferindo apenas os objetos que faltam do outro lado.
+Arquivos grandes usam upload multipart em paralelo, retomado pelo diário
+local se a transferência for interrompida.
+"""
+
+import os
+import sys
+import argparse
+import hashlib
+import json
+import re
+import threading
+
+import checkpoint_git
+import checkpoint_index
+from checkpoint_backup import (
+    CHECKPOINTS_DIR,
+    PROJECT_ROOT,
+    DEFAULT_JOBS,
+    HASH_ALGORITHM,
+    HASH_CHUNK_SIZE,
+    MANIFEST_FILENAME,
+    checkpoint_lock,
+    load_manifest,
+    object_path,
+    positive_int,
+    run_bounded,
+    stat_key,
+)
+from checkpoint_verify import select_checkpoints
+
+try:
+    import boto3  # Opcional: só necessário para push/pull
+    from botocore.config import Config
+    from botocore.exceptions import ClientError
+except ImportError:
+    boto3 = None
+
+# Configurações
+REMOTE_ENV = 'CHECKPOINT_REMOTE'          # ex: s3://bem-casado-backup/checkpoints
+ENDPOINT_ENV = 'CHECKPOINT_S3_ENDPOINT'   # ex: http://localhost:9000 (MinIO)
+METADATA_FILENAME = 'checkpoint_metadata.json'
+JOURNAL_FILE = os.path.join(CHECKPOINTS_DIR, 'remote_journal.json')
+PULL_PREFIX = '.pull-'                    # Checkpoints sendo baixados
+PULL_OBJECTS_DIR = os.path.join(CHECKPOINTS_DIR, PULL_PREFIX + 'objects')  # Objetos baixados, ainda sem checkpoint
+MULTIPART_THRESHOLD = 64 * 1024 * 1024    # 64 MB
+PART_SIZE = 16 * 1024 * 1024              # 16 MB (mínimo do S3: 5 MB)
+OBJECT_HASH_RE = re.compile(r'[0-9a-f]{64}')  # sha256 em hexadecimal
+
+
+def parse_remote(url):
+    """Separa s3://bucket/prefixo em (bucket, prefixo terminado em '/')."""
+    if not url or not url.startswith('s3://'):
+        raise ValueError(f"remoto inválido: {url!r} (use s3://bucket/prefixo ou defina {REMOTE_ENV})")
+    bucket, _, prefix = url[len('s3://'):].partition('/')
+    prefix = prefix.strip('/')
+    return bucket, prefix + '/' if prefix else ''
+
+
+def make_client(endpoint_url, jobs):
+    """Cliente S3 (credenciais pelas variáveis AWS_* ou ~/.aws)."""
+    config = Config(max_pool_connections=jobs * 2, retries={'max_attempts': 5, 'mode': 'standard'})
+    return boto3.client('s3', endpoint_url=endpoint_url, config=config)
+
+
+def list_remote_keys(client, bucket, prefix):
+    """Chaves existentes no remoto abaixo do prefixo: chave -> tamanho."""
+    keys = {}
+    paginator = client.get_paginator('list_objects_v2')
+    for page in paginator.paginate(Bucket=bucket, Prefix=prefix):
+        for item in page.get('Contents', []):
+            keys[item['Key']] = item['Size']
+    return keys
+
+
+def object_key(prefix, file_hash):
+    """Chave remota de um objeto (mesma estrutura de .checkpoints/objects/)."""
+    return f"{prefix}objects/{file_hash[:2]}/{file_hash[2:]}"
+
+
+def checkpoint_key(prefix, backup_path, name):
+    """Chave remota de um arquivo do diretório do checkpoint."""
+    return f"{prefix}checkpoints/{backup_path}/{name}"
+
+
+class Journal:
+    """Diário dos uploads multipart em andamento, para retomá-los após uma interrupção."""
+    
+    def __init__(self, path=JOURNAL_FILE):
+        self.path = path
+        self.lock = threading.Lock()
+        self.entries = {}
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                self.entries = json.load(f)
+    
+    def get(self, key):
+        with self.lock:
+            return self.entries.get(key)
+    
+    def set(self, key, entry):
+        with self.lock:
+            self.entries[key] = entry
+            self.save()
+    
+    def remove(self, key):
+        with self.lock:
+            if self.entries.pop(key, None) is not None:
+                self.save()
+    
+    def save(self):
+        """Grava o diário de forma atômica (chamado com a trava em mãos)."""
+        tmp_file = f"{self.path}.tmp.{os.getpid()}"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(self.entries, f, indent=2)
+        os.replace(tmp_file, self.path)
+
+
+def uploaded_parts(client, bucket, key, upload_id):
+    """Partes já recebidas pelo remoto: número -> ETag (None se o upload não existe mais)."""
+    parts = {}
+    try:
+        paginator = client.get_paginator('list_parts')
+        for page in paginator.paginate(Bucket=bucket, Key=key, UploadId=upload_id):
+            for part in page.get('Parts', []):
+                parts[part['PartNumber']] = part['ETag']
+    except ClientError:
+        return None
+    return parts
+
+
+def multipart_upload(client, bucket, key, path, journal, jobs):
+    """Envia um arquivo grande em partes paralelas, retomando o upload do diário se houver."""
+    st = os.stat(path)
+    fingerprint = list(stat_key(st))
+    
+    entry = journal.get(key)
+    parts = None
+    if entry is not None and entry['stat'] == fingerprint:
+        parts = uploaded_parts(client, bucket, key, entry['upload_id'])
+        if parts is not None:
+            print(f"   ↪️  Retomando {key}: {len(parts)} parte(s) já enviadas")
+    if parts is None:
+        if entry is not None:
+            # Upload anterior não é mais retomável (arquivo mudou): descartar as partes no remoto
+            try:
+                client.abort_multipart_upload(Bucket=bucket, Key=key, UploadId=entry['upload_id'])
+            except ClientError:
+                pass  # Já expirado ou removido
+        upload_id = client.create_multipart_upload(Bucket=bucket, Key=key)['UploadId']
+        entry = {'upload_id': upload_id, 'stat': fingerprint, 'part_size': PART_SIZE}
+        journal.set(key, entry)
+        parts = {}
+    
+    part_size = entry['part_size']
+    part_count = max(1, -(-st.st_size // part_size))
+    
+    def upload_part(number):
+        with open(path, 'rb') as f:
+            f.seek((number - 1) * part_size)
+            data = f.read(part_size)
+        response = client.upload_part(Bucket=bucket, Key=key, UploadId=entry['upload_id'],
+                                      PartNumber=number, Body=data)
+        return response['ETag']
+    
+    errors = []
+    items = ((number, (number,)) for number in range(1, part_count + 1) if number not in parts)
+    for number, etag, error in run_bounded(upload_part, items, jobs):
+        if error is not None:
+            errors.append(f"parte {number}: {error}")
+        else:
+            parts[number] = etag
+    if errors:
+        # O diário mantém o upload: o próximo push envia só as partes que faltam
+        raise RuntimeError(f"{len(errors)} parte(s) falharam ({errors[0]})")
+    
+    client.complete_multipart_upload(
+        Bucket=bucket, Key=key, UploadId=entry['upload_id'],
+        MultipartUpload={'Parts': [{'PartNumber': n, 'ETag': parts[n]} for n in sorted(parts)]},
+    )
+    journal.remove(key)
+
+
+def upload_file(client, bucket, key, path):
+    """Envia um arquivo pequeno em uma única requisição."""
+    with open(path, 'rb') as f:
+        client.put_object(Bucket=bucket, Key=key, Body=f)
+
+
+def transfer(func, uploads, jobs, label):
+    """
+    Executa as transferências: arquivos pequenos em paralelo, grandes um por vez
+    (cada um já dividido em partes paralelas). Retorna {chave: erro}.
+    """
+    errors = {}
+    small = [(key, args) for key, args, size in uploads if size < MULTIPART_THRESHOLD]
+    large = [(key, args) for key, args, size in uploads if size >= MULTIPART_THRESHOLD]
+    
+    for key, _, error in run_bounded(func, small, jobs):
+        if error is not None:
+            errors[key] = str(error)
+    
+    for key, args in large:
+        print(f"   {label} {key} (em partes)")
+        try:
+            func(*args, large=True)
+        except Exception as e:
+            errors[key] = str(e)
+    
+    return errors
+
+
+def push(checkpoint_ids=(), push_all=False, remote=None, endpoint_url=None, jobs=DEFAULT_JOBS, dry_run=False):
+    """Envia os checkpoints ao remoto, apenas com o que ainda não está lá."""
+    bucket, prefix = parse_remote(remote)
+    checkpoints, not_found = select_checkpoints(checkpoint_ids, push_all)
+    for checkpoint_id in not_found:
+        print(f"❌ Checkpoint #{checkpoint_id:03d} não encontrado ou sem backup de arquivos!")
+    if not checkpoints:
+        return 1
+    
+    client = make_client(endpoint_url, jobs)
+    journal = Journal()
+    
+    print("=" * 70)
+    print(f"📤 PUSH → s3://{bucket}/{prefix}" + (" (simulação)" if dry_run else ""))
+    print("=" * 70)
+    
+    remote_keys = list_remote_keys(client, bucket, prefix)
+    
+    objects = {}
+    files = []
+    finals = []
+    git_entries = 0
+    for cp in checkpoints:
+        checkpoint_path = os.path.join(CHECKPOINTS_DIR, cp['backup_path'])
+        manifest = load_manifest(cp['backup_path'])
+        if manifest is None:
+            print(f"⚠️  #{cp['id']:03d} sem manifesto, ignorado")
+            continue
+        
+        if cp.get('storage') == 'objects':
+            for entry in manifest['files'].values():
+                if checkpoint_git.is_git_hash(entry['hash']):
+                    git_entries += 1
+                    continue
+                key = object_key(prefix, entry['hash'])
+                if key not in remote_keys:
+                    objects[key] = (object_path(entry['hash']), entry['size'])
+        
+        for name in sorted(os.listdir(checkpoint_path)):
+            path = os.path.join(checkpoint_path, name)
+            key = checkpoint_key(prefix, cp['backup_path'], name)
+            if remote_keys.get(key) == os.path.getsize(path):
+                continue
+            # Os metadados vão por último: no remoto, checkpoint com metadados está completo
+            (finals if name == METADATA_FILENAME else files).append((key, path))
+    
+    total_bytes = sum(size for _, size in objects.values())
+    print(f"📦 {len(checkpoints)} checkpoint(s): {len(objects)} objeto(s) novo(s) "
+          f"({total_bytes / 1024 / 1024:.2f} MB) e {len(files) + len(finals)} arquivo(s) de checkpoint")
+    if git_entries:
+        print(f"🔗 {git_entries} arquivo(s) registrados por blob do Git: dependem do commit estar no GitHub")
+    
+    if dry_run:
+        return 0
+    
+    def send(key, path, large=False):
+        if large:
+            multipart_upload(client, bucket, key, path, journal, jobs)
+        else:
+            upload_file(client, bucket, key, path)
+    
+    errors = transfer(send, [(key, (key, path), size) for key, (path, size) in objects.items()], jobs, '📤')
+    errors.update(transfer(send, [(key, (key, path), os.path.getsize(path)) for key, path in files], jobs, '📤'))
+    if not errors:
+        errors.update(transfer(send, [(key, (key, path), os.path.getsize(path)) for key, path in finals], jobs, '📤'))
+    
+    for key, message in sorted(errors.items()):
+        print(f"❌ Erro ao enviar {key}: {message}")
+    
+    print()
+    if errors:
+        print(f"⚠️  {len(errors)} falha(s): rode o push de novo para continuar de onde parou")
+        return 1
+    print(f"✅ Push concluído: {len(checkpoints)} checkpoint(s) no remoto")
+    print("=" * 70)
+    return 0
+
+
+def download_file(client, bucket, key, dest, size, expected_hash=None):
+    """
+    Baixa a chave para dest, continuando um download parcial (.part) com Range.
+    Com expected_hash, confere o conteúdo antes de gravar o arquivo final.
+    """
+    os.makedirs(os.path.dirname(dest), exist_ok=True)
+    part_file = dest + '.part'
+    start = os.path.getsize(part_file) if os.path.exists(part_file) else 0
+    if start > size:
+        start = 0
+    
+    if start < size or size == 0:
+        request = {'Bucket': bucket, 'Key': key}
+        if start:
+            request['Range'] = f"bytes={start}-"
+        body = client.get_object(**request)['Body']
+        with open(part_file, 'ab' if start else 'wb') as f:
+            for chunk in body.iter_chunks(HASH_CHUNK_SIZE):
+                f.write(chunk)
+    
+    if expected_hash is not None:
+        digest = hashlib.new(HASH_ALGORITHM)
+        with open(part_file, 'rb') as f:
+            for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+                digest.update(chunk)
+        if digest.hexdigest() != expected_hash:
+            os.remove(part_file)
+            raise RuntimeError("conteúdo baixado não confere com o hash")
+    
+    os.replace(part_file, dest)
+
+
+def is_safe_name(name):
+    """Nome vindo do remoto pode virar um diretório em .checkpoints/ (um único componente, sem '..')."""
+    return (
+        isinstance(name, str) and name not in ('', '.', '..')
+        and '/' not in name and '\\' not in name and '\0' not in name
+        and not name.startswith('.')  # evita colidir com .pull-, .tmp- e afins
+    )
+
+
+def path_inside(base, relative):
+    """Caminho de relative dentro de base, ou None se ele sair de base."""
+    path = os.path.normpath(os.path.join(base, relative))
+    return path if path.startswith(base + os.sep) else None
+
+
+def is_safe_path(rel_path):
+    """Caminho de um manifesto do remoto: relativo, sem '..' e dentro do projeto."""
+    return (
+        isinstance(rel_path, str) and rel_path != '' and '\0' not in rel_path
+        and not os.path.isabs(rel_path) and '..' not in rel_path.replace('\\', '/').split('/')
+        and path_inside(PROJECT_ROOT, rel_path) is not None
+    )
+
+
+def staged_object_path(file_hash):
+    """Caminho de um objeto baixado pelo pull antes de ser movido para o armazenamento."""
+    return os.path.join(PULL_OBJECTS_DIR, file_hash[:2], file_hash[2:])
+
+
+def adopt_objects(files):
+    """
+    Move para o armazenamento os objetos baixados de um manifesto (com a trava
+    em mãos). Objetos que já existiam têm o ctime atualizado, como no
+    store_object, para a coleta de lixo em andamento não removê-los.
+    Retorna a mensagem de erro, ou None.
+    """
+    for entry in files.values():
+        file_hash = entry['hash']
+        if checkpoint_git.is_git_hash(file_hash):
+            continue
+        dest = object_path(file_hash)
+        staged = staged_object_path(file_hash)
+        if os.path.exists(staged):
+            os.makedirs(os.path.dirname(dest), exist_ok=True)
+            os.replace(staged, dest)
+        elif not os.path.exists(dest):
+            return f"objeto {file_hash} removido durante o pull"
+        st = os.stat(dest)
+        os.utime(dest, ns=(st.st_atime_ns, st.st_mtime_ns))
+    return None
+
+
+def read_remote_json(client, bucket, key):
+    """Lê um JSON do remoto."""
+    return json.loads(client.get_object(Bucket=bucket, Key=key)['Body'].read())
+
+
+def pull(checkpoint_ids=(), pull_all=False, remote=None, endpoint_url=None, jobs=DEFAULT_JOBS, dry_run=False):
+    """Baixa do remoto os checkpoints que não existem localmente."""
+    bucket, prefix = parse_remote(remote)
+    client = make_client(endpoint_url, jobs)
+    
+    print("=" * 70)
+    print(f"📥 PULL ← s3://{bucket}/{prefix}" + (" (simulação)" if dry_run else ""))
+    print("=" * 70)
+    
+    remote_keys = list_remote_keys(client, bucket, prefix)
+    checkpoints_prefix = f"{prefix}checkpoints/"
+    local_paths = {cp.get('backup_path') for cp in checkpoint_index.list_checkpoints()}
+    
+    # Só checkpoints com metadados no remoto estão completos
+    selected = []
+    errors = {}
+    for key in sorted(remote_keys):
+        if not key.startswith(checkpoints_prefix) or not key.endswith('/' + METADATA_FILENAME):
+            continue
+        backup_path = key[len(checkpoints_prefix):-len('/' + METADATA_FILENAME)]
+        if backup_path in local_paths:
+            continue
+        metadata = read_remote_json(client, bucket, key)
+        if not (pull_all or metadata['id'] in checkpoint_ids):
+            continue
+        # Nomes do remoto viram caminhos locais: nada pode sair de .checkpoints/
+        if not is_safe_name(backup_path) or metadata.get('backup_path') != backup_path:
+            errors[key] = f"backup_path inválido: {metadata.get('backup_path')!r}"
+            continue
+        selected.append(metadata)
+    
+    manifests = {}
+    objects = {}
+    for metadata in list(selected):
+        manifest_key = checkpoint_key(prefix, metadata['backup_path'], MANIFEST_FILENAME)
+        manifests[metadata['backup_path']] = read_remote_json(client, bucket, manifest_key)['files']
+        # Os caminhos do manifesto são usados pelo restore: nada pode sair do projeto
+        unsafe = [rel_path for rel_path in manifests[metadata['backup_path']] if not is_safe_path(rel_path)]
+        if unsafe:
+            errors[manifest_key] = f"caminho inválido no manifesto: {unsafe[0]!r}"
+            selected.remove(metadata)
+            continue
+        if metadata.get('storage') != 'objects':
+            continue
+        entries = manifests[metadata['backup_path']].values()
+        invalid = [entry['hash'] for entry in entries
+                   if not checkpoint_git.is_git_hash(entry['hash']) and not OBJECT_HASH_RE.fullmatch(entry['hash'])]
+        if invalid:
+            errors[manifest_key] = f"hash de objeto inválido: {invalid[0]!r}"
+            selected.remove(metadata)
+            continue
+        for entry in entries:
+            file_hash = entry['hash']
+            if (not checkpoint_git.is_git_hash(file_hash) and not os.path.exists(object_path(file_hash))
+                    and not os.path.exists(staged_object_path(file_hash))):
+                objects[file_hash] = entry['size']
+    
+    if not selected and not errors:
+        print("✅ Nenhum checkpoint novo no remoto")
+        return 0
+    
+    for metadata in selected:
+        print(f"📦 #{metadata['id']:03d} {metadata['datetime']}  {metadata['description']}")
+    print(f"📥 {len(objects)} objeto(s) a baixar ({sum(objects.values()) / 1024 / 1024:.2f} MB)")
+    
+    if dry_run:
+        return 0
+    
+    def receive(key, dest, size, expected_hash=None, large=False):
+        download_file(client, bucket, key, dest, size, expected_hash)
+    
+    # Objetos vão para um diretório à parte até o checkpoint entrar no índice:
+    # em .checkpoints/objects/, a coleta de lixo os removeria por não serem referenciados
+    downloads = [
+        (object_key(prefix, file_hash), (object_key(prefix, file_hash), staged_object_path(file_hash), size, file_hash), size)
+        for file_hash, size in objects.items()
+    ]
+    object_errors = transfer(receive, downloads, jobs, '📥')
+    errors.update(object_errors)
+    
+    pulled = 0
+    for metadata in selected:
+        backup_path = metadata['backup_path']
+        staging = os.path.join(CHECKPOINTS_DIR, PULL_PREFIX + backup_path)
+        key_prefix = checkpoint_key(prefix, backup_path, '')
+        downloads = []
+        cp_errors = {}
+        for key, size in remote_keys.items():
+            if not key.startswith(key_prefix):
+                continue
+            dest = path_inside(staging, key[len(key_prefix):])
+            if dest is None:
+                cp_errors[key] = "caminho fora do diretório do checkpoint"
+            else:
+                downloads.append((key, (key, dest, size), size))
+        if not cp_errors:
+            cp_errors = transfer(receive, downloads, jobs, '📥')
+        errors.update(cp_errors)
+        if cp_errors or object_errors:
+            continue
+        
+        target = os.path.join(CHECKPOINTS_DIR, backup_path)
+        with checkpoint_lock():
+            # Diretório com o mesmo nome fora do índice: não sobrescrever (o download fica no staging)
+            if os.path.lexists(target):
+                errors[checkpoint_key(prefix, backup_path, '')] = (
+                    f"{target} já existe e não está no índice; mova-o e rode o pull de novo"
+                )
+                continue
+            object_error = adopt_objects(manifests[backup_path]) if metadata.get('storage') == 'objects' else None
+            if object_error is not None:
+                errors[checkpoint_key(prefix, backup_path, '')] = object_error
+                continue
+            try:
+                os.rename(staging, target)
+            except OSError as e:
+                errors[checkpoint_key(prefix, backup_path, '')] = f"não foi possível mover {staging}: {e}"
+                continue
+            checkpoint_id = checkpoint_index.import_checkpoint(metadata, manifests[backup_path])
+        if checkpoint_id != metadata['id']:
+            print(f"⚠️  #{metadata['id']:03d} já existe localmente: importado como #{checkpoint_id:03d}")
+            metadata_file = os.path.join(CHECKPOINTS_DIR, backup_path, METADATA_FILENAME)
+            with open(metadata_file, 'w', encoding='utf-8') as f:
+                json.dump({**metadata, 'id': checkpoint_id}, f, indent=2, ensure_ascii=False)
+        pulled += 1
+    
+    for key, message in sorted(errors.items()):
+        print(f"❌ Erro ao baixar {key}: {message}")
+    
+    print()
+    if errors:
+        print(f"⚠️  {len(errors)} falha(s): rode o pull de novo para continuar de onde parou")
+        return 1
+    print(f"✅ Pull concluído: {pulled} checkpoint(s) importado(s)")
+    print("=" * 70)
+    return 0
+
+
+def build_parser(command):
+    """Cria o parser de argumentos de push/pull."""
+    action = 'Envia ao' if command == 'push' else 'Baixa do'
+    parser = argparse.ArgumentParser(
+        prog=f'checkpoint_backup.py {command}',
+        description=f'{action} armazenamento S3 os checkpoints (apenas o que falta do outro lado).',
+    )
+    parser.add_argument('checkpoint_ids', type=int, nargs='*', metavar='ID', help='Checkpoints a transferir')
+    parser.add_argument('--all', action='store_true', help='Transfere todos os checkpoints')
+    parser.add_argument('--remote', default=os.environ.get(REMOTE_ENV),
+                        help=f'Destino s3://bucket/prefixo (padrão: ${REMOTE_ENV})')
+    parser.add_argument('--endpoint-url', default=os.environ.get(ENDPOINT_ENV),
+                        help=f'Endpoint compatível com S3, ex: MinIO (padrão: ${ENDPOINT_ENV})')
+    parser.add_argument('--jobs', '-j', type=positive_int, default=DEFAULT_JOBS, metavar='N',
+                        help=f'Transferências simultâneas (padrão: {DEFAULT_JOBS})')
+    parser.add_argument('--dry-run', action='store_true', help='Apenas mostra o que seria transferido')
+    return parser
+
+
+def run(command, argv):
+    """Executa push ou pull com os argumentos da linha de comando."""
+    parser = build_parser(command)
+    args = parser.parse_args(argv)
+    if not args.checkpoint_ids and not args.all:
+        parser.error('informe o ID do checkpoint ou --all')
+    if boto3 is None:
+        print("❌ O módulo boto3 não está instalado (pip install boto3)")
+        return 1
+    
+    try:
+        parse_remote(args.remote)
+    except ValueError as e:
+        parser.error(str(e))
+    
+    func = push if command == 'push' else pull
+    return func(args.checkpoint_ids, args.all, remote=args.remote, endpoint_url=args.endpoint_url,
+                jobs=args.jobs, dry_run=args.dry_run)
+
+
+def push_main(argv=None):
+    """Função principal do push."""
+    return run('push', argv)
+
+
+def pull_main(argv=None):
+    """Função principal do pull."""
+    return run('pull', argv)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] not in ('push', 'pull'):
+        print("Uso: python3 checkpoint_remote.py push|pull [ID...|--all] [--remote s3://bucket/prefixo]")
+        sys.exit(1)
+    sys.exit(run(sys.argv[1], sys.argv[2:]))
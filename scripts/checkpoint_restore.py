@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""
+Restauração de Checkpoints
+Restaura os arquivos de um checkpoint criado por checkpoint_backup.py,
+regravando apenas os arquivos que diferem da árvore de trabalho.
+"""
+
+import os
+import sys
+import argparse
+import gzip
+import io
+import shutil
+import tarfile
+import threading
+
+import checkpoint_git
+import checkpoint_index
+from checkpoint_backup import (
+    PROJECT_ROOT,
+    CHECKPOINTS_DIR,
+    DEFAULT_JOBS,
+    hash_file,
+    iter_backup_files,
+    load_manifest,
+    object_path,
+    positive_int,
+    run_bounded,
+    zstandard,
+)
+
+
+def find_checkpoint(checkpoint_id):
+    """Retorna os metadados do checkpoint pelo ID (ou None)."""
+    return checkpoint_index.get_checkpoint(checkpoint_id)
+
+
+def normalize_paths(paths):
+    """Normaliza os filtros de --paths para prefixos relativos sem barra final."""
+    return [os.path.normpath(p).replace(os.sep, '/').strip('/') for p in paths or []]
+
+
+def matches_paths(rel_path, paths):
+    """Verifica se o caminho está dentro de algum dos filtros (sem filtro: tudo)."""
+    if not paths:
+        return True
+    return any(rel_path == p or rel_path.startswith(p + '/') for p in paths)
+
+
+def hash_like(path, file_hash):
+    """Calcula o hash do arquivo no mesmo formato do hash do manifesto (sha256 ou blob do Git)."""
+    if checkpoint_git.is_git_hash(file_hash):
+        return checkpoint_git.hash_blob_file(path)
+    return hash_file(path)
+
+
+def open_stored(entry):
+    """Abre o conteúdo armazenado de uma entrada do manifesto (objeto ou blob do Git)."""
+    if checkpoint_git.is_git_hash(entry['hash']):
+        return io.BytesIO(checkpoint_git.read_blob(entry['hash']))
+    return open(object_path(entry['hash']), 'rb')
+
+
+def project_path(rel_path):
+    """
+    Caminho de rel_path na árvore de trabalho. Recusa caminhos do manifesto que
+    saiam do projeto, inclusive por um diretório que seja link simbólico.
+    """
+    dest = os.path.join(PROJECT_ROOT, rel_path)
+    root = os.path.realpath(PROJECT_ROOT)
+    parent = os.path.realpath(os.path.dirname(os.path.normpath(dest)))
+    if os.path.isabs(rel_path) or (parent != root and not parent.startswith(root + os.sep)):
+        raise ValueError(f"caminho fora do projeto: {rel_path!r}")
+    return dest
+
+
+def differs_from_working_tree(rel_path, entry):
+    """Compara o arquivo da árvore de trabalho com a entrada do manifesto."""
+    dest = project_path(rel_path)
+    try:
+        st = os.stat(dest)
+    except FileNotFoundError:
+        return True
+    
+    # Tamanho diferente dispensa a leitura do arquivo
+    if st.st_size != entry['size']:
+        return True
+    return hash_like(dest, entry['hash']) != entry['hash']
+
+
+def write_file(rel_path, entry, source):
+    """Grava o conteúdo de source (arquivo aberto) no destino de forma atômica."""
+    dest = project_path(rel_path)
+    os.makedirs(os.path.dirname(dest), exist_ok=True)
+    
+    tmp_dest = f"{dest}.restore.{os.getpid()}.{threading.get_ident()}"
+    try:
+        with open(tmp_dest, 'wb') as f:
+            shutil.copyfileobj(source, f)
+        os.chmod(tmp_dest, entry['mode'])
+        os.replace(tmp_dest, dest)
+    except BaseException:
+        if os.path.exists(tmp_dest):
+            os.remove(tmp_dest)
+        raise
+
+
+def restore_from_object(rel_path, entry):
+    """Restaura um arquivo a partir do armazenamento de objetos (ou do repositório Git)."""
+    with open_stored(entry) as source:
+        write_file(rel_path, entry, source)
+
+
+def open_archive_reader(archive_file, codec):
+    """Abre o tar comprimido do checkpoint para leitura sequencial."""
+    raw = open(archive_file, 'rb')
+    if codec == 'zstd':
+        if zstandard is None:
+            raw.close()
+            raise RuntimeError("checkpoint comprimido com zstd, mas o módulo zstandard não está instalado")
+        stream = zstandard.ZstdDecompressor().stream_reader(raw)
+    else:
+        stream = gzip.GzipFile(fileobj=raw, mode='rb')
+    return tarfile.open(fileobj=stream, mode='r|')
+
+
+def restore_from_archive(checkpoint_path, metadata, to_restore):
+    """
+    Restaura os arquivos selecionados percorrendo o tar uma única vez.
+    Retorna (restaurados, erros).
+    """
+    archive_file = os.path.join(checkpoint_path, metadata['archive'])
+    found = set()
+    errors = {}
+    
+    with open_archive_reader(archive_file, metadata['archive_codec']) as tar:
+        for member in tar:
+            entry = to_restore.get(member.name)
+            if entry is None or not member.isfile():
+                continue
+            found.add(member.name)
+            try:
+                write_file(member.name, entry, tar.extractfile(member))
+            except (OSError, ValueError) as e:
+                errors[member.name] = str(e)
+    
+    for rel_path in to_restore.keys() - found:
+        errors[rel_path] = "arquivo ausente no tar do checkpoint"
+    
+    return len(found) - len(errors.keys() & found), errors
+
+
+def find_extra_files(files, paths):
+    """Arquivos da árvore de trabalho que não existem no checkpoint (dentro do filtro)."""
+    return sorted(
+        rel_path for rel_path, _ in iter_backup_files()
+        if rel_path not in files and matches_paths(rel_path, paths)
+    )
+
+
+def restore_checkpoint(checkpoint_id, paths=None, jobs=DEFAULT_JOBS, delete=False,
+                       dry_run=False, assume_yes=False):
+    """Restaura o checkpoint na árvore de trabalho."""
+    metadata = find_checkpoint(checkpoint_id)
+    if metadata is None:
+        print(f"❌ Checkpoint #{checkpoint_id:03d} não encontrado!")
+        return 1
+    
+    if 'backup_path' not in metadata:
+        # Checkpoints do post_deploy_checkpoint.sh são apenas tags Git
+        print(f"❌ Checkpoint #{checkpoint_id:03d} não possui backup de arquivos.")
+        print(f"💡 Use: ./scripts/rollback_checkpoint.sh {checkpoint_id}")
+        return 1
+    
+    manifest = load_manifest(metadata['backup_path'])
+    if manifest is None:
+        print(f"❌ Checkpoint #{checkpoint_id:03d} não possui manifesto ({metadata['backup_path']})")
+        return 1
+    
+    checkpoint_path = os.path.join(CHECKPOINTS_DIR, metadata['backup_path'])
+    paths = normalize_paths(paths)
+    
+    print("=" * 70)
+    print(f"🔄 RESTAURAR CHECKPOINT #{checkpoint_id:03d}")
+    print("=" * 70)
+    print(f"📅 Data/Hora: {metadata['datetime']}")
+    print(f"📝 Descrição: {metadata['description']}")
+    if paths:
+        print(f"📂 Caminhos: {', '.join(paths)}")
+    print()
+    
+    files = {
+        rel_path: entry for rel_path, entry in manifest['files'].items()
+        if matches_paths(rel_path, paths)
+    }
+    
+    # Comparar com a árvore de trabalho em paralelo
+    to_restore = {}
+    errors = {}
+    items = ((rel_path, (rel_path, entry)) for rel_path, entry in files.items())
+    for rel_path, differs, error in run_bounded(differs_from_working_tree, items, jobs):
+        if error is not None:
+            errors[rel_path] = str(error)
+        elif differs:
+            to_restore[rel_path] = files[rel_path]
+    
+    to_delete = find_extra_files(files, paths) if delete else []
+    
+    print(f"🔍 {len(files)} arquivos no checkpoint, {len(to_restore)} diferentes da árvore de trabalho")
+    for rel_path in sorted(to_restore):
+        print(f"   ✏️  {rel_path}")
+    for rel_path in to_delete:
+        print(f"   🗑️  {rel_path}")
+    print()
+    
+    if not to_restore and not to_delete:
+        print("✅ Árvore de trabalho já está igual ao checkpoint!")
+        return 0
+    
+    if dry_run:
+        print("ℹ️  Simulação (--dry-run): nenhum arquivo foi alterado")
+        return 0
+    
+    if not assume_yes:
+        confirm = input("⚠️  Restaurar esses arquivos? (s/n): ").strip().lower()
+        if confirm != 's':
+            print("❌ Operação cancelada!")
+            return 1
+    
+    if metadata.get('storage') == 'archive':
+        restored, restore_errors = restore_from_archive(checkpoint_path, metadata, to_restore)
+    else:
+        restored = 0
+        restore_errors = {}
+        items = ((rel_path, (rel_path, entry)) for rel_path, entry in to_restore.items())
+        for rel_path, _, error in run_bounded(restore_from_object, items, jobs):
+            if error is not None:
+                restore_errors[rel_path] = str(error)
+            else:
+                restored += 1
+    errors.update(restore_errors)
+    
+    for rel_path in to_delete:
+        try:
+            os.remove(project_path(rel_path))
+        except (OSError, ValueError) as e:
+            errors[rel_path] = str(e)
+    
+    for rel_path, message in sorted(errors.items()):
+        print(f"❌ Erro em {rel_path}: {message}")
+    
+    print()
+    print(f"✅ {restored} arquivo(s) restaurado(s), {len(to_delete)} removido(s)")
+    return 1 if errors else 0
+
+
+def build_parser():
+    """Cria o parser de argumentos."""
+    parser = argparse.ArgumentParser(
+        prog='checkpoint_restore.py',
+        description='Restaura os arquivos de um checkpoint criado por checkpoint_backup.py.',
+    )
+    parser.add_argument('checkpoint_id', type=int, help='ID do checkpoint')
+    parser.add_argument('--paths', nargs='+', metavar='CAMINHO',
+                        help='Restaura apenas estes caminhos (ex: server/ shared/const.ts)')
+    parser.add_argument('--jobs', '-j', type=positive_int, default=DEFAULT_JOBS, metavar='N',
+                        help=f'Número de threads de leitura/escrita (padrão: {DEFAULT_JOBS})')
+    parser.add_argument('--delete', action='store_true',
+                        help='Remove arquivos que não existiam no checkpoint')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='Apenas lista o que seria restaurado')
+    parser.add_argument('--yes', '-y', action='store_true',
+                        help='Não pede confirmação')
+    return parser
+
+
+def main():
+    """Função principal."""
+    args = build_parser().parse_args()
+    return restore_checkpoint(
+        args.checkpoint_id,
+        paths=args.paths,
+        jobs=args.jobs,
+        delete=args.delete,
+        dry_run=args.dry_run,
+        assume_yes=args.yes,
+    )
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""
+Verificação de Integridade de Checkpoints
+Recalcula o hash do conteúdo armazenado (em blocos, sem carregar arquivos
+inteiros) e compara com os hashes registrados nos manifestos.
+"""
+
+import os
+import sys
+import argparse
+import hashlib
+import time
+
+import checkpoint_git
+import checkpoint_index
+from checkpoint_backup import (
+    CHECKPOINTS_DIR,
+    DEFAULT_JOBS,
+    HASH_ALGORITHM,
+    HASH_CHUNK_SIZE,
+    hash_file,
+    load_manifest,
+    object_path,
+    positive_int,
+    run_bounded,
+    stat_key,
+)
+from checkpoint_restore import open_archive_reader
+
+
+def cache_path(path):
+    """Caminho relativo a .checkpoints/ usado como chave no cache de verificação."""
+    return os.path.relpath(path, CHECKPOINTS_DIR).replace(os.sep, '/')
+
+
+def hash_stream(stream):
+    """Calcula o hash de um arquivo aberto lendo em blocos."""
+    digest = hashlib.new(HASH_ALGORITHM)
+    for chunk in iter(lambda: stream.read(HASH_CHUNK_SIZE), b''):
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+def verify_object(file_hash, size, cached_key):
+    """
+    Confere um objeto do armazenamento. Retorna (status, stat_key), com status
+    'ok', 'cached' (inalterado desde a última verificação), 'missing' ou 'corrupted'.
+    """
+    path = object_path(file_hash)
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return 'missing', None
+    
+    key = stat_key(st)
+    if key == cached_key:
+        return 'cached', key
+    if st.st_size != size:
+        return 'corrupted', key
+    return ('ok' if hash_file(path) == file_hash else 'corrupted'), key
+
+
+def verify_archive(archive_file, codec, files, cached_key):
+    """
+    Confere os membros do tar de um checkpoint em uma única leitura sequencial.
+    Retorna (status, stat_key, problemas por arquivo).
+    """
+    try:
+        st = os.stat(archive_file)
+    except FileNotFoundError:
+        return 'missing', None, {}
+    
+    key = stat_key(st)
+    if key == cached_key:
+        return 'cached', key, {}
+    
+    problems = {}
+    found = set()
+    with open_archive_reader(archive_file, codec) as tar:
+        for member in tar:
+            entry = files.get(member.name)
+            if entry is None or not member.isfile():
+                continue
+            found.add(member.name)
+            if hash_stream(tar.extractfile(member)) != entry['hash']:
+                problems[member.name] = "conteúdo corrompido"
+    
+    for rel_path in files.keys() - found:
+        problems[rel_path] = "arquivo ausente no tar"
+    
+    return ('corrupted' if problems else 'ok'), key, problems
+
+
+def select_checkpoints(checkpoint_ids, verify_all):
+    """Metadados dos checkpoints a verificar (apenas os que têm backup de arquivos)."""
+    if verify_all:
+        return [cp for cp in checkpoint_index.list_checkpoints() if cp.get('backup_path')], []
+    
+    selected = []
+    not_found = []
+    for checkpoint_id in checkpoint_ids:
+        metadata = checkpoint_index.get_checkpoint(checkpoint_id)
+        if metadata is None or not metadata.get('backup_path'):
+            not_found.append(checkpoint_id)
+        else:
+            selected.append(metadata)
+    return selected, not_found
+
+
+def verify_checkpoints(checkpoint_ids=(), verify_all=False, jobs=DEFAULT_JOBS, use_cache=True):
+    """Verifica os checkpoints indicados e imprime os problemas encontrados."""
+    checkpoints, not_found = select_checkpoints(checkpoint_ids, verify_all)
+    for checkpoint_id in not_found:
+        print(f"❌ Checkpoint #{checkpoint_id:03d} não encontrado ou sem backup de arquivos!")
+    if not checkpoints:
+        if not not_found:
+            print("❌ Nenhum checkpoint com backup de arquivos!")
+        return 1
+    
+    print("=" * 70)
+    print(f"🔎 VERIFICAR {len(checkpoints)} CHECKPOINT(S)")
+    print("=" * 70)
+    
+    cache = checkpoint_index.load_verify_cache() if use_cache else {}
+    problems = {cp['id']: {} for cp in checkpoints}
+    manifests = {}
+    
+    for cp in checkpoints:
+        manifest = load_manifest(cp['backup_path'])
+        if manifest is None:
+            problems[cp['id']]['manifest.json'] = "manifesto ausente"
+            continue
+        manifests[cp['id']] = manifest['files']
+        
+        # O manifesto em disco deve bater com o que foi registrado no índice
+        indexed = checkpoint_index.get_manifest_entries(cp['id'])
+        for rel_path, entry in manifest['files'].items():
+            if indexed and indexed.get(rel_path) != entry['hash']:
+                problems[cp['id']][rel_path] = "manifesto difere do índice"
+    
+    # Objetos compartilhados entre checkpoints são verificados uma única vez
+    objects = {}
+    git_blobs = set()
+    owners = {}
+    for cp in checkpoints:
+        if cp.get('storage') != 'objects' or cp['id'] not in manifests:
+            continue
+        for rel_path, entry in manifests[cp['id']].items():
+            if checkpoint_git.is_git_hash(entry['hash']):
+                git_blobs.add(entry['hash'])
+            else:
+                objects[entry['hash']] = entry['size']
+            owners.setdefault(entry['hash'], []).append((cp['id'], rel_path))
+    
+    counts = {'ok': 0, 'cached': 0, 'missing': 0, 'corrupted': 0}
+    verified = []
+    
+    # Blobs do Git: basta existirem (o próprio Git confere o conteúdo pelo ID)
+    missing = checkpoint_git.missing_blobs(git_blobs)
+    counts['ok'] += len(git_blobs) - len(missing)
+    counts['missing'] += len(missing)
+    for file_hash in missing:
+        for checkpoint_id, rel_path in owners[file_hash]:
+            problems[checkpoint_id][rel_path] = "blob ausente no repositório Git"
+    
+    items = (
+        (file_hash, (file_hash, size, cache.get(cache_path(object_path(file_hash)), (None,))[0]))
+        for file_hash, size in objects.items()
+    )
+    for file_hash, result, error in run_bounded(verify_object, items, jobs):
+        status, key = ('corrupted', None) if error is not None else result
+        counts[status] += 1
+        if status == 'ok':
+            verified.append((cache_path(object_path(file_hash)), key, time.time()))
+        elif status != 'cached':
+            if error is not None:
+                message = f"erro ao ler objeto: {error}"
+            else:
+                message = "objeto ausente" if status == 'missing' else "objeto corrompido"
+            for checkpoint_id, rel_path in owners[file_hash]:
+                problems[checkpoint_id][rel_path] = message
+    
+    archives = {
+        cp['id']: (os.path.join(CHECKPOINTS_DIR, cp['backup_path'], cp['archive']), cp)
+        for cp in checkpoints if cp.get('storage') == 'archive' and cp['id'] in manifests
+    }
+    items = (
+        (checkpoint_id, (archive_file, cp['archive_codec'], manifests[checkpoint_id],
+                         cache.get(cache_path(archive_file), (None,))[0]))
+        for checkpoint_id, (archive_file, cp) in archives.items()
+    )
+    for checkpoint_id, result, error in run_bounded(verify_archive, items, jobs):
+        if error is not None:
+            status, key, archive_problems = 'corrupted', None, {archives[checkpoint_id][1]['archive']: str(error)}
+        else:
+            status, key, archive_problems = result
+        counts[status] += 1
+        if status == 'ok':
+            verified.append((cache_path(archives[checkpoint_id][0]), key, time.time()))
+        elif status == 'missing':
+            archive_problems = {archives[checkpoint_id][1]['archive']: "tar ausente"}
+        problems[checkpoint_id].update(archive_problems)
+    
+    if verified:
+        checkpoint_index.record_verified(verified)
+    
+    print()
+    for cp in checkpoints:
+        cp_problems = problems[cp['id']]
+        if not cp_problems:
+            print(f"✅ #{cp['id']:03d} íntegro ({len(manifests[cp['id']])} arquivos)  {cp['description']}")
+            continue
+        print(f"❌ #{cp['id']:03d} {len(cp_problems)} problema(s)  {cp['description']}")
+        for rel_path, message in sorted(cp_problems.items()):
+            print(f"   {rel_path}: {message}")
+    
+    print()
+    print(f"📊 {counts['ok']} verificado(s), {counts['cached']} inalterado(s) desde a última verificação, "
+          f"{counts['missing']} ausente(s), {counts['corrupted']} corrompido(s)")
+    print("=" * 70)
+    
+    return 1 if not_found or any(problems.values()) else 0
+
+
+def build_parser():
+    """Cria o parser de argumentos."""
+    parser = argparse.ArgumentParser(
+        prog='checkpoint_backup.py verify',
+        description='Confere o conteúdo armazenado dos checkpoints com os hashes dos manifestos.',
+    )
+    parser.add_argument('checkpoint_ids', type=int, nargs='*', metavar='ID',
+                        help='Checkpoints a verificar')
+    parser.add_argument('--all', action='store_true',
+                        help='Verifica todos os checkpoints com backup de arquivos')
+    parser.add_argument('--jobs', '-j', type=positive_int, default=DEFAULT_JOBS, metavar='N',
+                        help=f'Número de threads de leitura (padrão: {DEFAULT_JOBS})')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Relê todo o conteúdo, mesmo o que não mudou desde a última verificação')
+    return parser
+
+
+def main(argv=None):
+    """Função principal."""
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if not args.checkpoint_ids and not args.all:
+        parser.error('informe o ID do checkpoint ou --all')
+    
+    return verify_checkpoints(
+        args.checkpoint_ids,
+        verify_all=args.all,
+        jobs=args.jobs,
+        use_cache=not args.no_cache,
+    )
+
+
+if __name__ == "__main__":
+    sys.exit(main())
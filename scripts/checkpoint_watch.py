@@ -0,0 +1,362 @@
+#!/usr/bin/env python3
+"""
+Modo Watch de Checkpoints
+Acompanha as alterações em BACKUP_INCLUDES (inotify no Linux, ou varredura
+periódica) e cria checkpoints incrementais que releem apenas o que mudou.
+"""
+
+import os
+import sys
+import argparse
+import ctypes
+import ctypes.util
+import errno
+import select
+import signal
+import struct
+import time
+
+import checkpoint_ignore
+from checkpoint_backup import (
+    BACKUP_INCLUDES,
+    DEFAULT_JOBS,
+    PROJECT_ROOT,
+    build_ignore_matcher,
+    create_checkpoint,
+    get_current_datetime,
+    initialize_checkpoints_dir,
+    iter_backup_files,
+    load_ancestor_ignores,
+    positive_int,
+    stat_key,
+)
+
+# Configurações
+DEFAULT_DEBOUNCE = 5.0       # segundos sem alterações antes do checkpoint
+DEFAULT_MAX_DELAY = 60.0     # edições contínuas: checkpoint no máximo a cada N segundos
+DEFAULT_POLL_INTERVAL = 2.0  # intervalo da varredura sem inotify
+MAX_DIRTY_PATHS = 10000      # acima disso, o próximo checkpoint percorre a árvore inteira
+WAIT_STEP = 1.0              # espera máxima por evento (para atender ao SIGTERM)
+
+# Constantes do inotify (linux/inotify.h)
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO
+              | IN_CREATE | IN_DELETE)
+EVENT_HEADER = struct.Struct('iIII')
+
+
+def log(message):
+    """Imprime a mensagem com data/hora (saída do daemon)."""
+    print(f"[{get_current_datetime()}] {message}", flush=True)
+
+
+class InotifyWatcher:
+    """Observa os diretórios de BACKUP_INCLUDES com inotify (um watch por diretório)."""
+    
+    def __init__(self):
+        self.libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self.fd = self.libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 falhou")
+        
+        self.dirs = {}  # watch -> diretório relativo ('' = raiz do projeto)
+        self.roots = {item.strip('/') for item in BACKUP_INCLUDES}
+        try:
+            self.reload()
+        except OSError:
+            self.close()
+            raise
+    
+    def reload(self):
+        """Recompila os padrões de exclusão e registra todos os diretórios observados."""
+        self.matcher = build_ignore_matcher()
+        loaded_dirs = {''}
+        
+        # Arquivos incluídos diretamente (package.json etc.) são vistos pela raiz
+        self.add_watch('')
+        for item in sorted(self.roots):
+            if os.path.isdir(os.path.join(PROJECT_ROOT, item)):
+                load_ancestor_ignores(self.matcher, item, loaded_dirs)
+                self.add_tree(item)
+    
+    def add_watch(self, rel_dir):
+        """Registra um diretório no inotify."""
+        path = os.path.join(PROJECT_ROOT, rel_dir)
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(path), WATCH_MASK)
+        if wd < 0:
+            error = ctypes.get_errno()
+            if error == errno.ENOSPC:
+                raise OSError(error, "limite de watches do inotify atingido (fs.inotify.max_user_watches)")
+            if error != errno.ENOENT:
+                raise OSError(error, os.strerror(error), path)
+            return
+        self.dirs[wd] = rel_dir
+    
+    def add_tree(self, rel_dir):
+        """Registra o diretório e todos os subdiretórios não ignorados."""
+        self.add_watch(rel_dir)
+        for rel_path, _, is_dir in checkpoint_ignore.walk_tree(PROJECT_ROOT, rel_dir, self.matcher):
+            if is_dir:
+                self.add_watch(rel_path)
+    
+    def read_events(self):
+        """Lê todos os eventos pendentes: lista de (watch, máscara, nome)."""
+        events = []
+        while True:
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                return events
+            
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+                offset += EVENT_HEADER.size
+                name = os.fsdecode(data[offset:offset + length].rstrip(b'\0'))
+                offset += length
+                events.append((wd, mask, name))
+    
+    def poll(self, timeout):
+        """Aguarda alterações por até timeout segundos. Retorna (caminhos alterados, rever tudo)."""
+        changed = set()
+        rescan = False
+        
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return changed, rescan
+        
+        for wd, mask, name in self.read_events():
+            if mask & IN_Q_OVERFLOW:
+                # Fila do kernel estourou: eventos perdidos
+                rescan = True
+                continue
+            
+            rel_dir = self.dirs.get(wd)
+            if mask & IN_IGNORED:
+                self.dirs.pop(wd, None)
+                if rel_dir in self.roots:
+                    # Um diretório de BACKUP_INCLUDES foi removido ou substituído
+                    rescan = True
+                continue
+            if rel_dir is None or not name:
+                continue
+            
+            rel_path = f"{rel_dir}/{name}" if rel_dir else name
+            if name in checkpoint_ignore.IGNORE_FILES:
+                # Padrões de exclusão mudaram
+                rescan = True
+            if rel_dir == '' and rel_path not in self.roots:
+                continue
+            
+            is_dir = bool(mask & IN_ISDIR)
+            if rel_path not in self.roots and self.matcher.is_ignored(rel_path, is_dir):
+                continue
+            if is_dir and mask & (IN_CREATE | IN_MOVED_TO):
+                # Diretório novo: observar e reler tudo o que já estiver dentro dele
+                self.add_tree(rel_path)
+            changed.add(rel_path)
+        
+        if rescan:
+            # Registrar de novo os diretórios (podem ter surgido durante eventos perdidos)
+            self.reload()
+        return changed, rescan
+    
+    def close(self):
+        """Libera o descritor do inotify (remove todos os watches)."""
+        os.close(self.fd)
+
+
+class PollingWatcher:
+    """Alternativa sem inotify: compara o stat dos arquivos a cada intervalo."""
+    
+    def __init__(self, interval=DEFAULT_POLL_INTERVAL):
+        self.interval = interval
+        self.snapshot = self.scan()
+        self.next_scan = time.monotonic() + interval
+    
+    def scan(self):
+        """Stat de todos os arquivos de BACKUP_INCLUDES: caminho -> (tamanho, mtime_ns, inode)."""
+        snapshot = {}
+        for rel_path, src_file in iter_backup_files(quiet=True):
+            try:
+                snapshot[rel_path] = stat_key(os.stat(src_file))
+            except OSError:
+                pass
+        return snapshot
+    
+    def poll(self, timeout):
+        """Aguarda até a próxima varredura (ou timeout). Retorna (caminhos alterados, rever tudo)."""
+        wait = self.next_scan - time.monotonic()
+        if wait > timeout:
+            time.sleep(timeout)
+            return set(), False
+        if wait > 0:
+            time.sleep(wait)
+        
+        current = self.scan()
+        self.next_scan = time.monotonic() + self.interval
+        changed = {
+            rel_path for rel_path in current.keys() | self.snapshot.keys()
+            if current.get(rel_path) != self.snapshot.get(rel_path)
+        }
+        self.snapshot = current
+        return changed, False
+    
+    def close(self):
+        """Nada a liberar."""
+
+
+def make_watcher(use_polling, interval):
+    """Cria o watcher com inotify, ou por varredura se não houver suporte."""
+    if not use_polling:
+        try:
+            watcher = InotifyWatcher()
+            log(f"👀 inotify: observando {len(watcher.dirs)} diretório(s)")
+            return watcher
+        except (OSError, AttributeError) as e:
+            # AttributeError: libc sem inotify (fora do Linux)
+            log(f"⚠️  inotify indisponível ({e}), usando varredura a cada {interval:g}s")
+    
+    watcher = PollingWatcher(interval)
+    log(f"👀 Varredura: observando {len(watcher.snapshot)} arquivo(s) a cada {interval:g}s")
+    return watcher
+
+
+def take_snapshot(dirty, full_scan, base_id, author, jobs):
+    """
+    Cria o checkpoint incremental. Os caminhos alterados são relativos ao
+    checkpoint base_id (o último criado pelo watch). Retorna o ID do novo
+    checkpoint, ou None se deu errado.
+    """
+    if full_scan:
+        description = "Watch: alterações (varredura completa)"
+    else:
+        description = f"Watch: {len(dirty)} caminho(s) alterado(s)"
+    
+    try:
+        metadata = create_checkpoint(description, author, incremental=True, jobs=jobs,
+                                     dirty_paths=None if full_scan else set(dirty), dirty_base=base_id)
+    except Exception as e:
+        log(f"❌ Erro ao criar checkpoint: {e}")
+        return None
+    
+    log(f"✅ Checkpoint #{metadata['id']:03d} criado ({metadata['files_count']} arquivos)")
+    return metadata['id']
+
+
+def watch(debounce=DEFAULT_DEBOUNCE, max_delay=DEFAULT_MAX_DELAY, use_polling=False,
+          interval=DEFAULT_POLL_INTERVAL, author="Manus AI", jobs=DEFAULT_JOBS):
+    """Loop principal do daemon: acumula alterações e cria checkpoints após o debounce."""
+    stop = False
+    
+    def request_stop(signum, frame):
+        nonlocal stop
+        stop = True
+    
+    signal.signal(signal.SIGTERM, request_stop)
+    signal.signal(signal.SIGINT, request_stop)
+    
+    initialize_checkpoints_dir()
+    watcher = make_watcher(use_polling, interval)
+    log(f"⏱️  Debounce de {debounce:g}s (no máximo {max_delay:g}s entre checkpoints); SIGTERM encerra")
+    
+    dirty = set()
+    # O primeiro checkpoint percorre a árvore: pode haver alterações de antes do início
+    full_scan = True
+    base_id = None
+    first_change = last_change = None
+    
+    try:
+        while not stop:
+            timeout = WAIT_STEP
+            if last_change is not None:
+                timeout = min(timeout, max(0.0, last_change + debounce - time.monotonic()))
+            
+            changed, rescan = watcher.poll(timeout)
+            now = time.monotonic()
+            
+            if changed or rescan:
+                if first_change is None:
+                    first_change = now
+                last_change = now
+                full_scan = full_scan or rescan
+                if not full_scan:
+                    dirty |= changed
+                    if len(dirty) > MAX_DIRTY_PATHS:
+                        # Memória limitada: troca a lista de caminhos por uma varredura completa
+                        full_scan = True
+                if full_scan:
+                    dirty.clear()
+            
+            if first_change is not None and (now - last_change >= debounce or now - first_change >= max_delay):
+                checkpoint_id = take_snapshot(dirty, full_scan, base_id, author, jobs)
+                if checkpoint_id is not None:
+                    base_id = checkpoint_id
+                    dirty.clear()
+                    full_scan = False
+                first_change = last_change = None
+        
+        if first_change is not None:
+            log("💾 Encerrando: criando checkpoint das alterações pendentes")
+            take_snapshot(dirty, full_scan, base_id, author, jobs)
+    finally:
+        watcher.close()
+    
+    log("👋 Watch encerrado")
+    return 0
+
+
+def positive_float(value):
+    """Tipo do argparse para segundos (> 0)."""
+    number = float(value)
+    if number <= 0:
+        raise argparse.ArgumentTypeError("deve ser maior que zero")
+    return number
+
+
+def build_parser():
+    """Cria o parser de argumentos."""
+    parser = argparse.ArgumentParser(
+        prog='checkpoint_backup.py watch',
+        description='Cria checkpoints incrementais automaticamente a cada conjunto de alterações.',
+    )
+    parser.add_argument('--debounce', type=positive_float, default=DEFAULT_DEBOUNCE, metavar='S',
+                        help=f'Segundos sem alterações antes do checkpoint (padrão: {DEFAULT_DEBOUNCE:g})')
+    parser.add_argument('--max-delay', type=positive_float, default=DEFAULT_MAX_DELAY, metavar='S',
+                        help=f'Intervalo máximo entre checkpoints com edições contínuas (padrão: {DEFAULT_MAX_DELAY:g})')
+    parser.add_argument('--poll', action='store_true',
+                        help='Usa varredura periódica em vez do inotify')
+    parser.add_argument('--interval', type=positive_float, default=DEFAULT_POLL_INTERVAL, metavar='S',
+                        help=f'Intervalo da varredura (padrão: {DEFAULT_POLL_INTERVAL:g})')
+    parser.add_argument('--author', default='Manus AI', help='Autor dos checkpoints')
+    parser.add_argument('--jobs', '-j', type=positive_int, default=DEFAULT_JOBS, metavar='N',
+                        help=f'Número de threads de leitura/cópia (padrão: {DEFAULT_JOBS})')
+    return parser
+
+
+def main(argv=None):
+    """Função principal."""
+    args = build_parser().parse_args(argv)
+    return watch(
+        debounce=args.debounce,
+        max_delay=args.max_delay,
+        use_polling=args.poll,
+        interval=args.interval,
+        author=args.author,
+        jobs=args.jobs,
+    )
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -6,11 +6,18 @@ Gera ID sequencial com data e horário para cada alteração.
 
 import os
 import sys
+import shlex
+import subprocess
+import tempfile
 from datetime import datetime
 import pytz
 
+import changelog_render
+import changelog_store
+import checkpoint_git
+
 # Configurações
-CHANGELOG_PATH = os.path.join(os.path.dirname(__file__), '..', 'CHANGELOG_CHECKPOINTS.md')
+CHANGELOG_PATH = changelog_store.CHANGELOG_PATH
 TIMEZONE = pytz.timezone('America/Sao_Paulo')  # GMT-3
 
 # Tipos de checkpoint disponíveis
@@ -29,46 +36,12 @@ CHECKPOINT_TYPES = [
     "Refatoração",
 ]
 
+# Formato do git log: registros separados por \x1e, campos por \x1f
+GIT_LOG_FORMAT = '%x1e%H%x1f%h%x1f%s%x1f%D'
+MAX_LISTED_FILES = 50
 
-def get_next_checkpoint_id():
-    """Lê o arquivo de changelog e retorna o próximo ID de checkpoint."""
-    if not os.path.exists(CHANGELOG_PATH):
-        return 1
-    
-    with open(CHANGELOG_PATH, 'r', encoding='utf-8') as f:
-        content = f.read()
-    
-    # Procurar por "CHECKPOINT #XXX"
-    import re
-    matches = re.findall(r'CHECKPOINT #(\d+)', content)
-    
-    if not matches:
-        return 1
-    
-    # Retornar o maior ID + 1
-    max_id = max(int(m) for m in matches)
-    return max_id + 1
-
-
-def get_current_datetime():
-    """Retorna data e hora atual no timezone configurado."""
-    now = datetime.now(TIMEZONE)
-    return now.strftime('%Y-%m-%d %H:%M:%S GMT-3')
-
-
-def create_checkpoint_template(checkpoint_id, checkpoint_type, author, description):
-    """Cria o template do checkpoint."""
-    datetime_str = get_current_datetime()
-    
-    template = f"""
-## 🔖 CHECKPOINT #{checkpoint_id:03d}
-**Data/Hora:** {datetime_str}  
-**Tipo:** {checkpoint_type}  
-**Autor:** {author}
-
-### Descrição:
-{description}
-
+# Seções a completar depois (python3 scripts/create_checkpoint.py edit <ID>)
+SECTIONS_TEMPLATE = """
 ### Alterações:
 - [ ] Alteração 1
 - [ ] Alteração 2
@@ -87,72 +60,173 @@ def create_checkpoint_template(checkpoint_id, checkpoint_type, author, descripti
 - [ ] Teste 1
 - [ ] Teste 2
 - [ ] Teste 3
-
----
 """
-    return template
 
 
-def append_checkpoint_to_changelog(checkpoint_content):
-    """Adiciona o checkpoint ao arquivo de changelog."""
-    if not os.path.exists(CHANGELOG_PATH):
-        print(f"❌ Erro: Arquivo {CHANGELOG_PATH} não encontrado!")
-        return False
-    
-    with open(CHANGELOG_PATH, 'r', encoding='utf-8') as f:
-        content = f.read()
-    
-    # Encontrar a posição para inserir (antes do "Resumo de Checkpoints")
-    insert_marker = "## 📊 Resumo de Checkpoints"
-    
-    if insert_marker in content:
-        parts = content.split(insert_marker)
-        new_content = parts[0] + checkpoint_content + "\n" + insert_marker + parts[1]
+def get_next_checkpoint_id():
+    """Retorna o próximo ID de checkpoint (lido da última linha do log estruturado)."""
+    return changelog_store.peek_next_id()
+
+
+def get_current_datetime():
+    """Retorna data e hora atual no timezone configurado."""
+    now = datetime.now(TIMEZONE)
+    return now.strftime('%Y-%m-%d %H:%M:%S GMT-3')
+
+
+def parse_git_log(output):
+    """Interpreta a saída de git log --numstat no formato GIT_LOG_FORMAT."""
+    commits = []
+    files = {}
+    branch = None
+    for record in output.split('\x1e')[1:]:
+        header, _, numstat = record.partition('\n')
+        full_hash, short_hash, subject, refs = header.split('\x1f')
+        commits.append({'hash': full_hash, 'short': short_hash, 'subject': subject})
+        if len(commits) == 1:
+            # Decoração do commit mais recente: 'HEAD -> main, origin/main'
+            for ref in refs.split(', '):
+                if ref.startswith('HEAD -> '):
+                    branch = ref[len('HEAD -> '):]
+        
+        for line in numstat.splitlines():
+            if not line:
+                continue
+            added, deleted, path = line.split('\t', 2)
+            counts = files.setdefault(path, [0, 0])
+            # Arquivos binários aparecem como '-'
+            counts[0] += int(added) if added != '-' else 0
+            counts[1] += int(deleted) if deleted != '-' else 0
+    return commits, files, branch
+
+
+def collect_git_changes(since=None):
+    """
+    Commits e arquivos alterados desde o commit do checkpoint anterior (ou só o HEAD),
+    com linhas inseridas/removidas por arquivo, em uma única chamada ao git log.
+    Retorna None fora de um repositório Git.
+    """
+    args = ['log', '--numstat', '--no-renames', f'--format={GIT_LOG_FORMAT}']
+    try:
+        output = checkpoint_git.run_git(*args, f'{since}..HEAD' if since else '-1').decode('utf-8', 'replace')
+    except (OSError, subprocess.CalledProcessError):
+        # O commit anterior pode não existir mais (rebase, outro clone)
+        return collect_git_changes() if since else None
+    
+    commits, files, branch = parse_git_log(output)
+    if not commits:
+        # Nenhum commit desde o checkpoint anterior: registra o HEAD sem arquivos
+        changes = collect_git_changes()
+        if changes is not None:
+            changes.update(commits=[], files={})
+        return changes
+    
+    return {'head': commits[0], 'commits': commits, 'files': files, 'branch': branch}
+
+
+def build_sections(changes):
+    """Seções Alterações/Arquivos Afetados/Commit/Testes preenchidas com os dados do Git."""
+    lines = ["### Alterações:"]
+    if changes['commits']:
+        lines += [f"- `{commit['short']}` {commit['subject']}" for commit in changes['commits']]
     else:
-        # Se não encontrar o marcador, adiciona no final
-        new_content = content + "\n" + checkpoint_content
-    
-    # Escrever de volta
-    with open(CHANGELOG_PATH, 'w', encoding='utf-8') as f:
-        f.write(new_content)
-    
-    return True
+        lines.append("- Nenhum commit desde o checkpoint anterior")
+    
+    lines += ["", "### Arquivos Afetados:"]
+    files = sorted(changes['files'].items())
+    for path, (added, deleted) in files[:MAX_LISTED_FILES]:
+        lines.append(f"- `{path}` (+{added} -{deleted})")
+    if len(files) > MAX_LISTED_FILES:
+        lines.append(f"- ... e mais {len(files) - MAX_LISTED_FILES} arquivo(s)")
+    if not files:
+        lines.append("- Nenhum arquivo alterado")
+    
+    head = changes['head']
+    lines += [
+        "",
+        "### Commit:",
+        f"- Hash: `{head['short']}`",
+        f"- Mensagem: \"{head['subject']}\"",
+        f"- Branch: {changes['branch'] or '(HEAD destacado)'}",
+        "",
+        "### Testes:",
+        "- [ ] Teste 1",
+        "- [ ] Teste 2",
+        "- [ ] Teste 3",
+    ]
+    return "\n".join(lines)
 
 
-def update_summary_table(checkpoint_id, checkpoint_type):
-    """Atualiza a tabela de resumo no changelog."""
-    if not os.path.exists(CHANGELOG_PATH):
-        return
-    
-    with open(CHANGELOG_PATH, 'r', encoding='utf-8') as f:
-        content = f.read()
-    
-    datetime_str = get_current_datetime()
-    
-    # Adicionar linha na tabela de resumo
-    table_marker = "| #006 | 2025-12-08 08:52:15 | Limpeza DB | ✅ Concluído |"
-    new_row = f"| #{checkpoint_id:03d} | {datetime_str} | {checkpoint_type} | ✅ Concluído |"
-    
-    if table_marker in content:
-        content = content.replace(table_marker, f"{table_marker}\n{new_row}")
+def create_checkpoint_template(checkpoint_type, author, description):
+    """Cria a entrada do checkpoint (o ID é atribuído ao gravar no log)."""
+    entry = {
+        'datetime': get_current_datetime(),
+        'type': checkpoint_type,
+        'author': author,
+        'description': description,
+        'sections': SECTIONS_TEMPLATE.strip(),
+    }
+    
+    changes = collect_git_changes(changelog_store.peek_last_commit())
+    if changes is not None:
+        entry['sections'] = build_sections(changes)
+        entry['commit'] = changes['head']['hash']
+    return entry
+
+
+def regenerate_changelog(log):
+    """Atualiza o CHANGELOG_CHECKPOINTS.md com o que mudou no log (chamado com a trava do log)."""
+    changelog_render.update_changelog(log)
+
+
+def append_checkpoint_to_changelog(entry):
+    """Grava a entrada no log e regera o changelog. Retorna o ID atribuído."""
+    record = changelog_store.append_entry(entry, on_change=regenerate_changelog)
+    return record['id']
+
+
+def edit_checkpoint(checkpoint_id):
+    """Abre a entrada no editor ($EDITOR) e grava a nova versão no log."""
+    entry = changelog_store.get_entry(checkpoint_id)
+    if entry is None:
+        print(f"❌ Checkpoint #{checkpoint_id:03d} não encontrado!")
+        return 1
     
-    # Atualizar "Próximo Checkpoint ID"
-    import re
-    content = re.sub(
-        r'\*\*Próximo Checkpoint ID:\*\* #\d+',
-        f'**Próximo Checkpoint ID:** #{checkpoint_id + 1:03d}',
-        content
-    )
+    original = changelog_render.render_entry(entry)
+    with tempfile.NamedTemporaryFile('w', suffix='.md', encoding='utf-8', delete=False) as f:
+        f.write(original)
+    try:
+        editor = os.environ.get('VISUAL') or os.environ.get('EDITOR') or 'vi'
+        subprocess.run([*shlex.split(editor), f.name], check=True)
+        with open(f.name, 'r', encoding='utf-8') as edited_file:
+            edited = edited_file.read()
+    finally:
+        os.remove(f.name)
+    
+    if edited == original:
+        print("ℹ️  Nenhuma alteração")
+        return 0
     
-    # Atualizar "Última Atualização"
-    content = re.sub(
-        r'\*\*Última Atualização:\*\* [\d\-: GMT\-3]+',
-        f'**Última Atualização:** {datetime_str}',
-        content
-    )
+    parsed = changelog_store.parse_markdown_entries(edited)
+    if len(parsed) != 1:
+        print("❌ O texto editado deve conter exatamente uma seção '## 🔖 CHECKPOINT #NNN'")
+        return 1
     
-    with open(CHANGELOG_PATH, 'w', encoding='utf-8') as f:
-        f.write(content)
+    # O ID, o status e o commit (que não aparece no Markdown) não mudam pela edição do texto
+    updated = {**parsed[0], 'id': checkpoint_id, 'status': entry['status']}
+    if entry.get('commit'):
+        updated['commit'] = entry['commit']
+    changelog_store.update_entry(updated, on_change=regenerate_changelog)
+    print(f"✅ Checkpoint #{checkpoint_id:03d} atualizado!")
+    return 0
+
+
+def render_mode():
+    """Regera o CHANGELOG_CHECKPOINTS.md inteiro a partir do log."""
+    with changelog_store.locked_log() as log:
+        changelog_render.write_changelog(log)
+    print(f"✅ Changelog gerado: {CHANGELOG_PATH}")
+    return 0
 
 
 def interactive_mode():
@@ -212,40 +286,27 @@ def interactive_mode():
     print("✅ Criando checkpoint...")
     print()
     
-    # Criar checkpoint
-    checkpoint_content = create_checkpoint_template(next_id, checkpoint_type, author, description)
+    # Criar checkpoint e adicionar ao changelog
+    entry = create_checkpoint_template(checkpoint_type, author, description)
+    checkpoint_id = append_checkpoint_to_changelog(entry)
     
-    # Adicionar ao changelog
-    if append_checkpoint_to_changelog(checkpoint_content):
-        update_summary_table(next_id, checkpoint_type)
-        print(f"✅ Checkpoint #{next_id:03d} criado com sucesso!")
-        print(f"📄 Arquivo: {CHANGELOG_PATH}")
-        print()
-        print("⚠️  Lembre-se de preencher:")
-        print("   - Alterações realizadas")
-        print("   - Arquivos afetados")
-        print("   - Informações do commit")
-        print("   - Testes realizados")
-    else:
-        print("❌ Erro ao criar checkpoint!")
-        return 1
+    print(f"✅ Checkpoint #{checkpoint_id:03d} criado com sucesso!")
+    print(f"📄 Arquivo: {CHANGELOG_PATH}")
+    print()
+    print("⚠️  Revise e complete (python3 scripts/create_checkpoint.py edit "
+          f"{checkpoint_id}):")
+    print("   - Alterações realizadas")
+    print("   - Testes realizados")
     
     return 0
 
 
 def quick_mode(checkpoint_type, description, author="Manus AI"):
     """Modo rápido para criar checkpoint via linha de comando."""
-    next_id = get_next_checkpoint_id()
-    
-    checkpoint_content = create_checkpoint_template(next_id, checkpoint_type, author, description)
-    
-    if append_checkpoint_to_changelog(checkpoint_content):
-        update_summary_table(next_id, checkpoint_type)
-        print(f"✅ Checkpoint #{next_id:03d} criado com sucesso!")
-        return 0
-    else:
-        print("❌ Erro ao criar checkpoint!")
-        return 1
+    entry = create_checkpoint_template(checkpoint_type, author, description)
+    checkpoint_id = append_checkpoint_to_changelog(entry)
+    print(f"✅ Checkpoint #{checkpoint_id:03d} criado com sucesso!")
+    return 0
 
 
 def main():
@@ -253,6 +314,16 @@ def main():
     if len(sys.argv) == 1:
         # Modo interativo
         return interactive_mode()
+    elif sys.argv[1] == 'render':
+        # Regerar o Markdown a partir do log
+        return render_mode()
+    elif sys.argv[1] == 'query':
+        # Buscar checkpoints (mesmo comando que checkpoint_backup.py query)
+        import checkpoint_query
+        return checkpoint_query.main(sys.argv[2:])
+    elif sys.argv[1] == 'edit' and len(sys.argv) == 3 and sys.argv[2].isdigit():
+        # Completar/corrigir uma entrada
+        return edit_checkpoint(int(sys.argv[2]))
     elif len(sys.argv) >= 3:
         # Modo rápido: python create_checkpoint.py "Tipo" "Descrição" ["Autor"]
         checkpoint_type = sys.argv[1]
@@ -271,6 +342,9 @@ def main():
         print("Uso:")
         print("  Modo interativo: python create_checkpoint.py")
         print("  Modo rápido: python create_checkpoint.py \"Tipo\" \"Descrição\" [\"Autor\"]")
+        print("  Editar entrada: python create_checkpoint.py edit ID")
+        print("  Regerar o Markdown: python create_checkpoint.py render")
+        print("  Buscar: python create_checkpoint.py query [TEXTO] [--type TIPO] [--since 30d] [--path CAMINHO]")
         return 1
 
 
@@ -2,7 +2,8 @@
 # Lista todos os checkpoints disponíveis
 
 PROJECT_ROOT="$(cd "$(dirname "${BASH_SOURCE[0]}")/.." && pwd)"
-CHECKPOINT_INDEX="$PROJECT_ROOT/.checkpoints/index.json"
+CHECKPOINT_INDEX="$PROJECT_ROOT/.checkpoints/index.db"
+LEGACY_CHECKPOINT_INDEX="$PROJECT_ROOT/.checkpoints/index.json"
 
 GREEN='\033[0;32m'
 BLUE='\033[0;34m'
@@ -10,7 +11,7 @@ YELLOW='\033[1;33m'
 RED='\033[0;31m'
 NC='\033[0m'
 
-if [ ! -f "$CHECKPOINT_INDEX" ]; then
+if [ ! -f "$CHECKPOINT_INDEX" ] && [ ! -f "$LEGACY_CHECKPOINT_INDEX" ]; then
     echo -e "${RED}❌ Nenhum checkpoint encontrado!${NC}"
     exit 1
 fi
@@ -20,25 +21,7 @@ echo -e "${BLUE}📋 CHECKPOINTS DISPONÍVEIS${NC}"
 echo -e "${BLUE}========================================${NC}"
 echo ""
 
-python3 -c "
-import json
-
-with open('$CHECKPOINT_INDEX', 'r') as f:
-    index = json.load(f)
-
-if not index['checkpoints']:
-    print('❌ Nenhum checkpoint encontrado!')
-    exit(1)
-
-print(f\"{'ID':<6} {'Data/Hora':<22} {'Commit':<10} {'Descrição'}\")
-print('-' * 80)
-
-for cp in index['checkpoints']:
-    print(f\"#{cp['id']:<5} {cp['datetime']:<22} {cp['commit_short']:<10} {cp['description']}\")
-
-print()
-print(f\"Total: {len(index['checkpoints'])} checkpoint(s)\")
-"
+python3 "$PROJECT_ROOT/scripts/checkpoint_index.py" list || exit 1
 
 echo ""
 echo -e "${YELLOW}💡 Para fazer rollback:${NC}"
@@ -20,25 +20,14 @@ cd "$PROJECT_ROOT"
 
 # Arquivo de log de checkpoints
 CHECKPOINT_LOG="$PROJECT_ROOT/.checkpoints/checkpoint_history.log"
-CHECKPOINT_INDEX="$PROJECT_ROOT/.checkpoints/index.json"
+CHECKPOINT_INDEX_CLI="$PROJECT_ROOT/scripts/checkpoint_index.py"
 
 # Criar diretório de checkpoints se não existir
 mkdir -p "$PROJECT_ROOT/.checkpoints"
 
-# Função para obter próximo ID de checkpoint
+# Função para reservar o próximo ID de checkpoint no índice
 get_next_checkpoint_id() {
-    if [ ! -f "$CHECKPOINT_LOG" ]; then
-        echo "1"
-        return
-    fi
-    
-    # Pegar o último ID e incrementar
-    last_id=$(grep -oP 'CHECKPOINT #\K\d+' "$CHECKPOINT_LOG" | tail -1)
-    if [ -z "$last_id" ]; then
-        echo "1"
-    else
-        echo $((last_id + 1))
-    fi
+    python3 "$CHECKPOINT_INDEX_CLI" reserve
 }
 
 # Função para obter data/hora atual
@@ -132,44 +121,22 @@ echo "" >> "$CHECKPOINT_LOG"
 echo -e "${GREEN}✅ Checkpoint registrado no log${NC}"
 echo ""
 
-# Criar/atualizar índice JSON
-if [ ! -f "$CHECKPOINT_INDEX" ]; then
-    echo '{
-  "version": "1.0",
-  "created_at": "'"${DATETIME}"'",
-  "checkpoints": []
-}' > "$CHECKPOINT_INDEX"
+# Registrar checkpoint no índice
+python3 "$CHECKPOINT_INDEX_CLI" record-tag "$CHECKPOINT_ID" \
+    --datetime "$DATETIME" \
+    --description "$DESCRIPTION" \
+    --tag "$TAG_NAME" \
+    --commit "$COMMIT_HASH" \
+    --commit-short "$COMMIT_SHORT" \
+    --branch "$BRANCH"
+
+# Registrar no CHANGELOG_CHECKPOINTS.md (commits e arquivos vêm do git log)
+if python3 "$PROJECT_ROOT/scripts/create_checkpoint.py" "Deploy/Rebuild" "$DESCRIPTION" "$(git log -1 --format=%an)"; then
+    echo -e "${GREEN}✅ Checkpoint registrado no changelog${NC}"
+else
+    echo -e "${YELLOW}⚠️  Não foi possível registrar o checkpoint no changelog${NC}"
 fi
 
-# Adicionar checkpoint ao índice (usando Python para manipular JSON)
-python3 -c "
-import json
-import sys
-
-index_file = '$CHECKPOINT_INDEX'
-
-with open(index_file, 'r') as f:
-    index = json.load(f)
-
-checkpoint = {
-    'id': $CHECKPOINT_ID,
-    'datetime': '$DATETIME',
-    'description': '$DESCRIPTION',
-    'tag': '$TAG_NAME',
-    'commit': '$COMMIT_HASH',
-    'commit_short': '$COMMIT_SHORT',
-    'branch': '$BRANCH'
-}
-
-index['checkpoints'].append(checkpoint)
-index['last_updated'] = '$DATETIME'
-
-with open(index_file, 'w') as f:
-    json.dump(index, f, indent=2, ensure_ascii=False)
-
-print('✅ Índice JSON atualizado')
-"
-
 echo ""
 echo -e "${BLUE}========================================${NC}"
 echo -e "${GREEN}✅ CHECKPOINT #${CHECKPOINT_ID} CRIADO COM SUCESSO!${NC}"
@@ -18,12 +18,14 @@ NC='\033[0m' # No Color
 PROJECT_ROOT="$(cd "$(dirname "${BASH_SOURCE[0]}")/.." && pwd)"
 cd "$PROJECT_ROOT"
 
-# Arquivo de índice de checkpoints
-CHECKPOINT_INDEX="$PROJECT_ROOT/.checkpoints/index.json"
+# Índice de checkpoints (SQLite; index.json antigo é migrado automaticamente)
+CHECKPOINT_INDEX="$PROJECT_ROOT/.checkpoints/index.db"
+LEGACY_CHECKPOINT_INDEX="$PROJECT_ROOT/.checkpoints/index.json"
+CHECKPOINT_INDEX_CLI="$PROJECT_ROOT/scripts/checkpoint_index.py"
 
 # Função para listar checkpoints
 list_checkpoints() {
-    if [ ! -f "$CHECKPOINT_INDEX" ]; then
+    if [ ! -f "$CHECKPOINT_INDEX" ] && [ ! -f "$LEGACY_CHECKPOINT_INDEX" ]; then
         echo -e "${RED}❌ Nenhum checkpoint encontrado!${NC}"
         echo -e "${YELLOW}   Execute um deploy primeiro para criar checkpoints.${NC}"
         exit 1
@@ -34,25 +36,7 @@ list_checkpoints() {
     echo -e "${BLUE}========================================${NC}"
     echo ""
     
-    python3 -c "
-import json
-
-with open('$CHECKPOINT_INDEX', 'r') as f:
-    index = json.load(f)
-
-if not index['checkpoints']:
-    print('❌ Nenhum checkpoint encontrado!')
-    exit(1)
-
-print(f\"{'ID':<6} {'Data/Hora':<22} {'Commit':<10} {'Descrição'}\")
-print('-' * 80)
-
-for cp in index['checkpoints']:
-    print(f\"#{cp['id']:<5} {cp['datetime']:<22} {cp['commit_short']:<10} {cp['description']}\")
-
-print()
-print(f\"Total: {len(index['checkpoints'])} checkpoint(s)\")
-"
+    python3 "$CHECKPOINT_INDEX_CLI" list || exit 1
     
     echo ""
     echo -e "${BLUE}========================================${NC}"
@@ -62,28 +46,12 @@ print(f\"Total: {len(index['checkpoints'])} checkpoint(s)\")
 get_checkpoint_info() {
     local checkpoint_id=$1
     
-    if [ ! -f "$CHECKPOINT_INDEX" ]; then
+    if [ ! -f "$CHECKPOINT_INDEX" ] && [ ! -f "$LEGACY_CHECKPOINT_INDEX" ]; then
         echo ""
         return 1
     fi
     
-    python3 -c "
-import json
-import sys
-
-with open('$CHECKPOINT_INDEX', 'r') as f:
-    index = json.load(f)
-
-checkpoint = next((cp for cp in index['checkpoints'] if cp['id'] == $checkpoint_id), None)
-
-if checkpoint:
-    print(checkpoint['tag'])
-    print(checkpoint['commit'])
-    print(checkpoint['datetime'])
-    print(checkpoint['description'])
-else:
-    sys.exit(1)
-"
+    python3 "$CHECKPOINT_INDEX_CLI" get "$checkpoint_id"
 }
 
 # Verificar se foi fornecido o ID do checkpoint
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Testes do índice de checkpoints
+Cada teste monta um projeto Git temporário com uma cópia dos scripts e cria
+checkpoints pela linha de comando, como no uso real.
+"""
+
+import os
+import sys
+import glob
+import json
+import shutil
+import subprocess
+
+import pytest
+
+SCRIPTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run(project, *args):
+    """Executa um comando no projeto temporário e retorna a saída."""
+    result = subprocess.run(args, cwd=project, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+    assert result.returncode == 0, result.stdout
+    return result.stdout
+
+
+def commit(project, message):
+    run(project, 'git', 'add', '-A')
+    run(project, 'git', '-c', 'user.name=Teste', '-c', 'user.email=teste@example.com',
+        'commit', '-q', '-m', message)
+
+
+def create_checkpoint(project, description, *options):
+    run(project, sys.executable, 'scripts/checkpoint_backup.py', description, 'Teste', *options)
+
+
+def changed_paths(project):
+    """changed_paths de todos os checkpoints do projeto, em ordem de ID."""
+    code = (
+        "import json, checkpoint_index\n"
+        "print(json.dumps([checkpoint_index.changed_paths(i) for i in checkpoint_index.list_checkpoint_ids()]))"
+    )
+    output = run(project, sys.executable, '-c', code).strip().splitlines()[-1]
+    return json.loads(output)
+
+
+def query_descriptions(project, path):
+    """Descrições dos checkpoints encontrados pela busca com o filtro --path."""
+    code = (
+        "import json, sys, checkpoint_query\n"
+        "conn = checkpoint_query.connect()\n"
+        "checkpoint_query.sync(conn)\n"
+        "print(json.dumps(sorted(row[5] for row in checkpoint_query.search(conn, path=sys.argv[1]))))"
+    )
+    output = run(project, sys.executable, '-c', code, path).strip().splitlines()[-1]
+    return json.loads(output)
+
+
+@pytest.fixture
+def project(tmp_path, monkeypatch):
+    shutil.copytree(SCRIPTS_DIR, tmp_path / 'scripts', ignore=shutil.ignore_patterns('tests', '__pycache__'))
+    (tmp_path / '.gitignore').write_text('.checkpoints/\nscripts/\n')
+    (tmp_path / 'server').mkdir()
+    for name in ('a.ts', 'b.ts', 'c.ts'):
+        (tmp_path / 'server' / name).write_text(f'// conteúdo de {name}\n' * 50)
+    run(tmp_path, 'git', 'init', '-q')
+    commit(tmp_path, 'inicial')
+    
+    monkeypatch.setenv('PYTHONPATH', os.pathsep.join(filter(None, [str(tmp_path / 'scripts'), os.environ.get('PYTHONPATH')])))
+    return tmp_path
+
+
+def test_changed_paths_between_git_and_regular_checkpoints(project):
+    create_checkpoint(project, 'Base')
+    
+    # Checkpoint --git depois de um normal: arquivos iguais têm hashes em formatos diferentes
+    (project / 'server' / 'a.ts').write_text('// a alterado\n')
+    commit(project, 'altera a')
+    create_checkpoint(project, 'Com blobs do Git', '--git')
+    
+    # E o inverso: checkpoint normal depois do --git
+    (project / 'server' / 'b.ts').write_text('// b alterado\n')
+    create_checkpoint(project, 'Depois do Git')
+    
+    manifests = sorted(glob.glob(str(project / '.checkpoints' / '*' / 'manifest.json')))
+    with open(manifests[1], encoding='utf-8') as f:
+        hashes = [entry['hash'] for entry in json.load(f)['files'].values()]
+    assert any(file_hash.startswith('git:') for file_hash in hashes)
+    
+    first, with_git, after_git = changed_paths(project)
+    assert first == ['server/a.ts', 'server/b.ts', 'server/c.ts']
+    assert with_git == ['server/a.ts']
+    assert after_git == ['server/b.ts']
+
+
+def test_query_path_filter(project):
+    create_checkpoint(project, 'Base')
+    (project / 'server' / 'a.ts.bak').write_text('// cópia de a\n')
+    create_checkpoint(project, 'Cópia de a')
+    
+    # Caminho vazio ou "/" não filtra
+    assert query_descriptions(project, '') == ['Base', 'Cópia de a']
+    assert query_descriptions(project, '/') == ['Base', 'Cópia de a']
+    
+    # O filtro casa componentes inteiros: server/a.ts não pega server/a.ts.bak
+    assert query_descriptions(project, 'server/a.ts') == ['Base']
+    assert query_descriptions(project, '/server/') == ['Base', 'Cópia de a']
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Codificação de vídeo por pipe
+Os frames (PIL.Image RGB) são enviados crus ao stdin do ffmpeg, sem gravar
+PNGs temporários em disco. A escrita no pipe bloqueia quando o ffmpeg está
+atrasado (backpressure), então a memória usada não cresce com o vídeo.
+"""
+
+import subprocess
+import tempfile
+import os
+
+
+class FFmpegWriter:
+    """Recebe frames RGB e os codifica em H.264 (yuv420p) via ffmpeg."""
+    
+    def __init__(self, output, width, height, fps, crf=23, preset="medium"):
+        self.output = output
+        self.width = width
+        self.height = height
+        self.frame_size = width * height * 3
+        self.cmd = [
+            "ffmpeg", "-y", "-loglevel", "error",
+            "-f", "rawvideo", "-pix_fmt", "rgb24",
+            "-s", f"{width}x{height}", "-framerate", str(fps),
+            "-i", "-",
+            "-c:v", "libx264", "-pix_fmt", "yuv420p",
+            "-crf", str(crf), "-preset", preset,
+            output
+        ]
+        self.process = None
+        self.stderr = None
+    
+    def __enter__(self):
+        # stderr vai para um arquivo temporário: um pipe cheio travaria o ffmpeg
+        self.stderr = tempfile.TemporaryFile()
+        self.process = subprocess.Popen(self.cmd, stdin=subprocess.PIPE, stderr=self.stderr)
+        return self
+    
+    def write(self, frame):
+        """Envia um frame (bloqueia enquanto o ffmpeg não consome os anteriores)."""
+        if frame.mode != 'RGB':
+            frame = frame.convert('RGB')
+        if frame.size != (self.width, self.height):
+            raise ValueError(f"Frame {frame.size} difere do vídeo ({self.width}x{self.height})")
+        self.write_buffer(frame.tobytes())
+    
+    def write_buffer(self, data):
+        """Envia um frame já em bytes RGB (ex: memoryview de memória compartilhada)."""
+        if len(data) != self.frame_size:
+            raise ValueError(f"Frame com {len(data)} bytes, esperado {self.frame_size}")
+        try:
+            self.process.stdin.write(data)
+        except BrokenPipeError:
+            # ffmpeg encerrou antes do fim: o motivo está no stderr
+            self.process.wait()
+            raise RuntimeError(self.error_message()) from None
+    
+    def error_message(self):
+        self.stderr.seek(0)
+        details = self.stderr.read().decode('utf-8', errors='replace').strip()
+        return f"ffmpeg falhou (código {self.process.returncode}) ao criar {self.output}:\n{details}"
+    
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            if exc_type is not None:
+                # Erro na geração dos frames: descartar o vídeo incompleto
+                self.process.kill()
+                self.process.wait()
+                if os.path.exists(self.output):
+                    os.remove(self.output)
+                return False
+            
+            try:
+                self.process.stdin.close()
+            except BrokenPipeError:
+                pass
+            if self.process.wait() != 0:
+                raise RuntimeError(self.error_message())
+        finally:
+            self.stderr.close()
+        return False